@@ -5,7 +5,12 @@ import { useParams, useRouter } from "next/navigation"
 import { ArrowLeft, Plus, Trash2, Wallet } from "lucide-react"
 import toast from "react-hot-toast"
 import { useAppDispatch, useAppSelector } from "@/redux/hooks"
-import { fetchAccounts, fetchTransactions, deleteAccount, clearTransactions } from "@/redux/slices/finance-slice"
+import {
+  fetchAccountPage,
+  fetchMoreTransactions,
+  deleteAccount,
+  clearTransactions,
+} from "@/redux/slices/finance-slice"
 import { TransactionList } from "@/components/transactions/transaction-list"
 import { AddTransactionModal } from "@/components/transactions/add-transaction-modal"
 import { Button } from "@/components/ui/button"
@@ -29,17 +34,14 @@ export default function AccountDetailPage() {
 
   const [showAddModal, setShowAddModal] = useState(false)
   const dispatch = useAppDispatch()
-  const { accounts, transactions, isLoading } = useAppSelector((state) => state.finance)
+  const { accounts, transactions, transactionsCursor, isLoading } = useAppSelector((state) => state.finance)
   console.log(accounts);
   
 
   const account = accounts.find((a) => String(a.id) === String(accountId))
 
   useEffect(() => {
-    if (accounts.length === 0) {
-      dispatch(fetchAccounts())
-    }
-    dispatch(fetchTransactions(String(accountId)))
+    dispatch(fetchAccountPage({ accountId: String(accountId), withAccounts: accounts.length === 0 }))
 
     return () => {
       dispatch(clearTransactions())
@@ -146,6 +148,18 @@ export default function AccountDetailPage() {
       <div>
         <h2 className="text-xl font-semibold mb-4">Transaction History</h2>
         <TransactionList transactions={transactions} accountId={String(accountId)} isLoading={isLoading} />
+        {transactionsCursor && !isLoading && (
+          <div className="flex justify-center mt-4">
+            <Button
+              variant="outline"
+              onClick={() =>
+                dispatch(fetchMoreTransactions({ accountId: String(accountId), cursor: transactionsCursor }))
+              }
+            >
+              Load more
+            </Button>
+          </div>
+        )}
       </div>
 
       <AddTransactionModal open={showAddModal} onOpenChange={setShowAddModal} accountId={String(accountId)} />
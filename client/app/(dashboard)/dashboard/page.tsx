@@ -3,7 +3,7 @@
 import { useEffect } from "react"
 import { DollarSign, TrendingUp, TrendingDown, RefreshCw } from "lucide-react"
 import { useAppDispatch, useAppSelector } from "@/redux/hooks"
-import { fetchDashboard, fetchForecast, fetchStats } from "@/redux/slices/finance-slice"
+import { fetchDashboardPage } from "@/redux/slices/finance-slice"
 import { SummaryCard } from "@/components/dashboard/summary-card"
 import { ForecastChart } from "@/components/dashboard/forecast-chart"
 import { RecentTransactions } from "@/components/dashboard/recent-transactions"
@@ -18,15 +18,11 @@ export default function DashboardPage() {
   console.log(forecast);
   
   useEffect(() => {
-    dispatch(fetchDashboard())
-    dispatch(fetchForecast(3))
-    dispatch(fetchStats())
+    dispatch(fetchDashboardPage(3))
   }, [dispatch])
 
   const handleRefresh = () => {
-    dispatch(fetchDashboard())
-    dispatch(fetchForecast(3))
-    dispatch(fetchStats())
+    dispatch(fetchDashboardPage(3))
   }
 
   return (
@@ -0,0 +1,30 @@
+import axiosInstance from "@/lib/axios-instance"
+
+export interface BatchRequest {
+  id?: string
+  method?: "GET" | "POST" | "PUT" | "DELETE"
+  path: string // relative to the API base URL, like the axios calls
+  body?: unknown
+  headers?: Record<string, string>
+}
+
+export interface BatchResponse<T = any> {
+  id: string | number
+  status: number
+  body: T
+  etag?: string
+}
+
+// Sends several API calls in one round trip (POST /api/batch); the token is
+// checked once and each call keeps its own status. Responses come back in order.
+export async function batch(requests: BatchRequest[]): Promise<BatchResponse[]> {
+  const response = await axiosInstance.post<{ responses: BatchResponse[] }>("/batch", {
+    requests: requests.map((request) => ({ ...request, path: `/api${request.path}` })),
+  })
+  return response.data.responses
+}
+
+// The body of a successful sub-response, or null
+export function bodyOf<T>(response: BatchResponse<T> | undefined): T | null {
+  return response && response.status >= 200 && response.status < 300 ? response.body : null
+}
@@ -1,10 +1,12 @@
 import { createSlice, createAsyncThunk } from "@reduxjs/toolkit"
 import axiosInstance from "@/lib/axios-instance"
-import type { Account, Transaction, DashboardData, ForecastData, StatsData } from "@/types"
+import { batch, bodyOf } from "@/lib/batch"
+import type { Account, Transaction, TransactionPage, DashboardData, ForecastData, StatsData } from "@/types"
 
 interface FinanceState {
   accounts: Account[]
   transactions: Transaction[]
+  transactionsCursor: string | null
   dashboard: DashboardData | null
   forecast: ForecastData | null
   stats: StatsData | null
@@ -15,6 +17,7 @@ interface FinanceState {
 const initialState: FinanceState = {
   accounts: [],
   transactions: [],
+  transactionsCursor: null,
   dashboard: null,
   forecast: null,
   stats: null,
@@ -52,6 +55,52 @@ export const fetchStats = createAsyncThunk("finance/fetchStats", async (_, { rej
   }
 })
 
+// Dashboard, forecast and stats in one round trip
+export const fetchDashboardPage = createAsyncThunk(
+  "finance/fetchDashboardPage",
+  async (months: number = 3, { rejectWithValue }) => {
+    try {
+      const [dashboard, forecast, stats] = await batch([
+        { path: "/analysis/dashboard" },
+        { path: `/analysis/forecast?months=${months}` },
+        { path: "/analysis/stats" },
+      ])
+      if (!bodyOf(dashboard)) {
+        return rejectWithValue(dashboard.body?.error || "Failed to fetch dashboard")
+      }
+      return {
+        dashboard: dashboard.body as DashboardData,
+        forecast: bodyOf<ForecastData>(forecast),
+        stats: bodyOf<StatsData>(stats),
+      }
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.error || "Failed to fetch dashboard")
+    }
+  },
+)
+
+// An account's first page of transactions, plus the account list if it isn't loaded yet
+export const fetchAccountPage = createAsyncThunk(
+  "finance/fetchAccountPage",
+  async ({ accountId, withAccounts }: { accountId: string; withAccounts: boolean }, { rejectWithValue }) => {
+    try {
+      const [transactions, accounts] = await batch([
+        { path: `/transactions/account/${accountId}` },
+        ...(withAccounts ? [{ path: "/accounts/" }] : []),
+      ])
+      if (!bodyOf(transactions)) {
+        return rejectWithValue(transactions.body?.error || "Failed to fetch transactions")
+      }
+      return {
+        page: transactions.body as TransactionPage,
+        accounts: bodyOf<Account[]>(accounts),
+      }
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.error || "Failed to fetch transactions")
+    }
+  },
+)
+
 export const fetchAccounts = createAsyncThunk("finance/fetchAccounts", async (_, { rejectWithValue }) => {
   try {
     const response = await axiosInstance.get<Account[]>("/accounts/")
@@ -98,7 +147,7 @@ export const fetchTransactions = createAsyncThunk(
   "finance/fetchTransactions",
   async (accountId:string, { rejectWithValue }) => {
     try {
-      const response = await axiosInstance.get<Transaction[]>(`/transactions/account/${accountId}`)
+      const response = await axiosInstance.get<TransactionPage>(`/transactions/account/${accountId}`)
       console.log(response);
       
       return response.data
@@ -108,6 +157,20 @@ export const fetchTransactions = createAsyncThunk(
   },
 )
 
+export const fetchMoreTransactions = createAsyncThunk(
+  "finance/fetchMoreTransactions",
+  async ({ accountId, cursor }: { accountId: string; cursor: string }, { rejectWithValue }) => {
+    try {
+      const response = await axiosInstance.get<TransactionPage>(`/transactions/account/${accountId}`, {
+        params: { cursor },
+      })
+      return response.data
+    } catch (error: any) {
+      return rejectWithValue(error.response?.data?.error || "Failed to fetch transactions")
+    }
+  },
+)
+
 export const createTransaction = createAsyncThunk(
   "finance/createTransaction",
   async (
@@ -159,6 +222,7 @@ const financeSlice = createSlice({
     },
     clearTransactions: (state) => {
       state.transactions = []
+      state.transactionsCursor = null
     },
   },
   extraReducers: (builder) => {
@@ -175,6 +239,19 @@ const financeSlice = createSlice({
         state.isLoading = false
         state.error = action.payload as string
       })
+      .addCase(fetchDashboardPage.pending, (state) => {
+        state.isLoading = true
+      })
+      .addCase(fetchDashboardPage.fulfilled, (state, action) => {
+        state.isLoading = false
+        state.dashboard = action.payload.dashboard
+        state.forecast = action.payload.forecast
+        state.stats = action.payload.stats
+      })
+      .addCase(fetchDashboardPage.rejected, (state, action) => {
+        state.isLoading = false
+        state.error = action.payload as string
+      })
       // Forecast
       .addCase(fetchForecast.fulfilled, (state, action) => {
         state.forecast = action.payload
@@ -213,12 +290,32 @@ const financeSlice = createSlice({
       })
       .addCase(fetchTransactions.fulfilled, (state, action) => {
         state.isLoading = false
-        state.transactions = action.payload
+        state.transactions = action.payload.transactions
+        state.transactionsCursor = action.payload.next_cursor
       })
       .addCase(fetchTransactions.rejected, (state, action) => {
         state.isLoading = false
         state.error = action.payload as string
       })
+      .addCase(fetchAccountPage.pending, (state) => {
+        state.isLoading = true
+      })
+      .addCase(fetchAccountPage.fulfilled, (state, action) => {
+        state.isLoading = false
+        state.transactions = action.payload.page.transactions
+        state.transactionsCursor = action.payload.page.next_cursor
+        if (action.payload.accounts) {
+          state.accounts = action.payload.accounts
+        }
+      })
+      .addCase(fetchAccountPage.rejected, (state, action) => {
+        state.isLoading = false
+        state.error = action.payload as string
+      })
+      .addCase(fetchMoreTransactions.fulfilled, (state, action) => {
+        state.transactions.push(...action.payload.transactions)
+        state.transactionsCursor = action.payload.next_cursor
+      })
       .addCase(createTransaction.fulfilled, (state, action) => {
         state.transactions.unshift(action.payload)
       })
@@ -24,6 +24,11 @@ export interface Transaction {
   created_at?: string
 }
 
+export interface TransactionPage {
+  transactions: Transaction[]
+  next_cursor: string | null
+}
+
 // Dashboard types
 export interface DashboardData {
   net_worth: number
@@ -45,6 +50,7 @@ export interface HistoryPoint {
 }
 
 export interface ForecastData {
+  model: "seasonal" | "linear"
   history: HistoryPoint[]
   forecast: ForecastPoint[]
 }
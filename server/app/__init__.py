@@ -1,21 +1,90 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from config import Config
 from flask_cors import CORS
+from sqlalchemy import event, exc
+from app.analytics_store import AnalyticsStore
+from app.cache import TTLCache, LocalSharedBackend
+from app.metrics import Registry
+from app.password_hasher import PasswordHasher
+from app.replicas import ReplicaSet, RoutingSession, replica_keys
 
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+password_hasher = PasswordHasher()
+user_cache = TTLCache(namespace="user")
+response_cache = TTLCache(namespace="response")
+# Users who wrote in the last REPLICA_READ_YOUR_WRITES_SECONDS
+recent_writes = TTLCache(namespace="writes")
+analytics_store = AnalyticsStore()
+search_store = AnalyticsStore()
+replicas = ReplicaSet()
+metrics = Registry()
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}) 
+    CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
 
+    if app.config["JSON_PROVIDER"] == "orjson":
+        from app.json_provider import OrjsonProvider
+
+        app.json = OrjsonProvider(app)
+
+    from app.db_pool import (
+        REPLICA_HEALTHY,
+        engine_options,
+        init_engine,
+        pool_timeout_response,
+    )
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+        app.config, app.config["SQLALCHEMY_DATABASE_URI"]
+    )
+    replica_uris = app.config["SQLALCHEMY_REPLICA_URIS"]
+    app.config["SQLALCHEMY_BINDS"] = {
+        key: {"url": uri, **engine_options(app.config, uri, name=key)}
+        for key, uri in zip(replica_keys(replica_uris), replica_uris)
+    }
+    app.register_error_handler(exc.TimeoutError, pool_timeout_response)
     db.init_app(app)
-    bcrypt.init_app(app)
+    password_hasher.configure(
+        workers=app.config["BCRYPT_POOL_SIZE"],
+        max_pending=app.config["BCRYPT_MAX_PENDING"],
+        rounds=app.config["BCRYPT_LOG_ROUNDS"],
+        timeout=app.config["BCRYPT_TIMEOUT"],
+    )
+    # Flask-Migrate pulls in Alembic and only serves the `flask db` commands,
+    # so it is only set up when the app is being loaded by the Flask CLI
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+    user_cache.configure(
+        maxsize=app.config["USER_CACHE_SIZE"],
+        ttl=app.config["USER_CACHE_TTL"],
+        shared=LocalSharedBackend() if app.config["USER_CACHE_SHARED"] else None,
+    )
+    response_cache.configure(
+        maxsize=app.config["RESPONSE_CACHE_SIZE"], ttl=app.config["RESPONSE_CACHE_TTL"]
+    )
+    recent_writes.configure(
+        maxsize=app.config["USER_CACHE_SIZE"],
+        ttl=app.config["REPLICA_READ_YOUR_WRITES_SECONDS"] if replica_uris else 0,
+        shared=LocalSharedBackend() if app.config["USER_CACHE_SHARED"] else None,
+    )
+    analytics_store.configure(
+        max_bytes=int(app.config["ANALYTICS_STORE_MAX_MB"] * 1024 * 1024),
+        max_users=app.config["ANALYTICS_STORE_MAX_USERS"],
+        ttl=app.config["ANALYTICS_STORE_TTL"],
+    )
+    search_store.configure(
+        max_bytes=int(app.config["SEARCH_INDEX_MAX_MB"] * 1024 * 1024),
+        max_users=app.config["ANALYTICS_STORE_MAX_USERS"],
+        ttl=app.config["ANALYTICS_STORE_TTL"],
+    )
 
     # Import and register Blueprints (Controllers)
     from app.controllers.auth_controller import auth_bp
@@ -23,14 +92,52 @@ def create_app():
     from app.controllers.account_controller import account_bp
     from app.controllers.transaction_controller import transaction_bp
     from app.controllers.analysis_controller import analysis_bp
+    from app.controllers.batch_controller import batch_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(user_bp, url_prefix="/api/users")
     app.register_blueprint(account_bp, url_prefix="/api/accounts")
     app.register_blueprint(transaction_bp, url_prefix="/api/transactions")
     app.register_blueprint(analysis_bp, url_prefix="/api/analysis")
+    app.register_blueprint(batch_bp, url_prefix="/api/batch")
+
+    if app.config["METRICS_ENABLED"]:
+        from app.controllers.metrics_controller import metrics_bp
+        from app.middlewares.instrumentation import init_instrumentation
+
+        app.register_blueprint(metrics_bp)
+        init_instrumentation(app)
+
+    if app.config["COMPRESSION_ENABLED"]:
+        from app.middlewares.compression import init_compression
+
+        init_compression(app)
+
+    # Maintenance commands (flask <group> <command>)
+    from app.commands import accounts_cli, forecasts_cli, rollups_cli, transactions_cli
+
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(forecasts_cli)
+    app.cli.add_command(accounts_cli)
+    app.cli.add_command(transactions_cli)
 
     with app.app_context():
-        db.create_all()  # Create tables
+        init_engine(db.engine, app.config)
+        replica_engines = {key: db.engines[key] for key in replica_keys(replica_uris)}
+        for key, engine in replica_engines.items():
+            init_engine(engine, app.config, name=key)
+            REPLICA_HEALTHY.set_function(lambda key=key: int(replicas.is_healthy(key)), key)
+        replicas.configure(replica_engines, app.config["REPLICA_CHECK_INTERVAL"])
+        if db.engine.dialect.name == "sqlite":
+            # SQLite leaves foreign keys (and ON DELETE CASCADE) off by default
+            event.listen(db.engine, "connect", enable_sqlite_foreign_keys)
+        if app.config["AUTO_CREATE_SCHEMA"]:
+            db.create_all(bind_key=None)  # Create tables (not on the replicas)
 
     return app
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import OrderedDict
+
+# (name, NumPy dtype) of each column: 16-byte UUID, index into the entry's
+# account list, amount, date (NaT if missing), its month (months since
+# 1970-01, -1 if no date) and whether it is income
+COLUMNS = (
+    ("ids", "S16"),
+    ("accounts", "int32"),
+    ("cents", "int64"),
+    ("dates", "datetime64[us]"),
+    ("months", "int32"),
+    ("income", "bool"),
+)
+INITIAL_CAPACITY = 64
+
+
+def uuid_bytes(value):
+    """The 16 bytes of a uuid.UUID or of a UUID string (hex, dashed or not)"""
+    if isinstance(value, str):
+        return bytes.fromhex(value.replace("-", ""))
+    return value.bytes
+
+
+class UserColumns:
+    """
+    One user's transactions as parallel NumPy arrays with spare capacity at
+    the end, so appends are amortised O(1). Readers get views of the filled
+    part (view()); appends only write past it and updates/removals replace
+    the arrays, so a view never changes under a reader.
+    """
+
+    def __init__(self, version, capacity=INITIAL_CAPACITY):
+        import numpy as np
+
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.size = 0
+        self.account_codes = {}
+        self.arrays = {name: np.empty(capacity, dtype) for name, dtype in COLUMNS}
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def view(self):
+        return {name: array[: self.size] for name, array in self.arrays.items()}
+
+    def _account_code(self, account_id):
+        return self.account_codes.setdefault(account_id, len(self.account_codes))
+
+    def _find(self, transaction_id):
+        import numpy as np
+
+        ids = self.arrays["ids"][: self.size]
+        return np.flatnonzero(ids == uuid_bytes(transaction_id))
+
+    def append(self, rows):
+        """
+        Appends (id, account_id, cents, type, date) tuples; ids may be
+        uuid.UUID or UUID strings
+        """
+        import numpy as np
+
+        rows = list(rows)
+        start, end = self.size, self.size + len(rows)
+        capacity = len(self.arrays["cents"])
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, array in self.arrays.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:start] = array[:start]
+                self.arrays[name] = grown
+
+        arrays = self.arrays
+        arrays["ids"][start:end] = [uuid_bytes(row[0]) for row in rows]
+        arrays["accounts"][start:end] = [
+            self._account_code(uuid_bytes(row[1])) for row in rows
+        ]
+        arrays["cents"][start:end] = [row[2] for row in rows]
+        arrays["income"][start:end] = [row[3] == "income" for row in rows]
+        # Aware datetimes (now() on PostgreSQL) carry the session's local time,
+        # which is what the timestamp column stores: keep the wall clock
+        arrays["dates"][start:end] = np.array(
+            [row[4] if row[4] is None else row[4].replace(tzinfo=None) for row in rows],
+            dtype="datetime64[us]",
+        )
+        dates = arrays["dates"][start:end]
+        arrays["months"][start:end] = np.where(
+            np.isnat(dates), -1, dates.astype("datetime64[M]").astype(np.int64)
+        )
+        self.size = end
+
+    def update(self, transaction_id, cents, trans_type):
+        index = self._find(transaction_id)
+        if not len(index):
+            return False
+        for name, value in (("cents", cents), ("income", trans_type == "income")):
+            array = self.arrays[name].copy()
+            array[index[0]] = value
+            self.arrays[name] = array
+        return True
+
+    def _keep(self, keep):
+        """Replaces the columns with the rows where `keep` is true"""
+        self.arrays = {
+            name: array[: self.size][keep] for name, array in self.arrays.items()
+        }
+        self.size = len(self.arrays["cents"])
+
+    def remove(self, transaction_id):
+        import numpy as np
+
+        index = self._find(transaction_id)
+        if not len(index):
+            return False
+        keep = np.ones(self.size, dtype=bool)
+        keep[index] = False
+        self._keep(keep)
+        return True
+
+    def remove_account(self, account_id):
+        code = self.account_codes.get(uuid_bytes(account_id))  # never reused
+        if code is not None:
+            self._keep(self.arrays["accounts"][: self.size] != code)
+        return True
+
+
+class AnalyticsStore:
+    """
+    Thread-safe, process-local LRU of per-user entries (UserColumns, or the
+    search fallback's UserSearchIndex), bounded by entry count and total
+    bytes (max_bytes 0 disables it). Each entry is tagged with the
+    users.data_version it reflects: a lookup at any other version misses,
+    which covers writes made by other processes, and entries expire `ttl`
+    seconds after loading to pick up writes that skipped the version bump.
+    Writes in this process patch the entry instead of dropping it.
+    """
+
+    def __init__(self, max_bytes=0, max_users=10000, ttl=600.0):
+        self.max_bytes = max_bytes
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.patches = 0
+        self.evictions = 0
+
+    def configure(self, max_bytes, max_users, ttl):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.max_users = max_users
+            self.ttl = ttl
+            self._entries.clear()
+            self.nbytes = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def _trim(self):
+        while self._entries and (
+            len(self._entries) > self.max_users or self.nbytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.nbytes -= entry.nbytes
+            self.evictions += 1
+
+    def get(self, user_id, version):
+        """Column views of the user's transactions at `version`, or None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is not None
+                and entry.version == version
+                and time.monotonic() - entry.loaded_at < self.ttl
+            ):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.view()
+            self._drop(user_id)
+            self.misses += 1
+            return None
+
+    def put(self, user_id, entry):
+        """Caches a freshly loaded entry unless a newer one is already cached"""
+        if not self.enabled:
+            return
+        with self._lock:
+            current = self._entries.get(user_id)
+            if current is not None and current.version >= entry.version:
+                return
+            self._drop(user_id)
+            self._entries[user_id] = entry
+            self.nbytes += entry.nbytes
+            self._trim()
+
+    def patch(self, user_id, version, change):
+        """
+        Applies change(entry) for the committed write that moved the user to
+        `version`. Only an entry at version - 1 holds everything before that
+        write; any other entry, or one change() fails on (returns False), is
+        dropped and reloaded on its next read.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if entry.version != version - 1:
+                self._drop(user_id)
+                return
+            before = entry.nbytes
+            if change(entry) is False:
+                self.nbytes -= before
+                del self._entries[user_id]
+                return
+            entry.version = version
+            self.nbytes += entry.nbytes - before
+            self.patches += 1
+            self._trim()
+
+    def append(self, user_id, version, rows):
+        self.patch(user_id, version, lambda entry: entry.append(rows))
+
+    def update(self, user_id, version, transaction_id, cents, trans_type):
+        self.patch(
+            user_id,
+            version,
+            lambda entry: entry.update(transaction_id, cents, trans_type),
+        )
+
+    def remove(self, user_id, version, transaction_id):
+        self.patch(user_id, version, lambda entry: entry.remove(transaction_id))
+
+    def remove_account(self, user_id, version, account_id):
+        self.patch(user_id, version, lambda entry: entry.remove_account(account_id))
+
+    def advance(self, user_id, version):
+        """A write that left the user's transactions as they were"""
+        self.patch(user_id, version, lambda entry: True)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._drop(user_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "patches": self.patches,
+                "evictions": self.evictions,
+                "user_bytes": {
+                    user_id: entry.nbytes for user_id, entry in self._entries.items()
+                },
+            }
@@ -0,0 +1,256 @@
+"""
+ASGI serving mode for the Flask app.
+
+Requests under ASYNC_PREFIXES run the normal Flask view, service and model
+code inside a greenlet on the event loop, with db.session bound to an async
+engine (asyncpg, or aiosqlite for SQLite). Each query then awaits the
+driver and yields the loop to other requests, the same way SQLAlchemy's
+AsyncSession runs the ORM, so a request waiting on the database no longer
+holds a thread. All other routes (login/registration with their bcrypt
+work, user settings, /metrics) run on a thread pool with the sync engine,
+as under a WSGI server.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import await_only, greenlet_spawn
+from app import db, enable_sqlite_foreign_keys, replicas
+from app.db_pool import engine_options, init_engine
+from app.replicas import AsyncRoutingSession, replica_keys
+
+ASYNC_PREFIXES = ("/api/accounts", "/api/transactions", "/api/analysis")
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+# Set on the WSGI environ of requests served on the event loop
+ASYNC_ENGINE_KEY = "app.async_engine"
+ASYNC_REPLICAS_KEY = "app.async_replicas"
+
+
+def async_database_uri(uri):
+    """The async-driver equivalent of a sync database URI"""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def bind_async_session():
+    """
+    Points db.session at the async engines (the primary's, and the read
+    replicas' for replica_reads) for requests served on the event loop
+    """
+    engine = request.environ.get(ASYNC_ENGINE_KEY)
+    if engine is not None:
+        replica_engines = {
+            key: replica.sync_engine
+            for key, replica in request.environ[ASYNC_REPLICAS_KEY].items()
+        }
+        db.session.registry.set(
+            AsyncRoutingSession(bind=engine.sync_engine, replica_engines=replica_engines)
+        )
+
+
+class ReceiveStream(io.RawIOBase):
+    """
+    wsgi.input that pulls the ASGI request body as the app reads it, so
+    streamed imports are not buffered. `wait` runs an awaitable to
+    completion from the calling greenlet or thread.
+    """
+
+    def __init__(self, receive, wait):
+        self._receive = receive
+        self._wait = wait
+        self._buffer = b""
+        self._more_body = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and self._more_body:
+            message = self._wait(self._receive())
+            if message["type"] == "http.disconnect":
+                self._more_body = False
+                break
+            self._buffer = message.get("body", b"")
+            self._more_body = message.get("more_body", False)
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def build_environ(scope, stream):
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(stream),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    server = scope.get("server") or ("localhost", 80)
+    environ["SERVER_NAME"] = server[0]
+    environ["SERVER_PORT"] = str(server[1])
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"][0], str(scope["client"][1])
+
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def serve_wsgi(wsgi_app, environ, send, wait):
+    """
+    Calls the WSGI app and sends its response through `send`. Runs entirely
+    in a greenlet or worker thread, including iterating streamed bodies.
+    """
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started[:] = [
+            {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        ]
+
+    body = wsgi_app(environ, start_response)
+    try:
+        # Hold one chunk back so the last one goes out with more_body=False
+        pending = None
+        for chunk in body:
+            if not chunk:
+                continue
+            if pending is None:
+                wait(send(started[0]))
+            else:
+                wait(send({"type": "http.response.body", "body": pending, "more_body": True}))
+            pending = chunk
+        if pending is None:
+            wait(send(started[0]))
+        wait(send({"type": "http.response.body", "body": pending or b""}))
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+
+
+class AsgiApp:
+    def __init__(self, flask_app):
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.async_routes = config["ASGI_ASYNC_ROUTES"]
+        self.executor = ThreadPoolExecutor(
+            max_workers=config["ASGI_THREADS"], thread_name_prefix="wsgi"
+        )
+        uri = config["ASYNC_DATABASE_URI"] or async_database_uri(
+            config["SQLALCHEMY_DATABASE_URI"]
+        )
+        self.engine = create_async_engine(
+            uri,
+            **engine_options(
+                config, uri, name="async", async_engine=True,
+                pool_size=config["ASYNC_DB_POOL_SIZE"],
+            ),
+        )
+        init_engine(self.engine.sync_engine, config, name="async")
+        # Health is checked on the sync engines (see ReplicaSet); connection
+        # failures here take a replica out of rotation too
+        replica_uris = config["SQLALCHEMY_REPLICA_URIS"]
+        self.replica_engines = {}
+        for key, replica_uri in zip(replica_keys(replica_uris), replica_uris):
+            replica_uri = async_database_uri(replica_uri)
+            replica = create_async_engine(
+                replica_uri,
+                **engine_options(
+                    config, replica_uri, name=f"async_{key}", async_engine=True,
+                    pool_size=config["ASYNC_DB_POOL_SIZE"],
+                ),
+            )
+            init_engine(replica.sync_engine, config, name=f"async_{key}")
+            replicas.watch(key, replica.sync_engine)
+            self.replica_engines[key] = replica
+
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", enable_sqlite_foreign_keys)
+        if config["METRICS_ENABLED"]:
+            from app.middlewares.instrumentation import instrument_engine
+
+            instrument_engine(self.engine.sync_engine)
+            for replica in self.replica_engines.values():
+                instrument_engine(replica.sync_engine)
+        flask_app.before_request(bind_async_session)
+
+    def is_async(self, path):
+        return self.async_routes and path.startswith(ASYNC_PREFIXES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle(scope, receive, send)
+
+    async def handle(self, scope, receive, send):
+        if self.is_async(scope["path"]):
+            environ = build_environ(scope, ReceiveStream(receive, await_only))
+            environ[ASYNC_ENGINE_KEY] = self.engine
+            environ[ASYNC_REPLICAS_KEY] = self.replica_engines
+            await greenlet_spawn(serve_wsgi, self.flask_app, environ, send, await_only)
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def wait(awaitable):
+            return asyncio.run_coroutine_threadsafe(as_coroutine(awaitable), loop).result()
+
+        environ = build_environ(scope, ReceiveStream(receive, wait))
+        await loop.run_in_executor(
+            self.executor, serve_wsgi, self.flask_app, environ, send, wait
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                for replica in self.replica_engines.values():
+                    await replica.dispose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def as_coroutine(awaitable):
+    return await awaitable
+
+
+def create_asgi_app(flask_app=None):
+    if flask_app is None:
+        from app import create_app
+
+        flask_app = create_app()
+    return AsgiApp(flask_app)
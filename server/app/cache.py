@@ -0,0 +1,135 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalSharedBackend:
+    """
+    Stand-in for a shared cache server (Redis/Memcached style get/set/delete
+    of serialised values with an expiry). Values are pickled so callers get
+    the same copy semantics a networked backend would give them.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl):
+        payload = pickle.dumps(value)
+        with self._lock:
+            self._data[key] = (time.time() + ttl, payload)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class TTLCache:
+    """
+    Thread-safe, process-local LRU cache whose entries expire `ttl` seconds
+    after they are set. With a shared backend, local misses fall through to
+    it and writes/invalidations go to both. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, shared=None, namespace=""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.namespace = namespace
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, maxsize, ttl, shared=None):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.shared = shared
+            self._data.clear()
+
+    def _shared_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key, default=None):
+        if self.ttl <= 0:
+            return default
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        if self.shared is not None:
+            value = self.shared.get(self._shared_key(key))
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _store(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), value, self.ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (
+                    round((self.hits + self.shared_hits) / lookups, 4)
+                    if lookups
+                    else 0.0
+                ),
+            }
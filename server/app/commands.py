@@ -0,0 +1,86 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+from app import db
+from app.services import forecast_service, partition_service, purge_service, rollup_service
+
+rollups_cli = AppGroup("rollups", help="Manage the monthly transaction rollups.")
+forecasts_cli = AppGroup("forecasts", help="Manage the stored income forecasts.")
+accounts_cli = AppGroup("accounts", help="Maintain accounts.")
+transactions_cli = AppGroup(
+    "transactions", help="Partition and archive the transactions table (PostgreSQL)."
+)
+
+
+@rollups_cli.command("rebuild")
+def rebuild_rollups():
+    """Recompute the monthly rollups from all existing transactions."""
+    rows = rollup_service.rebuild()
+    click.echo(f"Rebuilt {rows} monthly rollup rows")
+
+
+@forecasts_cli.command("rebuild")
+@click.option("--all", "refit_all", is_flag=True, help="Refit current forecasts too.")
+@click.option("--workers", type=int, help="Fitting processes (default FORECAST_WORKERS).")
+@click.option("--batch-size", type=int, help="Users per batch (default FORECAST_BATCH_SIZE).")
+def rebuild_forecasts(refit_all, workers, batch_size):
+    """Refit the income forecasts of users whose data changed since their last fit."""
+    started = time.perf_counter()
+    users = forecast_service.rebuild(
+        stale_only=not refit_all, workers=workers, batch_size=batch_size
+    )
+    seconds = time.perf_counter() - started
+    click.echo(f"Refitted {users} forecasts in {seconds:.1f}s")
+
+
+@accounts_cli.command("purge")
+@click.option("--chunk-size", type=int, help="Rows per DB transaction (default DELETE_CHUNK_SIZE).")
+def purge_accounts(chunk_size):
+    """Delete the rows of deleted accounts whose purge did not finish."""
+    accounts = purge_service.purge_detached(chunk_size)
+    click.echo(f"Purged {accounts} deleted accounts")
+
+
+@transactions_cli.command("partition")
+@click.option(
+    "--months-ahead",
+    type=int,
+    help="Months past the current one to create (default TRANSACTION_PARTITION_MONTHS_AHEAD).",
+)
+def partition_transactions(months_ahead):
+    """Partition the transactions table by month, or add the coming months' partitions."""
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("Partitioning needs PostgreSQL")
+    if months_ahead is None:
+        months_ahead = current_app.config["TRANSACTION_PARTITION_MONTHS_AHEAD"]
+    if not partition_service.is_partitioned():
+        started = time.perf_counter()
+        try:
+            rows = partition_service.partition_table(months_ahead)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        db.session.execute(text("ANALYZE transactions"))
+        db.session.commit()
+        seconds = time.perf_counter() - started
+        click.echo(f"Partitioned {rows} transactions by month in {seconds:.1f}s")
+    else:
+        months = partition_service.create_partitions(months_ahead)
+        click.echo(f"Added {len(months)} monthly partitions")
+
+
+@transactions_cli.command("archive")
+@click.option(
+    "--keep-months",
+    type=click.IntRange(min=1),
+    help="Months kept live, the current one included (default TRANSACTION_KEEP_MONTHS).",
+)
+def archive_transactions(keep_months):
+    """Move the transactions of old months' partitions into the archive."""
+    if not partition_service.is_partitioned():
+        raise click.ClickException("Run `flask transactions partition` first")
+    keep_months = keep_months or current_app.config["TRANSACTION_KEEP_MONTHS"]
+    for month, rows in partition_service.archive_partitions(keep_months):
+        label = f"{month:%Y-%m}" if month else "Older months"
+        click.echo(f"{label}: archived {rows} transactions")
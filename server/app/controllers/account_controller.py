@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, g
+from app.fields import parse_fields
 from app.middlewares.auth import token_required
+from app.models.account import Account
 from app.services import account_service
 
 account_bp = Blueprint("account", __name__)
@@ -18,14 +20,23 @@ def create_account():
 @account_bp.route("/", methods=["GET"])
 @token_required
 def get_all_accounts():
-    response, status = account_service.get_user_accounts(g.user)
+    """Query Params: ?fields=id,name,balance (default: all fields)"""
+    try:
+        fields = parse_fields(request.args.get("fields"), Account)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response, status = account_service.get_user_accounts(g.user, fields)
     return jsonify(response), status
 
 
 @account_bp.route("/<string:id>", methods=["GET"])
 @token_required
 def get_one_account(id):
-    response, status = account_service.get_account(g.user, id)
+    try:
+        fields = parse_fields(request.args.get("fields"), Account)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response, status = account_service.get_account(g.user, id, fields)
     return jsonify(response), status
 
 
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, g, request
 from app.middlewares.auth import token_required
+from app.middlewares.response_cache import versioned_response
 from app.services import analysis_service
 
 analysis_bp = Blueprint("analysis", __name__)
@@ -7,6 +8,7 @@ analysis_bp = Blueprint("analysis", __name__)
 
 @analysis_bp.route("/dashboard", methods=["GET"])
 @token_required
+@versioned_response
 def get_dashboard():
     """
     Returns aggregated data for the main dashboard:
@@ -18,6 +20,7 @@ def get_dashboard():
 
 @analysis_bp.route("/stats", methods=["GET"])
 @token_required
+@versioned_response
 def get_stats():
     """
     Returns: Mean, Median, Min, Max, StdDev of all transactions.
@@ -28,6 +31,7 @@ def get_stats():
 
 @analysis_bp.route("/forecast", methods=["GET"])
 @token_required
+@versioned_response
 def get_forecast():
     """
     Predicts future income based on historical monthly aggregation.
@@ -0,0 +1,136 @@
+from urllib.parse import urlsplit
+from flask import Blueprint, current_app, g, jsonify, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+from werkzeug.test import EnvironBuilder
+from app import db
+from app.middlewares.auth import BATCH_USER_KEY, token_required
+
+batch_bp = Blueprint("batch", __name__)
+
+BATCH_METHODS = ("GET", "POST", "PUT", "DELETE")
+# Blueprints whose routes a batch may call
+BATCH_BLUEPRINTS = ("account", "transaction", "analysis", "user")
+# Streamed bodies in either direction don't fit in a JSON batch
+EXCLUDED_ENDPOINTS = (
+    "transaction.export_transactions",
+    "transaction.import_transactions",
+)
+
+
+def validate_batch(data):
+    """Returns the list of sub-requests, or an error message"""
+    items = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, "Body must be {\"requests\": [...]} with at least one request"
+    limit = current_app.config["BATCH_MAX_REQUESTS"]
+    if len(items) > limit:
+        return None, f"At most {limit} requests per batch"
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f"Request {i} must be an object"
+        if str(item.get("method", "GET")).upper() not in BATCH_METHODS:
+            return None, f"Request {i}: unsupported method"
+        path = item.get("path")
+        if not isinstance(path, str) or not path.startswith("/api/"):
+            return None, f"Request {i}: path must start with /api/"
+        if not isinstance(item.get("headers", {}), dict):
+            return None, f"Request {i}: headers must be an object"
+    return items, None
+
+
+def sub_request_environ(item):
+    """WSGI environ for a sub-request, carrying the batch's authenticated user"""
+    kwargs = {"json": item["body"]} if item.get("body") is not None else {}
+    builder = EnvironBuilder(
+        path=item["path"],
+        method=str(item.get("method", "GET")).upper(),
+        base_url=request.host_url.rstrip("/") + request.script_root,
+        headers={str(k): str(v) for k, v in item.get("headers", {}).items()},
+        environ_base={"REMOTE_ADDR": request.remote_addr, BATCH_USER_KEY: g.user},
+        **kwargs,
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def run_view(app):
+    """The response of the current (sub-)request's view, errors included"""
+    try:
+        if request.routing_exception is not None:
+            raise request.routing_exception
+        endpoint = request.url_rule.endpoint
+        if request.blueprint not in BATCH_BLUEPRINTS or endpoint in EXCLUDED_ENDPOINTS:
+            return app.make_response(
+                (jsonify({"error": "Route not available in a batch"}), 400)
+            )
+        view = app.ensure_sync(app.view_functions[endpoint])
+        return app.make_response(view(**request.view_args))
+    except HTTPException as e:
+        return app.make_response((jsonify({"error": e.description}), e.code))
+    except Exception as e:
+        db.session.rollback()
+        try:
+            return app.make_response(app.handle_user_exception(e))
+        except Exception:
+            app.log_exception((type(e), e, e.__traceback__))
+            return app.make_response((jsonify({"error": "Internal server error"}), 500))
+
+
+def dispatch(item):
+    """
+    Runs one sub-request's view in a nested request context. The app
+    context, and with it g and db.session, is the batch request's own.
+    """
+    app = current_app._get_current_object()
+    with app.request_context(sub_request_environ(item)):
+        redirect = request.routing_exception
+        if isinstance(redirect, RequestRedirect):
+            # A missing trailing slash: follow it as an HTTP client would
+            location = urlsplit(redirect.new_url)
+            path = location.path[len(request.script_root) :]
+            if location.query:
+                path = f"{path}?{location.query}"
+        else:
+            response = run_view(app)
+            # A write that bailed out without rolling back must not leave its
+            # changes for the next sub-request's commit
+            if request.method != "GET":
+                db.session.rollback()
+
+    if isinstance(redirect, RequestRedirect):
+        return dispatch({**item, "path": path})
+
+    result = {"status": response.status_code, "body": None}
+    if response.is_json:
+        result["body"] = response.get_json(silent=True)
+    elif response.status_code != 304:
+        result["body"] = response.get_data(as_text=True) or None
+    etag, _ = response.get_etag()
+    if etag:
+        result["etag"] = etag
+    return result
+
+
+# Both paths, so POST /api/batch is served without a redirect
+@batch_bp.route("", methods=["POST"])
+@batch_bp.route("/", methods=["POST"])
+@token_required
+def run_batch():
+    """
+    Runs a list of sub-requests against the API routes in one round trip.
+    Body: {"requests": [{"id", "method", "path", "body", "headers"}, ...]}
+    (only path is required). The token is checked once for the batch;
+    sub-requests run in order, in one app context and DB session, and each
+    gets its own status: {"responses": [{"id", "status", "body", "etag"}]}.
+    """
+    items, error = validate_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+
+    responses = []
+    for i, item in enumerate(items):
+        responses.append({"id": item.get("id", i), **dispatch(item)})
+    return jsonify({"responses": responses}), 200
@@ -1,9 +1,37 @@
-from flask import Blueprint, request, jsonify, g
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import Blueprint, Response, request, jsonify, g, stream_with_context
+from app.fields import parse_fields
 from app.middlewares.auth import token_required
-from app.services import transaction_service
+from app.models.transaction import Transaction
+from app.money import from_cents
+from app.services import search_service, transaction_service
 
 transaction_bp = Blueprint("transaction", __name__)
 
+# What surrogateescape decoding turns invalid UTF-8 bytes into
+UNDECODABLE = re.compile("[\udc80-\udcff]")
+
+
+def parse_date_range(args):
+    """
+    Parses the optional ?from=&to= query params (ISO dates or datetimes).
+    A bare date in `to` covers that whole day. Raises ValueError on bad input.
+    """
+    date_from = date_to = None
+    if args.get("from"):
+        date_from = datetime.fromisoformat(args["from"])
+    if args.get("to"):
+        date_to = datetime.fromisoformat(args["to"])
+        if len(args["to"]) == 10:
+            date_to += timedelta(days=1)
+    return date_from, date_to
+
 
 @transaction_bp.route("/", methods=["POST"])
 @token_required
@@ -16,11 +44,219 @@ def create_transaction():
     return jsonify(response), status
 
 
+def undecodable(value):
+    """Whether a parsed CSV value holds bytes that were not valid UTF-8"""
+    if isinstance(value, list):  # the extra fields of a long row
+        return any(undecodable(item) for item in value)
+    return isinstance(value, str) and UNDECODABLE.search(value) is not None
+
+
+def iter_import_rows(stream, fmt):
+    """
+    Lazily parses a CSV (with header) or NDJSON request body into row dicts.
+    Malformed NDJSON lines and rows with invalid UTF-8 are yielded as
+    ValueError so they are reported with their row number instead of
+    aborting the import.
+    """
+    # Invalid bytes decode to lone surrogates instead of raising mid-import
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="surrogateescape", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            if any(undecodable(value) for value in row.values()):
+                yield ValueError("Invalid UTF-8")
+            else:
+                yield row
+        return
+
+    for line in text:
+        if not line.strip():
+            continue
+        if UNDECODABLE.search(line):
+            yield ValueError("Invalid UTF-8")
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield ValueError("Malformed JSON line")
+            continue
+        yield row if isinstance(row, dict) else ValueError("Row is not an object")
+
+
+@transaction_bp.route("/import", methods=["POST"])
+@token_required
+def import_transactions():
+    """
+    Bulk import from a streamed CSV or NDJSON body.
+    Format from ?format=csv|ndjson, or the Content-Type (text/csv,
+    application/x-ndjson). Columns: account_id, amount, type, description, date
+    """
+    fmt = request.args.get("format")
+    if not fmt:
+        content_type = request.mimetype or ""
+        fmt = "csv" if content_type == "text/csv" else "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Invalid format. Use 'csv' or 'ndjson'"}), 400
+
+    response, status = transaction_service.import_transactions(
+        g.user, iter_import_rows(request.stream, fmt)
+    )
+    return jsonify(response), status
+
+
+EXPORT_COLUMNS = (
+    "id",
+    "account_id",
+    "account_name",
+    "date",
+    "type",
+    "amount",
+    "description",
+)
+
+
+def export_values(row):
+    transaction_id, account_id, account_name, date, trans_type, cents, description = row
+    return (
+        str(transaction_id),
+        str(account_id),
+        account_name,
+        date.isoformat() if date else None,
+        trans_type,
+        from_cents(cents),
+        description,
+    )
+
+
+def iter_export_chunks(rows, fmt):
+    """Encodes rows in batches so each yielded chunk is a reasonably sized write"""
+    rows = iter(rows)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+    while True:
+        batch = list(islice(rows, transaction_service.EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows(export_values(row) for row in batch)
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, export_values(row)))) + "\n"
+                for row in batch
+            )
+
+
+@transaction_bp.route("/export", methods=["GET"])
+@token_required
+def export_transactions():
+    """
+    Streams the user's full transaction history.
+    Query Params: ?format=csv|ndjson (default csv)&from=YYYY-MM-DD&to=YYYY-MM-DD
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Invalid format. Use 'csv' or 'ndjson'"}), 400
+
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid from/to date"}), 400
+
+    rows = transaction_service.iter_user_transactions(g.user, date_from, date_to)
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(iter_export_chunks(rows, fmt)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{fmt}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@transaction_bp.route("/search", methods=["GET"])
+@token_required
+def search():
+    """
+    Query Params: ?q=amazon&account_id=<id>&from=YYYY-MM-DD&to=YYYY-MM-DD
+                  &limit=20&cursor=<next_cursor>&fields=id,amount,date
+    Matches descriptions with a word starting with each word of q.
+    """
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "Missing q"}), 400
+
+    account_id = request.args.get("account_id")
+    if account_id:
+        try:
+            uuid.UUID(account_id)
+        except ValueError:
+            return jsonify({"error": "Invalid account_id"}), 400
+
+    try:
+        limit = int(request.args.get("limit", search_service.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid limit parameter"}), 400
+
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid from/to date"}), 400
+
+    try:
+        fields = parse_fields(request.args.get("fields"), Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response, status = search_service.search_transactions(
+        g.user,
+        q,
+        account_id=account_id,
+        limit=limit,
+        cursor=request.args.get("cursor"),
+        date_from=date_from,
+        date_to=date_to,
+        fields=fields,
+    )
+    return jsonify(response), status
+
+
 @transaction_bp.route("/account/<string:account_id>", methods=["GET"])
 @token_required
 def get_by_account(account_id):
+    """
+    Query Params: ?limit=50&cursor=<next_cursor>&from=YYYY-MM-DD&to=YYYY-MM-DD
+                  &fields=id,amount,date (default: all fields)
+    """
+    try:
+        limit = int(request.args.get("limit", transaction_service.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid limit parameter"}), 400
+
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid from/to date"}), 400
+
+    try:
+        fields = parse_fields(request.args.get("fields"), Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     response, status = transaction_service.get_transactions_by_account(
-        g.user, account_id
+        g.user,
+        account_id,
+        limit=limit,
+        cursor=request.args.get("cursor"),
+        date_from=date_from,
+        date_to=date_to,
+        fields=fields,
     )
     return jsonify(response), status
 
@@ -28,7 +264,13 @@ def get_by_account(account_id):
 @transaction_bp.route("/<string:transaction_id>", methods=["GET"])
 @token_required
 def get_one(transaction_id):
-    response, status = transaction_service.get_transaction(g.user, transaction_id)
+    try:
+        fields = parse_fields(request.args.get("fields"), Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response, status = transaction_service.get_transaction(
+        g.user, transaction_id, fields
+    )
     return jsonify(response), status
 
 
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+from flask import jsonify
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from sqlalchemy.util import queue as sqla_queue
+from app import metrics
+
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time a request waited for a database connection (with DB_POOL_MODE=null: "
+    "the time to open one).",
+    ("pool", "outcome"),
+)
+POOL_CHECKED_OUT = metrics.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", ("pool",)
+)
+POOL_CAPACITY = metrics.gauge(
+    "db_pool_capacity", "Most connections the pool will open (pool size + overflow).", ("pool",)
+)
+POOL_SATURATION = metrics.gauge(
+    "db_pool_saturation", "Checked-out connections as a fraction of the capacity.", ("pool",)
+)
+REPLICA_HEALTHY = metrics.gauge(
+    "db_replica_healthy", "1 while the read replica passes its health checks.", ("replica",)
+)
+
+
+class TimedCheckout:
+    """
+    Pool mixin recording how long each checkout takes, including waiting
+    for a free connection, opening a new one and the pre-ping. The engine's
+    pool_logging_name is used as the `pool` label.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            connection = super().connect()
+            outcome = "ok"
+            return connection
+        except exc.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(
+                time.perf_counter() - start, self.logging_name or "default", outcome
+            )
+
+
+class FairQueue(sqla_queue.Queue):
+    """
+    The pool's queue of idle connections, handing returned connections to
+    waiting threads in arrival order. The stock queue lets a thread that
+    arrives just as a connection is returned take it ahead of the threads
+    already waiting, and with far more threads than connections some of
+    those waited until the pool timeout.
+    """
+
+    def __init__(self, maxsize=0, use_lifo=False):
+        super().__init__(maxsize, use_lifo)
+        self._waiters = deque()
+
+    def put(self, item, block=True, timeout=None):
+        with self.mutex:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter["item"] = item
+                waiter["ready"].set()
+                return
+        super().put(item, block, timeout)
+
+    def get(self, block=True, timeout=None):
+        with self.mutex:
+            if not self._waiters and not self._empty():
+                item = self._get()
+                self.not_full.notify()
+                return item
+            if not block:
+                raise sqla_queue.Empty
+            waiter = {"ready": threading.Event(), "item": None}
+            self._waiters.append(waiter)
+
+        if waiter["ready"].wait(timeout):
+            return waiter["item"]
+        with self.mutex:
+            if waiter["ready"].is_set():  # handed a connection as the wait timed out
+                return waiter["item"]
+            self._waiters.remove(waiter)
+        raise sqla_queue.Empty
+
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = FairQueue(self._pool.maxsize, use_lifo=self._pool.use_lifo)
+
+
+class TimedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(TimedCheckout, NullPool):
+    pass
+
+
+def engine_options(config, uri, name="default", async_engine=False, pool_size=None):
+    """
+    create_engine() options from the DB_POOL_* settings. DB_POOL_MODE=null
+    opens a connection per checkout and closes it afterwards, for
+    short-lived (serverless) instances behind an external pooler such as
+    PgBouncer, which then does the pooling.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite keeps its single shared connection
+
+    options = {"pool_logging_name": name}
+    if config["DB_POOL_MODE"] == "null":
+        options["poolclass"] = TimedNullPool
+        return options
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if async_engine else TimedQueuePool,
+        pool_size=pool_size or config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+        pool_recycle=config["DB_POOL_RECYCLE"],
+        pool_pre_ping=config["DB_POOL_PRE_PING"],
+    )
+    return options
+
+
+def statement_timeout_listener(timeout_ms):
+    """A "connect" listener setting the session's statement_timeout (PostgreSQL)"""
+
+    def set_statement_timeout(dbapi_connection, connection_record):
+        # Outside a transaction, or a rollback would undo the SET
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+    return set_statement_timeout
+
+
+def init_engine(engine, config, name="default"):
+    """Statement timeout and pool gauges for an engine created with engine_options()"""
+    if config["DB_STATEMENT_TIMEOUT_MS"] > 0 and engine.dialect.name == "postgresql":
+        event.listen(
+            engine, "connect", statement_timeout_listener(config["DB_STATEMENT_TIMEOUT_MS"])
+        )
+
+    def capacity():
+        if not isinstance(engine.pool, QueuePool) or config["DB_MAX_OVERFLOW"] < 0:
+            return None  # no pool, or unbounded overflow
+        return engine.pool.size() + config["DB_MAX_OVERFLOW"]
+
+    def checked_out():
+        return engine.pool.checkedout() if isinstance(engine.pool, QueuePool) else None
+
+    def saturation():
+        total = capacity()
+        return checked_out() / total if total else None
+
+    POOL_CAPACITY.set_function(capacity, name)
+    POOL_CHECKED_OUT.set_function(checked_out, name)
+    POOL_SATURATION.set_function(saturation, name)
+
+
+def pool_timeout_response(error):
+    """No connection freed up within DB_POOL_TIMEOUT: shed the request with a 503"""
+    response = jsonify({"error": "Server is busy, please try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
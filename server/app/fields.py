@@ -0,0 +1,47 @@
+"""
+Sparse fieldsets: ?fields=id,amount selects and serialises only the named
+API fields. Models list theirs in api_fields() as name -> (column,
+converter); rows selected with select_columns() are turned into dicts by
+serializer() without loading ORM entities.
+"""
+
+
+def parse_fields(value, model):
+    """
+    Parses a comma-separated ?fields= value. Returns None when absent (all
+    fields), else the requested names in the model's field order. Raises
+    ValueError for unknown or empty field lists.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    available = model.api_fields()
+    unknown = requested - available.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in available if name in requested]
+
+
+def select_columns(model, fields=None):
+    """The labelled columns for the fields (all by default), in that order"""
+    available = model.api_fields()
+    return [available[name][0].label(name) for name in fields or available]
+
+
+def serializer(model, fields=None):
+    """
+    Returns row -> dict for rows whose leading columns come from
+    select_columns(model, fields); any further columns are ignored
+    """
+    available = model.api_fields()
+    plan = [(name, available[name][1]) for name in fields or available]
+
+    def to_dict(row):
+        return {
+            name: value if convert is None or value is None else convert(value)
+            for (name, convert), value in zip(plan, row)
+        }
+
+    return to_dict
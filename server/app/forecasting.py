@@ -0,0 +1,157 @@
+import datetime
+
+SEASONAL = "seasonal"
+LINEAR = "linear"
+# Below 13 months some calendar month has no observation to fit
+MIN_SEASONAL_MONTHS = 13
+
+
+def month_index(date):
+    """Months since 0000-01 of a date, so consecutive months differ by one"""
+    return date.year * 12 + date.month - 1
+
+
+def month_date(index):
+    """First day of the month of a month_index"""
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_label(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class IncomeMatrix:
+    """
+    Monthly income of a batch of users, densely: totals[u, m] is user u's
+    income in cents in month first_month + m (0 if none) and present[u, m]
+    whether that month had income at all. Built from (user_id,
+    data_version, [(month_index, cents), ...]) tuples, months ascending and
+    at least one per user.
+    """
+
+    def __init__(self, users):
+        import numpy as np
+
+        self.user_ids = [user_id for user_id, _, _ in users]
+        self.versions = [version for _, version, _ in users]
+        firsts = np.array([months[0][0] for _, _, months in users])
+        lasts = np.array([months[-1][0] for _, _, months in users])
+        self.first_month = int(firsts.min())
+        self.starts = firsts - self.first_month
+        self.ends = lasts - self.first_month
+
+        shape = (len(users), int(self.ends.max()) + 1)
+        self.totals = np.zeros(shape)
+        self.present = np.zeros(shape, dtype=bool)
+        for row, (_, _, months) in enumerate(users):
+            columns = [month - self.first_month for month, _ in months]
+            self.totals[row, columns] = [cents for _, cents in months]
+            self.present[row, columns] = True
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def fit_args(self, seasonal_min_months):
+        return self.totals, self.starts, self.ends, self.first_month, seasonal_min_months
+
+    def history(self, row):
+        """
+        (first month_index, [cents or None]) of the user: income in each
+        month up to their last one, None where there was none
+        """
+        import numpy as np
+
+        start, end = self.starts[row], self.ends[row] + 1
+        cents = np.rint(self.totals[row, start:end]).astype(np.int64).tolist()
+        present = self.present[row, start:end].tolist()
+        return int(self.first_month + start), [
+            total if income else None for total, income in zip(cents, present)
+        ]
+
+
+def _solve(weights, totals, design):
+    """
+    Weighted least squares of every row of `totals` on the (months, k)
+    `design`, weighting month m of user u by weights[u, m]. Returns (users, k).
+    """
+    import numpy as np
+
+    k = design.shape[1]
+    outer = (design[:, :, None] * design[:, None, :]).reshape(len(design), k * k)
+    gram = (weights @ outer).reshape(-1, k, k)
+    moments = (weights * totals) @ design
+    return np.linalg.solve(gram, moments[:, :, None])[:, :, 0]
+
+
+def fit(totals, starts, ends, first_month, seasonal_min_months=24):
+    """
+    Fits the monthly income of many users at once. Each row of the (users,
+    months) float `totals` is one user's income in cents (0 for months
+    without any); column 0 is month_index `first_month`. Row u is fitted
+    over its columns starts[u]..ends[u] (at least two months): with a trend
+    plus one offset per calendar month once that spans seasonal_min_months,
+    else with a straight line. The fits of each kind are solved together,
+    the normal equations of every user coming from one matrix product.
+
+    Returns (models, intercepts, slopes, seasonals), where user u's
+    prediction t months after its start month is
+    intercepts[u] + slopes[u] * t + seasonals[u, calendar month], with
+    seasonals indexed January first and all zero for linear fits.
+    """
+    import numpy as np
+
+    users, months = totals.shape
+    columns = np.arange(months)
+    weights = (
+        (columns >= starts[:, None]) & (columns <= ends[:, None])
+    ).astype(np.float64)
+    seasonal = ends - starts + 1 >= max(seasonal_min_months, MIN_SEASONAL_MONTHS)
+
+    intercepts = np.zeros(users)
+    slopes = np.zeros(users)
+    seasonals = np.zeros((users, 12))
+
+    # Straight line: totals = a + b * column
+    linear = ~seasonal
+    if linear.any():
+        design = np.column_stack([np.ones(months), columns])
+        coefficients = _solve(weights[linear], totals[linear], design)
+        slopes[linear] = coefficients[:, 1]
+        intercepts[linear] = coefficients[:, 0] + coefficients[:, 1] * starts[linear]
+
+    # Trend plus seasonality: totals = b * column + c[calendar month]. The
+    # offsets are split into their mean (the intercept) and deviations from it
+    if seasonal.any():
+        calendar = (first_month + columns) % 12
+        design = np.column_stack([columns, np.eye(12)[calendar]])
+        coefficients = _solve(weights[seasonal], totals[seasonal], design)
+        offsets = coefficients[:, 1:]
+        level = offsets.mean(axis=1)
+        slopes[seasonal] = coefficients[:, 0]
+        intercepts[seasonal] = level + coefficients[:, 0] * starts[seasonal]
+        seasonals[seasonal] = offsets - level[:, None]
+
+    models = np.where(seasonal, SEASONAL, LINEAR)
+    return models, intercepts, slopes, seasonals
+
+
+def fit_batch(args):
+    """fit() over one tuple of its arguments, for process pools"""
+    return fit(*args)
+
+
+def predict(intercept, slope, seasonal, first_month, last_month, months):
+    """
+    [(month_index, cents)] predicted for the `months` months after
+    last_month by a fit() result, never below zero
+    """
+    return [
+        (
+            month,
+            max(
+                0,
+                round(intercept + slope * (month - first_month) + seasonal[month % 12]),
+            ),
+        )
+        for month in range(last_month + 1, last_month + 1 + months)
+    ]
@@ -1,38 +1,80 @@
 from functools import wraps
 from flask import request, jsonify, current_app, g
 import jwt
+from sqlalchemy.orm import make_transient_to_detached
+from app import db, user_cache
+from app.middlewares.instrumentation import timed
 from app.models.user import User
 
+# Columns kept in the user cache; password_hash is left out on purpose and is
+# lazily loaded from the DB if anything reads it.
+CACHED_USER_FIELDS = ("id", "username", "email", "created_at")
+# WSGI environ key of the user a POST /api/batch sub-request runs as
+BATCH_USER_KEY = "app.batch_user"
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
 
-        # Check Authorization header: "Bearer <token>"
-        if "Authorization" in request.headers:
-            auth_header = request.headers["Authorization"]
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split(" ")[1]
+def load_user(user_id):
+    """
+    Resolves a verified token's user id to a session-attached User, from the
+    user cache when possible so most requests skip the users lookup.
+    """
+    data = user_cache.get(user_id)
+    if data is None:
+        user = User.query.filter_by(id=user_id).first()
+        if user:
+            user_cache.set(
+                user_id, {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+            )
+        return user
 
-        if not token:
-            return jsonify({"message": "Token is missing!"}), 401
+    user = User(**data)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
-        try:
-            # Decode token
-            data = jwt.decode(
-                token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-            )
-            # Get current user and attach to g (global context)
-            current_user = User.query.filter_by(id=data["user_id"]).first()
-            if not current_user:
-                return jsonify({"message": "User invalid!"}), 401
-            g.user = current_user
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired!"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Token is invalid!"}), 401
 
+def authenticate():
+    """Sets g.user from the request's bearer token; returns an error response or None"""
+    # Sub-requests of a batch run as the user the batch was authenticated as
+    batch_user = request.environ.get(BATCH_USER_KEY)
+    if batch_user is not None:
+        g.user = batch_user
+        return None
+
+    token = None
+
+    # Check Authorization header: "Bearer <token>"
+    if "Authorization" in request.headers:
+        auth_header = request.headers["Authorization"]
+        if auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+
+    if not token:
+        return jsonify({"message": "Token is missing!"}), 401
+
+    try:
+        # Decode token
+        data = jwt.decode(
+            token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
+        )
+        # Get current user and attach to g (global context)
+        current_user = load_user(data["user_id"])
+        if not current_user:
+            return jsonify({"message": "User invalid!"}), 401
+        g.user = current_user
+    except jwt.ExpiredSignatureError:
+        return jsonify({"message": "Token has expired!"}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({"message": "Token is invalid!"}), 401
+    return None
+
+
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with timed("auth"):
+            error = authenticate()
+        if error is not None:
+            return error
         return f(*args, **kwargs)
 
     return decorated
@@ -0,0 +1,93 @@
+import gzip
+import zlib
+from flask import request
+from app.middlewares.instrumentation import timed
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+
+def is_compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith("text/")
+
+
+def compressor(encoding, config):
+    """Returns (compress(chunk), flush(), finish()) for a streamed body"""
+    if encoding == "br":
+        stream = brotli.Compressor(quality=config["COMPRESSION_BROTLI_QUALITY"])
+        return stream.process, stream.flush, stream.finish
+    # wbits 31: a gzip header and trailer around the deflate stream
+    stream = zlib.compressobj(config["COMPRESSION_GZIP_LEVEL"], zlib.DEFLATED, 31)
+    return stream.compress, lambda: stream.flush(zlib.Z_SYNC_FLUSH), stream.flush
+
+
+def compress(data, encoding, config):
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESSION_BROTLI_QUALITY"])
+    return gzip.compress(data, compresslevel=config["COMPRESSION_GZIP_LEVEL"], mtime=0)
+
+
+def compress_stream(chunks, encoding, config):
+    """
+    Compresses a streamed body chunk by chunk, flushing after each one so
+    the client still receives every chunk as soon as it is generated
+    """
+    process, flush, finish = compressor(encoding, config)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def init_compression(app):
+    """
+    Compresses responses with the encoding the client prefers (br, then
+    gzip): JSON, NDJSON, CSV and text bodies of at least
+    COMPRESSION_MIN_SIZE bytes, and streamed exports whatever their size.
+    The ETag of a compressed response is made weak, as its bytes differ
+    from the uncompressed representation's.
+    """
+    config = app.config
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code != 200
+            or "Content-Encoding" in response.headers
+            or not is_compressible(response)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESSION_MIN_SIZE"]:
+                return response
+            with timed("compress"):
+                response.set_data(compress(data, encoding, config))
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
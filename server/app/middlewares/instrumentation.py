@@ -0,0 +1,113 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from app import db, metrics, response_cache, user_cache
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Wall time of a request until its response is returned.",
+    ("method", "route", "status"),
+)
+REQUEST_QUERIES = metrics.histogram(
+    "http_request_sql_queries",
+    "SQL statements executed per request.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100),
+)
+REQUEST_PHASE_DURATION = metrics.histogram(
+    "http_request_phase_duration_seconds",
+    "Time per request spent in the database, token_required and bcrypt "
+    "(phases overlap: auth includes its user lookup query).",
+    ("method", "route", "phase"),
+)
+
+
+CACHE_ENTRIES = metrics.gauge("cache_entries", "Entries in a process-local cache.", ("cache",))
+CACHE_LOOKUPS = metrics.counter_function(
+    "cache_lookups_total",
+    "Cache lookups by outcome: hit, shared_hit (found in the shared backend) or miss.",
+    ("cache", "outcome"),
+)
+CACHE_EVICTIONS = metrics.counter_function(
+    "cache_evictions_total", "Entries evicted from a full cache.", ("cache",)
+)
+for name, cache in (("user", user_cache), ("response", response_cache)):
+    CACHE_ENTRIES.set_function(lambda cache=cache: cache.stats()["size"], name)
+    CACHE_EVICTIONS.set_function(lambda cache=cache: cache.evictions, name)
+    for outcome, counter in (("hit", "hits"), ("shared_hit", "shared_hits"), ("miss", "misses")):
+        CACHE_LOOKUPS.set_function(
+            lambda cache=cache, counter=counter: getattr(cache, counter), name, outcome
+        )
+
+
+def add_timing(phase, seconds):
+    """Adds to the current request's time for `phase`; a no-op outside requests"""
+    if has_request_context() and "timings" in g:
+        g.timings[phase] += seconds
+
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - start)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.instrumentation_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "timings" in g:
+        g.sql_queries += 1
+        g.timings["db"] += time.perf_counter() - context.instrumentation_start
+
+
+def start_request():
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.timings = defaultdict(float)
+
+
+def finish_request(response):
+    """
+    Records the request in the /metrics histograms and adds a Server-Timing
+    header. Streamed bodies are generated after this runs, so their time is
+    not included.
+    """
+    if "request_started" not in g or request.endpoint == "metrics.get_metrics":
+        return response
+
+    total = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    method = request.method
+
+    REQUEST_DURATION.observe(total, method, route, str(response.status_code))
+    REQUEST_QUERIES.observe(g.sql_queries, method, route)
+    g.timings.setdefault("db", 0.0)
+    for phase, seconds in g.timings.items():
+        REQUEST_PHASE_DURATION.observe(seconds, method, route, phase)
+
+    entries = [f"app;dur={total * 1000:.2f}"]
+    for phase, seconds in sorted(g.timings.items()):
+        desc = f';desc="{g.sql_queries} queries"' if phase == "db" else ""
+        entries.append(f"{phase}{desc};dur={seconds * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def init_instrumentation(app):
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    with app.app_context():
+        for engine in db.engines.values():  # the primary and any read replicas
+            instrument_engine(engine)
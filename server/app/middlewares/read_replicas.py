@@ -0,0 +1,37 @@
+from functools import wraps
+from sqlalchemy import exc
+from app import db, recent_writes, replicas
+from app.replicas import READ_REPLICA
+from app.services import user_service
+
+
+def replica_reads(f):
+    """
+    Runs a read-only service function, whose first argument is the user,
+    with its SELECTs on the next healthy read replica. It stays on the
+    primary while the user wrote in the last REPLICA_READ_YOUR_WRITES_SECONDS
+    (see user_service.bump_data_version) or the replica has not yet replayed
+    their latest write (an older data version), and is rerun there if the
+    replica fails during the call.
+    """
+
+    @wraps(f)
+    def decorated(user, *args, **kwargs):
+        key = None
+        if replicas and recent_writes.get(str(user.id)) is None:
+            key = replicas.choose()
+        if key is not None:
+            version = user_service.get_data_version(user)
+            token = READ_REPLICA.set(key)
+            try:
+                if user_service.get_data_version(user) >= version:
+                    return f(user, *args, **kwargs)
+            except exc.DBAPIError:
+                if replicas.is_healthy(key):
+                    raise
+                db.session.rollback()
+            finally:
+                READ_REPLICA.reset(token)
+        return f(user, *args, **kwargs)
+
+    return decorated
@@ -0,0 +1,48 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import request, g, make_response, current_app
+from app import response_cache
+from app.services import user_service
+
+
+def versioned_response(f):
+    """
+    Caches a view's 200 responses per (user, endpoint, query params, data
+    version) and answers matching If-None-Match requests with an empty 304.
+    A hit costs one lookup of the user's data version; any account or
+    transaction write bumps that version, which retires the old entries.
+    Must be applied below @token_required.
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = (
+            str(g.user.id),
+            request.endpoint,
+            tuple(sorted(request.args.items(multi=True))),
+            user_service.get_data_version(g.user),
+            # Dashboard totals are "this month", so roll over with the calendar
+            date.today().strftime("%Y-%m"),
+        )
+        etag = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+        # Weak comparison: compression hands clients a weakened ETag
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+        else:
+            cached = response_cache.get(key)
+            if cached is None:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_cache.set(key, (response.get_data(), response.mimetype))
+            else:
+                body, mimetype = cached
+                response = current_app.response_class(body, mimetype=mimetype)
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return decorated
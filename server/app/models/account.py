@@ -1,27 +1,54 @@
 import uuid
 from app import db
-from sqlalchemy.dialects.postgresql import UUID
+from app.money import from_cents
+from app.models.types import UUID
 
 
 class Account(db.Model):
     __tablename__ = "accounts"
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
+    # NULL once the account is deleted, while its rows are purged (purge_service)
+    user_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
     name = db.Column(db.String(100), nullable=False)
-    balance = db.Column(db.Float, default=0.0)
+    # Money is stored as integer cents; the API speaks decimal amounts
+    balance_cents = db.Column(
+        db.BigInteger, nullable=False, default=0, server_default="0"
+    )
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     # Relationships
+    # The database deletes the transactions (ON DELETE CASCADE); without
+    # passive_deletes the ORM would load them all to delete them one by one
     transactions = db.relationship(
-        "Transaction", backref="account", lazy=True, cascade="all, delete-orphan"
+        "Transaction",
+        backref="account",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
+    @classmethod
+    def api_fields(cls):
+        """API field -> (column, converter), for ?fields= projections"""
+        return {
+            "id": (cls.id, str),
+            "user_id": (cls.user_id, str),
+            "name": (cls.name, None),
+            "balance": (cls.balance_cents, from_cents),
+            "created_at": (cls.created_at, None),
+        }
+
     def to_dict(self):
         return {
             "id": str(self.id),
             "user_id": str(self.user_id),
             "name": self.name,
-            "balance": self.balance,
+            "balance": from_cents(self.balance_cents),
             "created_at": self.created_at,
         }
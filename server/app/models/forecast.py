@@ -0,0 +1,29 @@
+from app import db
+from app.models.types import UUID
+
+
+class Forecast(db.Model):
+    """
+    A user's fitted income model and the monthly history it was fitted on,
+    current while data_version matches the user's
+    """
+
+    __tablename__ = "forecasts"
+
+    user_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    data_version = db.Column(db.BigInteger, nullable=False)
+    model = db.Column(db.String(10), nullable=False)  # 'seasonal' or 'linear'
+    first_month = db.Column(db.Date, nullable=False)  # first day of the month
+    last_month = db.Column(db.Date, nullable=False)
+    # Cents, t months after first_month:
+    # intercept + slope * t + seasonal[calendar month, January first]
+    intercept = db.Column(db.Float, nullable=False)
+    slope = db.Column(db.Float, nullable=False)
+    seasonal = db.Column(db.JSON, nullable=False)
+    # Income in cents of each month from first_month, null for months without
+    history = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, server_default=db.func.now())
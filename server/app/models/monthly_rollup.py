@@ -0,0 +1,28 @@
+from app import db
+from app.money import from_cents
+from app.models.types import UUID
+
+
+class MonthlyRollup(db.Model):
+    """Per-account, per-month, per-type totals maintained by the transaction writes"""
+
+    __tablename__ = "monthly_rollups"
+
+    account_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
+    type = db.Column(db.String(10), primary_key=True)  # 'income' or 'expense'
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "account_id": str(self.account_id),
+            "month": self.month.strftime("%Y-%m"),
+            "type": self.type,
+            "total": from_cents(self.total_cents),
+            "count": self.count,
+        }
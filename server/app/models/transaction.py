@@ -1,6 +1,29 @@
 import uuid
+from sqlalchemy import Text, cast, func, literal_column
 from app import db
-from sqlalchemy.dialects.postgresql import UUID
+from app.money import from_cents
+from app.models.types import UUID
+
+
+def search_vector(description, account_id):
+    """
+    A transaction's full-text search document on PostgreSQL: each word of
+    its lowercased description (split on non-word characters) as an
+    '<account id>:<word>' lexeme. A prefix query then only expands over the
+    index entries of the accounts searched, however common the word is in
+    other users' transactions. Constants are inlined so that queries match
+    the index under any driver.
+    """
+    prefix = cast(account_id, Text).op("||")(literal_column("':'"))
+    words = func.regexp_replace(
+        func.lower(func.coalesce(description, literal_column("''"))),
+        literal_column(r"'\W+'"),
+        literal_column("' '").op("||")(prefix),
+        literal_column("'g'"),
+    )
+    return func.array_to_tsvector(
+        func.string_to_array(prefix.op("||")(words), literal_column("' '"))
+    )
 
 
 class Transaction(db.Model):
@@ -8,18 +31,47 @@ class Transaction(db.Model):
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id = db.Column(
-        UUID(as_uuid=True), db.ForeignKey("accounts.id"), nullable=False
+        UUID(as_uuid=True),
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
     )
-    amount = db.Column(db.Float, nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
     description = db.Column(db.String(200))
     type = db.Column(db.String(10), nullable=False)  # 'income' or 'expense'
     date = db.Column(db.DateTime, server_default=db.func.now())
 
+    __table_args__ = (
+        # Account history paging (newest first) and the dashboard's date scans
+        db.Index(
+            "ix_transactions_account_id_date", account_id, date.desc(), id.desc()
+        ),
+        # Per-type analysis queries (income forecast, monthly totals)
+        db.Index("ix_transactions_account_id_type_date", account_id, type, date),
+        # GET /api/transactions/search (see search_service)
+        db.Index(
+            "ix_transactions_search",
+            search_vector(description, account_id),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @classmethod
+    def api_fields(cls):
+        """API field -> (column, converter), for ?fields= projections"""
+        return {
+            "id": (cls.id, str),
+            "account_id": (cls.account_id, str),
+            "amount": (cls.amount_cents, from_cents),
+            "description": (cls.description, None),
+            "type": (cls.type, None),
+            "date": (cls.date, None),
+        }
+
     def to_dict(self):
         return {
             "id": str(self.id),
             "account_id": str(self.account_id),
-            "amount": self.amount,
+            "amount": from_cents(self.amount_cents),
             "description": self.description,
             "type": self.type,
             "date": self.date,
@@ -0,0 +1,47 @@
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects import postgresql
+from app import db
+from app.models.types import UUID
+
+
+def array_of(item_type):
+    """ARRAY on PostgreSQL; archiving is PostgreSQL-only, JSON keeps create_all working elsewhere"""
+    return db.JSON().with_variant(postgresql.ARRAY(item_type), "postgresql")
+
+
+class TransactionArchive(db.Model):
+    """
+    Transactions of one account and month moved out of a detached partition
+    by `flask transactions archive`, as parallel arrays ordered by date.
+    PostgreSQL compresses the arrays (TOAST), and they can be unnested back
+    into rows; the archived transactions are read-only.
+    """
+
+    __tablename__ = "transaction_archives"
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    month = db.Column(db.Date, nullable=False)  # first day of the month
+    count = db.Column(db.Integer, nullable=False)
+    ids = db.Column(array_of(UUID(as_uuid=True)), nullable=False)
+    amounts = db.Column(array_of(db.BigInteger), nullable=False)  # cents
+    descriptions = db.Column(array_of(db.String(200)), nullable=False)
+    types = db.Column(array_of(db.String(10)), nullable=False)
+    dates = db.Column(array_of(db.DateTime), nullable=False)
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (db.Index("ix_transaction_archives_account_id_month", account_id, month),)
+
+
+# Tuples past 128 bytes get their arrays compressed, not only those past ~2kB
+event.listen(
+    TransactionArchive.__table__,
+    "after_create",
+    DDL("ALTER TABLE transaction_archives SET (toast_tuple_target = 128)").execute_if(
+        dialect="postgresql"
+    ),
+)
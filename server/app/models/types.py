@@ -0,0 +1,19 @@
+import uuid
+from sqlalchemy.types import TypeDecorator, Uuid
+
+
+class UUID(TypeDecorator):
+    """
+    Native UUID on PostgreSQL and CHAR(32) elsewhere (SQLite), where a column
+    declared as UUID gets numeric affinity and would turn hex values such as
+    1234e567... into floats. Also accepts UUID strings as bind values, where
+    SQLAlchemy expects uuid.UUID.
+    """
+
+    impl = Uuid
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return uuid.UUID(value)
+        return value
@@ -1,6 +1,6 @@
 import uuid
 from app import db
-from sqlalchemy.dialects.postgresql import UUID
+from app.models.types import UUID
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -10,9 +10,13 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # Bumped by every account/transaction write; keys the analysis response cache
+    data_version = db.Column(db.BigInteger, nullable=False, server_default="0")
     
     # Relationships
-    accounts = db.relationship('Account', backref='owner', lazy=True, cascade="all, delete-orphan")
+    accounts = db.relationship(
+        'Account', backref='owner', lazy=True, cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def to_dict(self):
         return {
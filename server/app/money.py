@@ -0,0 +1,39 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import BigInteger, cast, func
+
+CENT = Decimal("0.01")
+MAX_CENTS = 2**63 - 1  # BIGINT
+
+
+def to_cents(value):
+    """
+    Parses a decimal amount (JSON number or string, e.g. 12.5 or "12.50")
+    into integer cents, rounding half up past the second decimal place.
+    Raises ValueError for anything that is not a finite number or does not
+    fit the BIGINT cents columns.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        amount = Decimal(str(value).strip())
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount: {value!r}")
+        cents = int(amount.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not -MAX_CENTS <= cents <= MAX_CENTS:
+        raise ValueError(f"Amount out of range: {value!r}")
+    return cents
+
+
+def from_cents(cents):
+    """
+    Integer cents as the decimal amount the API returns. cents / 100 is the
+    float closest to the decimal, so it serialises as exactly e.g. 12.34.
+    """
+    return None if cents is None else int(cents) / 100
+
+
+def sum_cents(column):
+    """SUM of a cents column as a BIGINT (PostgreSQL's sum(bigint) is numeric)"""
+    return cast(func.sum(column), BigInteger)
@@ -0,0 +1,126 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import bcrypt as bcrypt_lib
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusy(Exception):
+    """Too many hashes already queued, or one did not finish in time"""
+
+
+def hash_password(password, rounds):
+    salt = bcrypt_lib.gensalt(rounds=rounds)
+    return bcrypt_lib.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def check_password(pw_hash, password):
+    return bcrypt_lib.checkpw(password.encode("utf-8"), pw_hash.encode("utf-8"))
+
+
+def hash_rounds(pw_hash):
+    """The cost factor stored in a "$2b$<rounds>$..." hash, or None if unparseable"""
+    try:
+        return int(pw_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def pool_context():
+    """
+    Fork where available: spawn/forkserver children re-import the main
+    module, and run.py builds the whole app at import time.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the request threads in a small process pool. At most
+    `max_pending` hashes may be queued or running at once; beyond that, and
+    when a hash takes longer than `timeout`, HasherBusy is raised so the
+    request can fail fast instead of tying up a worker. With workers=0 (or
+    where a process pool cannot be started) hashing runs inline, still
+    bounded by `max_pending`.
+
+    Hashes are the same $2b$ strings Flask-Bcrypt produced, so existing
+    password hashes keep working.
+    """
+
+    def __init__(self, workers=0, max_pending=32, rounds=12, timeout=10.0):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self.configure(workers, max_pending, rounds, timeout)
+
+    def configure(self, workers, max_pending, rounds, timeout):
+        with self._lock:
+            self.workers = workers
+            self.max_pending = max_pending
+            self.rounds = rounds
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(max_pending)
+            self._shutdown_executor()
+
+    def _shutdown_executor(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _get_executor(self):
+        """The pool of this process; created lazily so forked servers each get their own"""
+        with self._lock:
+            if self.workers <= 0:
+                return None
+            if self._executor is None or self._executor_pid != os.getpid():
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=pool_context()
+                    )
+                    self._executor_pid = os.getpid()
+                except (OSError, NotImplementedError) as e:
+                    logger.warning("bcrypt process pool unavailable, hashing inline: %s", e)
+                    self.workers = 0
+                    return None
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("too many password hashes in progress")
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            future = executor.submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise HasherBusy("password hashing timed out")
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool on the next call
+                with self._lock:
+                    self._executor = None
+                raise HasherBusy("password hashing pool restarted")
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def check(self, pw_hash, password):
+        return self._run(check_password, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        return hash_rounds(pw_hash) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown_executor()
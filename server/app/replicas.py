@@ -0,0 +1,126 @@
+import contextvars
+import itertools
+import logging
+import threading
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Bind key of the replica the current replica_reads call reads from
+READ_REPLICA = contextvars.ContextVar("read_replica", default=None)
+
+
+def replica_keys(uris):
+    """SQLALCHEMY_BINDS keys for the replica URIs, in order"""
+    return [f"replica{number}" for number in range(len(uris))]
+
+
+class ReplicaSet:
+    """
+    The read replicas' health, and the round-robin over the healthy ones.
+    A daemon thread runs `SELECT 1` on each replica every check_interval
+    seconds. A replica that fails it, or loses a connection mid-query, gets
+    no reads until it passes a check again.
+    """
+
+    def __init__(self):
+        self.engines = {}  # bind key -> engine used for the health checks
+        self.healthy = {}
+        self.check_interval = 5.0
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self.engines)
+
+    def configure(self, engines, check_interval):
+        self._stop.set()  # a previous configuration's checker
+        self._stop = threading.Event()
+        self.engines = dict(engines)
+        self.healthy = {key: True for key in self.engines}
+        self.check_interval = check_interval
+        for key, engine in self.engines.items():
+            self.watch(key, engine)
+        if self.engines and check_interval > 0:
+            threading.Thread(
+                target=self._run_checks,
+                args=(self._stop,),
+                name="replica-health",
+                daemon=True,
+            ).start()
+
+    def watch(self, key, engine):
+        """Takes the replica out of rotation when a connection to it fails"""
+
+        def handle_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.set_healthy(key, False)
+
+        event.listen(engine, "handle_error", handle_error)
+
+    def choose(self):
+        """Bind key of the next healthy replica, or None if none is"""
+        keys = list(self.engines)
+        start = next(self._turn)
+        for offset in range(len(keys)):
+            key = keys[(start + offset) % len(keys)]
+            if self.healthy[key]:
+                return key
+        return None
+
+    def is_healthy(self, key):
+        return self.healthy.get(key, False)
+
+    def set_healthy(self, key, healthy):
+        if self.healthy.get(key) != healthy:
+            logger.warning("Replica %s is %s", key, "back" if healthy else "down")
+        self.healthy[key] = healthy
+
+    def check(self):
+        for key, engine in self.engines.items():
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                healthy = True
+            except exc.SQLAlchemyError:
+                healthy = False
+            self.set_healthy(key, healthy)
+
+    def _run_checks(self, stop):
+        while not stop.wait(self.check_interval):
+            self.check()
+
+
+class ReplicaRouting:
+    """
+    Session mixin sending the SELECTs run under replica_reads to the replica
+    in READ_REPLICA. Flushes and every other statement use the usual bind.
+    `replica_engines` maps bind keys to engines; by default they are
+    Flask-SQLAlchemy's engines for SQLALCHEMY_BINDS.
+    """
+
+    def __init__(self, *args, replica_engines=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica_engines = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = READ_REPLICA.get()
+        if (
+            key is not None
+            and bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            engines = self.replica_engines
+            return (engines if engines is not None else self._db.engines)[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class RoutingSession(ReplicaRouting, FlaskSession):
+    """db.session"""
+
+
+class AsyncRoutingSession(ReplicaRouting, Session):
+    """db.session on the event loop in ASGI mode (see app.asgi)"""
@@ -0,0 +1,142 @@
+import bisect
+import math
+import re
+import threading
+import time
+import uuid
+
+WORD = re.compile(r"\w+")
+# Rough per-row and per-posting footprint of the Python objects, for the
+# store's byte budget
+ROW_BYTES = 450
+POSTING_BYTES = 70
+
+
+def words(text):
+    """The lowercased words of a text, in order"""
+    return WORD.findall(text.lower()) if text else []
+
+
+def as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+class UserSearchIndex:
+    """
+    One user's transactions with an inverted index from the words of their
+    descriptions to row numbers: the search fallback for databases without
+    a text index (SQLite). Rows are (id, account_id, amount_cents,
+    description, type, date), Transaction's API field order. Searches and
+    changes hold the entry's lock, so a search never sees a half-applied
+    write.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = {}  # row number -> row
+        self.row_numbers = {}  # transaction id -> row number
+        self.postings = {}  # word -> {row numbers}
+        self.sorted_words = []  # sorted postings keys, for prefix lookups
+        self.words_stale = False
+        self.next_row = 0
+        self.posting_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return len(self.rows) * ROW_BYTES + self.posting_count * POSTING_BYTES
+
+    def view(self):
+        return self
+
+    def _add(self, row):
+        number = self.next_row
+        self.next_row += 1
+        self.rows[number] = row
+        self.row_numbers[row[0]] = number
+        for word in set(words(row[3])):
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = set()
+                self.words_stale = True
+            postings.add(number)
+            self.posting_count += 1
+
+    def _remove(self, transaction_id):
+        number = self.row_numbers.pop(transaction_id, None)
+        if number is None:
+            return None
+        row = self.rows.pop(number)
+        for word in set(words(row[3])):
+            postings = self.postings[word]
+            postings.discard(number)
+            self.posting_count -= 1
+            if not postings:
+                del self.postings[word]
+                self.words_stale = True
+        return row
+
+    def append(self, rows):
+        with self._lock:
+            for transaction_id, account_id, *values in rows:
+                self._add((as_uuid(transaction_id), as_uuid(account_id), *values))
+        return True
+
+    def update(self, transaction_id, amount_cents, trans_type, description):
+        with self._lock:
+            row = self._remove(as_uuid(transaction_id))
+            if row is None:
+                return False
+            self._add((row[0], row[1], amount_cents, description, trans_type, row[5]))
+        return True
+
+    def remove(self, transaction_id):
+        with self._lock:
+            return self._remove(as_uuid(transaction_id)) is not None
+
+    def remove_account(self, account_id):
+        account_id = as_uuid(account_id)
+        with self._lock:
+            for row in [row for row in self.rows.values() if row[1] == account_id]:
+                self._remove(row[0])
+        return True
+
+    def _matching(self, prefix):
+        """Row numbers of the rows with a word starting with `prefix`"""
+        if self.words_stale:
+            self.sorted_words = sorted(self.postings)
+            self.words_stale = False
+        sorted_words = self.sorted_words
+        index = bisect.bisect_left(sorted_words, prefix)
+        matches = set()
+        while index < len(sorted_words) and sorted_words[index].startswith(prefix):
+            matches |= self.postings[sorted_words[index]]
+            index += 1
+        return matches
+
+    def search(self, terms, account_ids, date_from=None, date_to=None):
+        """
+        [(rank, row)] of the rows of `account_ids` in [date_from, date_to)
+        with a word starting with each term. The rank favours short
+        descriptions, like ts_rank's length normalisation on PostgreSQL.
+        """
+        with self._lock:
+            numbers = None
+            for term in terms:
+                matches = self._matching(term)
+                numbers = matches if numbers is None else numbers & matches
+                if not numbers:
+                    return []
+            results = []
+            for number in numbers:
+                row = self.rows[number]
+                if row[1] not in account_ids:
+                    continue
+                if date_from and (row[5] is None or row[5] < date_from):
+                    continue
+                if date_to and (row[5] is None or row[5] >= date_to):
+                    continue
+                rank = 1 / (1 + math.log(max(len(words(row[3])), 1)))
+                results.append((rank, row))
+            return results
@@ -1,26 +1,62 @@
-from app import db
+from sqlalchemy import select, update
+from app import analytics_store, db, search_store
+from app.fields import select_columns, serializer
 from app.models.account import Account
+from app.money import to_cents
+from app.services import purge_service, user_service
+
+
+def adjust_balance(account_id, delta, user=None):
+    """
+    Atomically adds delta (integer cents) to an account's balance with a single
+    UPDATE accounts SET balance_cents = balance_cents + :delta, in the caller's DB
+    transaction. The row stays locked until that transaction ends; write paths
+    lock the account row before any rollup rows so they cannot deadlock.
+    Returns False if no (owned) account matched.
+    """
+    stmt = update(Account).where(Account.id == account_id)
+    if user is not None:
+        stmt = stmt.where(Account.user_id == user.id)
+    stmt = stmt.values(balance_cents=Account.balance_cents + delta).execution_options(
+        synchronize_session=False
+    )
+    return db.session.execute(stmt).rowcount == 1
 
 
 def create_account(user, data):
+    try:
+        balance_cents = to_cents(data.get("balance", 0))
+    except ValueError:
+        return {"error": "Invalid balance"}, 400
     new_account = Account(
-        user_id=user.id, name=data["name"], balance=data.get("balance", 0.0)
+        user_id=user.id, name=data["name"], balance_cents=balance_cents
     )
     db.session.add(new_account)
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
+    analytics_store.advance(str(user.id), version)
+    search_store.advance(str(user.id), version)
     return new_account.to_dict(), 201
 
 
-def get_user_accounts(user):
-    accounts = Account.query.filter_by(user_id=user.id).all()
-    return [acc.to_dict() for acc in accounts], 200
+def get_user_accounts(user, fields=None):
+    """Reads only the columns behind `fields` (every API field by default)"""
+    rows = db.session.execute(
+        select(*select_columns(Account, fields)).where(Account.user_id == user.id)
+    )
+    to_dict = serializer(Account, fields)
+    return [to_dict(row) for row in rows], 200
 
 
-def get_account(user, account_id):
-    account = Account.query.filter_by(id=account_id, user_id=user.id).first()
-    if not account:
+def get_account(user, account_id, fields=None):
+    row = db.session.execute(
+        select(*select_columns(Account, fields)).where(
+            Account.id == account_id, Account.user_id == user.id
+        )
+    ).first()
+    if not row:
         return {"error": "Account not found"}, 404
-    return account.to_dict(), 200
+    return serializer(Account, fields)(row), 200
 
 
 def update_account(user, account_id, data):
@@ -31,16 +67,28 @@ def update_account(user, account_id, data):
     if "name" in data:
         account.name = data["name"]
     if "balance" in data:
-        account.balance = data["balance"]
+        try:
+            account.balance_cents = to_cents(data["balance"])
+        except ValueError:
+            return {"error": "Invalid balance"}, 400
 
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
+    analytics_store.advance(str(user.id), version)
+    search_store.advance(str(user.id), version)
     return account.to_dict(), 200
 
 
 def delete_account(user, account_id):
-    account = Account.query.filter_by(id=account_id, user_id=user.id).first()
-    if not account:
+    # Set-based: the account is detached here and its transactions deleted in
+    # chunks afterwards, rather than loaded and deleted one by one
+    if not purge_service.detach_accounts(
+        Account.id == account_id, Account.user_id == user.id
+    ):
         return {"error": "Account not found"}, 404
-    db.session.delete(account)
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
+    analytics_store.remove_account(str(user.id), version, account_id)
+    search_store.remove_account(str(user.id), version, account_id)
+    purge_service.purge_accounts([account_id])
     return {"message": "Account deleted"}, 200
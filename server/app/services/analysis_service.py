@@ -1,69 +1,371 @@
-import numpy as np
-from app import db
+from flask import current_app
+from sqlalchemy import (
+    BigInteger,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    true,
+    union_all,
+)
+from app import analytics_store, db, metrics
+from app.analytics_store import UserColumns
+from app.forecasting import month_index
+from app.middlewares.read_replicas import replica_reads
 from app.models.transaction import Transaction
 from app.models.account import Account
-from datetime import datetime
-from collections import defaultdict
-from dateutil.relativedelta import relativedelta  # type: ignore
-
-
-def get_dashboard_summary(user):
-    accounts = Account.query.filter_by(user_id=user.id).all()
-    net_worth = sum(acc.balance for acc in accounts)
+from app.models.monthly_rollup import MonthlyRollup
+from app.models.user import User
+from app.money import from_cents, sum_cents
+from app.services import forecast_service, partition_service, rollup_service, user_service
+from datetime import date, datetime, timedelta
+
+STATS_CHUNK_SIZE = 10000
+RECENT_COUNT = 5  # transactions on the dashboard
+
+ANALYTICS_STORE_BYTES = metrics.gauge(
+    "analytics_store_bytes", "Memory held by the analytics store's column arrays."
+)
+ANALYTICS_STORE_USERS = metrics.gauge(
+    "analytics_store_users", "Users whose transactions the analytics store holds."
+)
+ANALYTICS_STORE_USER_BYTES = metrics.histogram(
+    "analytics_store_user_bytes",
+    "Memory of one user's columns when loaded into the analytics store.",
+    buckets=tuple(2**n for n in range(10, 31, 2)),
+)
+ANALYTICS_STORE_BYTES.set_function(lambda: analytics_store.nbytes)
+ANALYTICS_STORE_USERS.set_function(lambda: len(analytics_store))
+
+
+def typed_null(type_):
+    return null().cast(type_)
+
+
+def recent_transactions_statement(user, since=None, before=None, limit=RECENT_COUNT):
+    """The user's most recent transactions, dated in [since, before) when given"""
+    statement = (
+        select(
+            Transaction.id,
+            Transaction.account_id,
+            Transaction.description,
+            Transaction.amount_cents,
+            Transaction.type,
+            Transaction.date,
+        )
+        .join(Account)
+        .where(Account.user_id == user.id)
+    )
+    if since:
+        statement = statement.where(Transaction.date >= since)
+    if before:
+        statement = statement.where(Transaction.date < before)
+    return statement.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit)
+
+
+def dashboard_statement(user, start_of_month, recent_since):
+    """
+    One UNION ALL statement with every row the dashboard needs, tagged by
+    `kind`: the five most recent transactions from recent_since on, the
+    user's accounts (each carrying the net worth as a window sum) and the
+    income/expense totals of the months from start_of_month on, aggregated
+    from the rollups. The date bound keeps a partitioned transactions table
+    (see partition_service) to its newest partitions. Only when fewer than
+    five transactions are that recent does the statement also read the five
+    before recent_since, ranked after them: the count is a one-time filter,
+    so for active users that branch never runs.
+    """
+    recent = recent_transactions_statement(user, since=recent_since).cte("recent")
+    quiet = select(func.count()).select_from(recent).scalar_subquery() < RECENT_COUNT
+    older = (
+        recent_transactions_statement(user, before=recent_since).where(quiet).subquery()
+    )
 
-    account_list = [
-        {"id": str(acc.id), "name": acc.name, "balance": acc.balance}
-        for acc in accounts
-    ]
+    def transaction_rows(transactions, offset):
+        return select(
+            literal("recent").label("kind"),
+            (
+                func.row_number().over(
+                    order_by=(transactions.c.date.desc(), transactions.c.id.desc())
+                )
+                + offset
+            ).label("position"),
+            transactions.c.id,
+            transactions.c.account_id,
+            transactions.c.description.label("label"),
+            transactions.c.amount_cents.label("cents"),
+            transactions.c.type,
+            transactions.c.date,
+            typed_null(BigInteger).label("net_worth"),
+        )
 
-    recent_transactions_query = (
-        db.session.query(Transaction)
-        .join(Account)
-        .filter(Account.user_id == user.id)
-        .order_by(Transaction.date.desc())
-        .limit(5)
-        .all()
+    account_rows = select(
+        literal("account"),
+        func.row_number().over(order_by=(Account.created_at, Account.id)),
+        Account.id,
+        typed_null(Account.id.type),
+        Account.name,
+        Account.balance_cents,
+        typed_null(db.String),
+        typed_null(db.DateTime),
+        cast(func.sum(Account.balance_cents).over(), BigInteger),
+    ).where(Account.user_id == user.id)
+
+    month_rows = (
+        select(
+            literal("month"),
+            literal(0),
+            typed_null(Account.id.type),
+            typed_null(Account.id.type),
+            typed_null(db.String),
+            sum_cents(MonthlyRollup.total_cents),
+            MonthlyRollup.type,
+            typed_null(db.DateTime),
+            typed_null(BigInteger),
+        )
+        .join(Account, Account.id == MonthlyRollup.account_id)
+        .where(Account.user_id == user.id, MonthlyRollup.month >= start_of_month)
+        .group_by(MonthlyRollup.type)
+        .having(func.sum(MonthlyRollup.count) > 0)
     )
 
-    recent_activity = [t.to_dict() for t in recent_transactions_query]
+    combined = union_all(
+        transaction_rows(recent, 0),
+        transaction_rows(older, RECENT_COUNT),
+        account_rows,
+        month_rows,
+    ).subquery()
+    return select(combined).order_by(combined.c.kind, combined.c.position)
 
-    today = datetime.today()
-    start_of_month = datetime(today.year, today.month, 1)
 
-    month_trans = (
-        db.session.query(Transaction)
-        .join(Account)
-        .filter(Account.user_id == user.id, Transaction.date >= start_of_month)
-        .all()
-    )
+def recent_item(transaction_id, account_id, cents, description, trans_type, date):
+    return {
+        "id": str(transaction_id),
+        "account_id": str(account_id),
+        "amount": from_cents(cents),
+        "description": description,
+        "type": trans_type,
+        "date": date,
+    }
 
-    monthly_income = sum(t.amount for t in month_trans if t.type == "income")
-    monthly_expense = sum(t.amount for t in month_trans if t.type == "expense")
+
+@replica_reads
+def get_dashboard_summary(user):
+    today = datetime.today()
+    start_of_month = datetime(today.year, today.month, 1).date()
+    recent_since = (start_of_month - timedelta(days=1)).replace(day=1)
+
+    net_worth = monthly_income = monthly_expense = 0
+    account_list = []
+    recent_activity = []
+    for row in db.session.execute(dashboard_statement(user, start_of_month, recent_since)):
+        if row.kind == "account":
+            net_worth = row.net_worth
+            account_list.append(
+                {
+                    "id": str(row.id),
+                    "name": row.label,
+                    "balance": from_cents(row.cents),
+                }
+            )
+        elif row.kind == "recent":
+            if len(recent_activity) < RECENT_COUNT:
+                recent_activity.append(
+                    recent_item(row.id, row.account_id, row.cents, row.label, row.type, row.date)
+                )
+        elif row.type == "income":
+            monthly_income = row.cents
+        elif row.type == "expense":
+            monthly_expense = row.cents
 
     return {
-        "net_worth": round(net_worth, 2),
-        "monthly_income": round(monthly_income, 2),
-        "monthly_expense": round(monthly_expense, 2),
+        "net_worth": from_cents(net_worth),
+        "monthly_income": from_cents(monthly_income),
+        "monthly_expense": from_cents(monthly_expense),
         "accounts": account_list,
         "recent_transactions": recent_activity,
     }, 200
 
 
-def get_user_transactions(user, transaction_type=None):
-    """Helper to get raw transaction list"""
-    query = (
-        db.session.query(Transaction).join(Account).filter(Account.user_id == user.id)
+def user_amounts_statement(user):
+    """SELECT of just the amount_cents column of the user's transactions"""
+    history = partition_service.transactions_of(Account.user_id == user.id)
+    return select(history.c.amount_cents)
+
+
+def load_user_columns(user):
+    """
+    Reads the user's transactions into a UserColumns entry. The data version
+    comes from the same statement (users outer-joined to the transactions,
+    archived ones included), so it matches the rows exactly even with
+    writes landing meanwhile. The ids are cast to text: building uuid.UUID
+    objects would dominate.
+    """
+    entry = None
+    history = partition_service.transactions_of(Account.user_id == user.id)
+    result = db.session.execute(
+        select(
+            User.data_version,
+            cast(history.c.id, db.String),
+            cast(history.c.account_id, db.String),
+            history.c.amount_cents,
+            history.c.type,
+            history.c.date,
+        )
+        .select_from(User)
+        .outerjoin(history, true())
+        .where(User.id == user.id)
+        .execution_options(yield_per=STATS_CHUNK_SIZE)
+    )
+    for partition in result.partitions():
+        if entry is None:
+            entry = UserColumns(partition[0][0])
+        # A user without transactions comes back as one all-NULL row
+        entry.append(row[1:] for row in partition if row[1] is not None)
+    return entry or UserColumns(0)
+
+
+def user_columns(user):
+    """
+    The user's transactions as NumPy columns (see UserColumns.view()) from
+    the analytics store, loaded into it on a miss
+    """
+    user_id = str(user.id)
+    columns = analytics_store.get(user_id, user_service.get_data_version(user))
+    if columns is None:
+        entry = load_user_columns(user)
+        ANALYTICS_STORE_USER_BYTES.observe(entry.nbytes)
+        analytics_store.put(user_id, entry)
+        columns = entry.view()
+    return columns
+
+
+def compute_statistics_memory(user):
+    """Aggregates over the analytics store's int64 amount column, in cents"""
+    import numpy as np
+
+    cents = user_columns(user)["cents"]
+    if not len(cents):
+        return 0, None, None, None, None, None
+    return (
+        len(cents),
+        int(cents.sum()) / len(cents),
+        float(np.median(cents)),
+        int(cents.min()),
+        int(cents.max()),
+        float(cents.std()),
     )
-    if transaction_type:
-        query = query.filter(Transaction.type == transaction_type)
 
-    return query.all()
 
+def monthly_totals_memory(user, trans_type):
+    """
+    [(month_index, total_cents)] of one transaction type from the analytics
+    store, oldest first: one bincount over the month column. The float64
+    sums are exact while a month's total stays below 2**53 cents.
+    """
+    import numpy as np
+
+    columns = user_columns(user)
+    selected = (columns["income"] == (trans_type == "income")) & (
+        columns["months"] >= 0
+    )
+    months = columns["months"][selected]
+    if not len(months):
+        return []
+    first = int(months.min())
+    offsets = months - first
+    counts = np.bincount(offsets)
+    totals = np.bincount(offsets, weights=columns["cents"][selected])
+    present = np.flatnonzero(counts)
+    # The column counts months from 1970-01
+    months = (present + first + month_index(date(1970, 1, 1))).tolist()
+    return list(zip(months, np.rint(totals[present]).astype(np.int64).tolist()))
+
+
+def compute_statistics_sql(user):
+    """
+    All aggregates in one statement (PostgreSQL: stddev_pop, percentile_cont),
+    in cents
+    """
+    cents = partition_service.transactions_of(Account.user_id == user.id).c.amount_cents
+    return db.session.execute(
+        select(
+            func.count(cents),
+            func.avg(cents),
+            func.percentile_cont(0.5).within_group(cents),
+            func.min(cents),
+            func.max(cents),
+            func.stddev_pop(cents),
+        )
+    ).one()
+
+
+def compute_statistics_streaming(user):
+    """
+    Portable bounded-memory fallback: streams the amounts in int64 NumPy
+    chunks of STATS_CHUNK_SIZE. Sums, min and max are exact integer cents;
+    the variance of each chunk is merged with Chan's parallel algorithm.
+    The DB finds the median. Results are in cents.
+    """
+    import numpy as np
+
+    count = total = 0
+    m2 = 0.0
+    min_cents = max_cents = None
 
+    result = db.session.execute(
+        user_amounts_statement(user).execution_options(yield_per=STATS_CHUNK_SIZE)
+    )
+    for partition in result.scalars().partitions():
+        chunk = np.fromiter(partition, dtype=np.int64, count=len(partition))
+        chunk_count, chunk_total = len(chunk), int(chunk.sum())
+        chunk_mean = chunk_total / chunk_count
+        chunk_m2 = float(np.square(chunk - chunk_mean).sum())
+        if count:
+            delta = chunk_mean - total / count
+            m2 += chunk_m2 + delta * delta * count * chunk_count / (count + chunk_count)
+        else:
+            m2 = chunk_m2
+        count += chunk_count
+        total += chunk_total
+        lo, hi = int(chunk.min()), int(chunk.max())
+        min_cents = lo if min_cents is None else min(min_cents, lo)
+        max_cents = hi if max_cents is None else max(max_cents, hi)
+
+    if not count:
+        return 0, None, None, None, None, None
+
+    amounts = user_amounts_statement(user)
+    middle = amounts.order_by(*amounts.selected_columns)
+    if count % 2:
+        median = db.session.scalar(middle.offset(count // 2).limit(1))
+    else:
+        pair = db.session.scalars(middle.offset(count // 2 - 1).limit(2)).all()
+        median = (pair[0] + pair[1]) / 2
+
+    return count, total / count, median, min_cents, max_cents, (m2 / count) ** 0.5
+
+
+@replica_reads
 def get_general_statistics(user):
-    transactions = get_user_transactions(user)
+    mode = current_app.config.get("STATS_MODE", "auto")
+    if mode == "auto":
+        if analytics_store.enabled:
+            mode = "memory"
+        else:
+            mode = "sql" if db.engine.dialect.name == "postgresql" else "stream"
+
+    if mode == "memory":
+        row = compute_statistics_memory(user)
+    elif mode == "sql":
+        row = compute_statistics_sql(user)
+    else:
+        row = compute_statistics_streaming(user)
+
+    count, mean, median, min_cents, max_cents, std_dev = row
 
-    if not transactions:
+    if not count:
         return {
             "count": 0,
             "total_balance": 0,
@@ -74,67 +376,40 @@ def get_general_statistics(user):
             "std_dev": 0,
         }, 200
 
-    amounts = np.array([t.amount for t in transactions], dtype=float)
-
     stats = {
-        "count": int(len(amounts)),
-        "mean": round(float(np.mean(amounts)), 2),
-        "median": round(float(np.median(amounts)), 2),
-        "min": round(float(np.min(amounts)), 2),
-        "max": round(float(np.max(amounts)), 2),
-        "std_dev": round(float(np.std(amounts)), 2),
+        "count": int(count),
+        "mean": round(float(mean) / 100, 2),
+        "median": round(float(median) / 100, 2),
+        "min": from_cents(min_cents),
+        "max": from_cents(max_cents),
+        "std_dev": round(float(std_dev) / 100, 2),
     }
     return stats, 200
 
 
 def forecast_income(user, months_to_predict=1):
-    transactions = get_user_transactions(user, transaction_type="income")
-
-    if not transactions:
-        return {"error": "No income data available"}, 400
-
-    monthly_income = defaultdict(float)
-
-    for t in transactions:
-        month_key = t.date.strftime("%Y-%m")
-        monthly_income[month_key] += t.amount
-
-    if len(monthly_income) < 2:
-        return {"error": "Need at least 2 different months of data to forecast"}, 400
-
-    sorted_months = sorted(monthly_income.keys())
-    y_values = np.array([float(monthly_income[m]) for m in sorted_months], dtype=float)
-
-    x_values = np.arange(len(y_values))
-
-    if np.all(y_values == y_values[0]):
-        slope = 0
-        intercept = y_values[0]
-    else:
-        slope, intercept = np.polyfit(x_values, y_values, 1)
-
-    history = [{"month": m, "income": monthly_income[m]} for m in sorted_months]
-
-    forecast = []
-
-    last_date_str = sorted_months[-1]
-    last_date = datetime.strptime(last_date_str, "%Y-%m")
-
-    current_step = len(x_values)
-
-    for i in range(months_to_predict):
-        future_date = last_date + relativedelta(months=i + 1)
-        future_month_str = future_date.strftime("%Y-%m")
-
-        prediction = (slope * (current_step + i)) + intercept
-
-        forecast.append(
-            {
-                "month": future_month_str,
-                "predicted_income": round(
-                    max(0.0, float(prediction)), 2
-                ),  # Prevent negative predictions
-            }
-        )
-
-    return {"history": history, "forecast": forecast}, 200
+    """
+    Served from the user's stored forecast (see forecast_service), refitted
+    here when the user's data changed since it was fitted
+    """
+    forecast, version = forecast_service.get_current(user)
+    if forecast is None:
+        if analytics_store.enabled:
+            monthly_income = monthly_totals_memory(user, "income")
+        else:
+            monthly_income = [
+                (month_index(month), total)
+                for month, _, total in rollup_service.get_monthly_totals(
+                    user, trans_type="income"
+                )
+            ]
+
+        if not monthly_income:
+            return {"error": "No income data available"}, 400
+
+        if len(monthly_income) < 2:
+            return {"error": "Need at least 2 different months of data to forecast"}, 400
+
+        forecast = forecast_service.refresh(user, version, monthly_income)
+
+    return forecast_service.forecast_response(forecast, months_to_predict), 200
@@ -0,0 +1,218 @@
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from flask import current_app
+from sqlalchemy import cast, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.forecasting import (
+    IncomeMatrix,
+    fit_batch,
+    month_date,
+    month_index,
+    month_label,
+    predict,
+)
+from app.models.account import Account
+from app.models.forecast import Forecast
+from app.models.monthly_rollup import MonthlyRollup
+from app.models.user import User
+from app.money import from_cents, sum_cents
+from app.password_hasher import pool_context
+
+
+def month_index_of(date):
+    """SQL expression for the month_index of a date, saving Python its parsing"""
+    if db.engine.dialect.name == "sqlite":
+        year, month = func.strftime("%Y", date), func.strftime("%m", date)
+    else:
+        year, month = func.extract("year", date), func.extract("month", date)
+    return cast(year, db.Integer) * 12 + cast(month, db.Integer) - 1
+
+
+def income_statement(stale_only=False):
+    """
+    Every user's monthly income from the rollups, (user id as text, data
+    version, month_index, cents) ordered by user then month. With stale_only,
+    only users without a forecast at their current data version.
+    """
+    statement = (
+        select(
+            cast(User.id, db.String),
+            User.data_version,
+            month_index_of(MonthlyRollup.month),
+            sum_cents(MonthlyRollup.total_cents),
+        )
+        .join(Account, Account.user_id == User.id)
+        .join(MonthlyRollup, MonthlyRollup.account_id == Account.id)
+        .where(MonthlyRollup.type == "income")
+        .group_by(User.id, User.data_version, MonthlyRollup.month)
+        .having(func.sum(MonthlyRollup.count) > 0)
+        .order_by(User.id, MonthlyRollup.month)
+    )
+    if stale_only:
+        statement = statement.outerjoin(Forecast, Forecast.user_id == User.id).where(
+            or_(Forecast.user_id.is_(None), Forecast.data_version != User.data_version)
+        )
+    return statement
+
+
+def income_matrices(stale_only=False, batch_size=2000):
+    """
+    Reads the monthly income of all users (one streamed query) as
+    IncomeMatrix batches of up to batch_size users. Users with fewer than
+    two months of income have nothing to fit and are skipped.
+    """
+    # Core execution on the session's connection: skipping the ORM's result
+    # handling is a third faster over this many rows
+    result = db.session.connection().execute(
+        income_statement(stale_only).execution_options(yield_per=10000)
+    )
+    batch = []
+    for user_id, rows in groupby(result, key=lambda row: row[0]):
+        rows = list(rows)
+        if len(rows) < 2:
+            continue
+        batch.append(
+            (
+                uuid.UUID(user_id),
+                rows[0][1],
+                [(month, cents) for _, _, month, cents in rows],
+            )
+        )
+        if len(batch) == batch_size:
+            yield IncomeMatrix(batch)
+            batch = []
+    if batch:
+        yield IncomeMatrix(batch)
+
+
+def forecast_rows(matrix, fitted):
+    """Forecasts table rows of a fitted IncomeMatrix"""
+    models, intercepts, slopes, seasonals = fitted
+    for row, user_id in enumerate(matrix.user_ids):
+        first_month, history = matrix.history(row)
+        yield {
+            "user_id": user_id,
+            "data_version": matrix.versions[row],
+            "model": str(models[row]),
+            "first_month": month_date(first_month),
+            "last_month": month_date(first_month + len(history) - 1),
+            "intercept": float(intercepts[row]),
+            "slope": float(slopes[row]),
+            "seasonal": seasonals[row].tolist(),
+            "history": history,
+        }
+
+
+def upsert_statement():
+    """
+    INSERT ... ON CONFLICT of forecasts rows that keeps a stored forecast of
+    a newer data version (a recompute can race with a slow batch)
+    """
+    dialect = sqlite if db.engine.dialect.name == "sqlite" else postgresql
+    stmt = dialect.insert(Forecast)
+    columns = [column.name for column in Forecast.__table__.columns]
+    set_ = {
+        name: stmt.excluded[name]
+        for name in columns
+        if name not in ("user_id", "computed_at")
+    }
+    set_["computed_at"] = func.now()
+    return stmt.on_conflict_do_update(
+        index_elements=[Forecast.user_id],
+        set_=set_,
+        where=Forecast.data_version <= stmt.excluded.data_version,
+    )
+
+
+def store(rows):
+    rows = list(rows)
+    if rows:
+        db.session.execute(upsert_statement(), rows)
+    return len(rows)
+
+
+def rebuild(stale_only=True, workers=None, batch_size=None):
+    """
+    Refits the forecasts of every user (only those whose data changed since
+    their last fit with stale_only) and returns how many were stored. The
+    batches are fitted across `workers` processes when there are several.
+    """
+    config = current_app.config
+    workers = config["FORECAST_WORKERS"] if workers is None else workers
+    batch_size = batch_size or config["FORECAST_BATCH_SIZE"]
+    seasonal_min_months = config["FORECAST_SEASONAL_MIN_MONTHS"]
+
+    matrices = list(income_matrices(stale_only, batch_size))
+    fit_args = [matrix.fit_args(seasonal_min_months) for matrix in matrices]
+    if workers > 0 and len(matrices) > 1:
+        # Forked workers must not inherit open connections: end the read
+        # transaction so its connection goes back to the pool, then empty it
+        db.session.commit()
+        db.engine.dispose()
+        with ProcessPoolExecutor(workers, mp_context=pool_context()) as executor:
+            fits = list(executor.map(fit_batch, fit_args))
+    else:
+        fits = map(fit_batch, fit_args)
+
+    stored = 0
+    for matrix, fitted in zip(matrices, fits):
+        stored += store(forecast_rows(matrix, fitted))
+        db.session.commit()
+    return stored
+
+
+def get_current(user):
+    """
+    (stored forecast, data version) of the user, read in one statement; the
+    forecast is None when missing or fitted on older data
+    """
+    version, forecast = db.session.execute(
+        select(User.data_version, Forecast)
+        .outerjoin(Forecast, Forecast.user_id == User.id)
+        .where(User.id == user.id)
+    ).one()
+    if forecast is not None and forecast.data_version != version:
+        forecast = None
+    return forecast, version
+
+
+def refresh(user, version, monthly_income):
+    """
+    Fits the user's [(month_index, cents)] monthly income (at least two
+    months, oldest first) as of data `version`, stores it and returns the
+    Forecast
+    """
+    matrix = IncomeMatrix([(user.id, version, monthly_income)])
+    fitted = fit_batch(
+        matrix.fit_args(current_app.config["FORECAST_SEASONAL_MIN_MONTHS"])
+    )
+    (row,) = forecast_rows(matrix, fitted)
+    store([row])
+    db.session.commit()
+    return Forecast(**row)
+
+
+def forecast_response(forecast, months_to_predict):
+    first_month = month_index(forecast.first_month)
+    predictions = predict(
+        forecast.intercept,
+        forecast.slope,
+        forecast.seasonal,
+        first_month,
+        month_index(forecast.last_month),
+        months_to_predict,
+    )
+    return {
+        "model": forecast.model,
+        "history": [
+            {"month": month_label(first_month + offset), "income": from_cents(cents)}
+            for offset, cents in enumerate(forecast.history)
+            if cents is not None
+        ],
+        "forecast": [
+            {"month": month_label(month), "predicted_income": from_cents(cents)}
+            for month, cents in predictions
+        ],
+    }
@@ -0,0 +1,278 @@
+import re
+from datetime import date, datetime
+from sqlalchemy import MetaData, cast, column, delete, func, insert, select, table, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.schema import CreateIndex
+from app import db
+from app.forecasting import month_date, month_index
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.transaction_archive import TransactionArchive
+
+# Range partitions of transactions on date: one per month, plus catch-alls
+# for every date before the first month and from the end of the last one
+BEFORE = "transactions_before"
+AFTER = "transactions_after"
+MONTH_PARTITION = re.compile(r"transactions_p\d{6}")
+BOUNDS = re.compile(r"FOR VALUES FROM \((.+)\) TO \((.+)\)")
+
+
+def partition_name(month):
+    return f"transactions_p{month:%Y%m}"
+
+
+def bound(value):
+    return f"'{value.isoformat()}'" if value else None
+
+
+def for_values(start, end):
+    """Partition bound clause of [start, end); None is MINVALUE/MAXVALUE"""
+    return f"FOR VALUES FROM ({bound(start) or 'MINVALUE'}) TO ({bound(end) or 'MAXVALUE'})"
+
+
+def partition_clause(name):
+    """A partition as a selectable with Transaction's columns"""
+    return table(name, *(column(c.name, c.type) for c in Transaction.__table__.columns))
+
+
+def is_partitioned():
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.scalar(
+        text(
+            "SELECT EXISTS (SELECT FROM pg_partitioned_table"
+            " WHERE partrelid = to_regclass('transactions'))"
+        )
+    )
+
+
+def partitions():
+    """{partition name: (start, end)} of the transactions table, None for unbounded"""
+    rows = db.session.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i"
+            " JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = 'transactions'::regclass"
+        )
+    )
+    bounds = {}
+    for name, expression in rows:
+        values = BOUNDS.match(expression).groups()
+        bounds[name] = tuple(
+            None if value.endswith("VALUE") else datetime.fromisoformat(value.strip("'"))
+            for value in values
+        )
+    return bounds
+
+
+def create_partition(name, start, end, parent="transactions"):
+    db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {parent} {for_values(start, end)}"))
+
+
+def attach(name, start, end):
+    db.session.execute(text(f"ALTER TABLE transactions ATTACH PARTITION {name} {for_values(start, end)}"))
+
+
+def detach(name):
+    db.session.execute(text(f"ALTER TABLE transactions DETACH PARTITION {name}"))
+
+
+def partition_table(months_ahead):
+    """
+    Converts the transactions table into one range-partitioned by month on
+    date, from the month of the oldest transaction to months_ahead months
+    after the current one. Writes wait while the rows are copied, reads
+    carry on until the tables are swapped at commit. Returns the rows copied.
+    """
+    if db.session.scalar(select(func.count()).where(Transaction.date.is_(None))):
+        raise ValueError("Some transactions have no date; set one first")
+    db.session.execute(text("LOCK TABLE transactions IN EXCLUSIVE MODE"))
+    oldest = db.session.scalar(select(func.min(Transaction.date)))
+    first = month_index(oldest or date.today())
+    end = month_index(date.today()) + months_ahead + 1
+
+    # The new table takes over the index (and primary key) names
+    for name in db.session.scalars(
+        text(
+            "SELECT indexname FROM pg_indexes"
+            " WHERE schemaname = current_schema() AND tablename = 'transactions'"
+        )
+    ).all():
+        db.session.execute(text(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned"))
+    db.session.execute(
+        text(
+            "CREATE TABLE transactions_partitioned (LIKE transactions INCLUDING DEFAULTS)"
+            " PARTITION BY RANGE (date)"
+        )
+    )
+    create_partition(BEFORE, None, month_date(first), "transactions_partitioned")
+    for index in range(first, end):
+        create_partition(
+            partition_name(month_date(index)),
+            month_date(index),
+            month_date(index + 1),
+            "transactions_partitioned",
+        )
+    create_partition(AFTER, month_date(end), None, "transactions_partitioned")
+    rows = db.session.execute(
+        text("INSERT INTO transactions_partitioned SELECT * FROM transactions")
+    ).rowcount
+
+    # Keys and indexes are built once the rows are in. A partitioned table's
+    # primary key has to include the partition key.
+    for statement in (
+        "ALTER TABLE transactions_partitioned ALTER COLUMN date SET NOT NULL",
+        "ALTER TABLE transactions_partitioned"
+        " ADD CONSTRAINT transactions_pkey PRIMARY KEY (id, date)",
+        "ALTER TABLE transactions_partitioned ADD CONSTRAINT transactions_account_id_fkey"
+        " FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE CASCADE",
+    ):
+        db.session.execute(text(statement))
+    partitioned = Transaction.__table__.to_metadata(
+        MetaData(), name="transactions_partitioned"
+    )
+    for index in partitioned.indexes:
+        db.session.execute(CreateIndex(index))
+
+    db.session.execute(text("DROP TABLE transactions"))
+    db.session.execute(text("ALTER TABLE transactions_partitioned RENAME TO transactions"))
+    db.session.commit()
+    return rows
+
+
+def create_partitions(months_ahead):
+    """
+    Adds the monthly partitions up to months_ahead months after the current
+    one, moving in the rows the catch-all after them holds for those months.
+    Returns the months added.
+    """
+    start = partitions()[AFTER][0]
+    first, end = month_index(start), month_index(date.today()) + months_ahead + 1
+    if first >= end:
+        return []
+    detach(AFTER)
+    for index in range(first, end):
+        create_partition(
+            partition_name(month_date(index)), month_date(index), month_date(index + 1)
+        )
+    after = partition_clause(AFTER)
+    moved = (
+        delete(after)
+        .where(after.c.date < month_date(end))
+        .returning(*after.c)
+        .cte("moved")
+    )
+    db.session.execute(insert(Transaction.__table__).from_select(list(after.c.keys()), select(moved)))
+    attach(AFTER, month_date(end), None)
+    db.session.commit()
+    return [month_date(index) for index in range(first, end)]
+
+
+def archive_statement(source):
+    """
+    INSERT into transaction_archives of one row per account and month of
+    the transactions in `source`, returning the transaction counts
+    """
+    month = cast(func.date_trunc("month", source.c.date), db.Date)
+
+    def aggregate(values):
+        return func.array_agg(aggregate_order_by(values, source.c.date, source.c.id))
+
+    rows = select(
+        source.c.account_id,
+        month,
+        func.count(),
+        aggregate(source.c.id),
+        aggregate(source.c.amount_cents),
+        aggregate(source.c.description),
+        aggregate(source.c.type),
+        aggregate(source.c.date),
+    ).group_by(source.c.account_id, month)
+    columns = ["account_id", "month", "count", "ids", "amounts", "descriptions", "types", "dates"]
+    return (
+        insert(TransactionArchive)
+        .from_select(columns, rows)
+        .returning(TransactionArchive.count)
+    )
+
+
+def archive_partitions(keep_months):
+    """
+    Moves the transactions of months before the last keep_months (the
+    current one included) into transaction_archives. Each old monthly
+    partition is archived, detached and dropped in a DB transaction of its
+    own, blocking writes to that month only. The catch-all before them
+    grows over the archived months. Returns [(month, transactions archived)].
+    """
+    cutoff = datetime.combine(month_date(month_index(date.today()) - keep_months + 1), datetime.min.time())
+    bounds = partitions()
+    archived = []
+
+    # Writes dated in archived months land in the catch-all
+    before = partition_clause(BEFORE)
+    moved = delete(before).where(before.c.date < cutoff).returning(*before.c).cte("moved")
+    counts = db.session.scalars(archive_statement(moved)).all()
+    db.session.commit()
+    if counts:
+        archived.append((None, sum(counts)))
+
+    for name, (start, end) in sorted(bounds.items(), key=lambda item: item[1][0] or datetime.min):
+        if not MONTH_PARTITION.fullmatch(name) or end > cutoff:
+            continue
+        db.session.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+        counts = db.session.scalars(archive_statement(partition_clause(name))).all()
+        detach(name)
+        db.session.execute(text(f"DROP TABLE {name}"))
+        detach(BEFORE)
+        attach(BEFORE, None, end)
+        db.session.commit()
+        archived.append((start.date(), sum(counts)))
+    return archived
+
+
+def transactions_of(*criteria, date_from=None, date_to=None):
+    """
+    Subquery of the transactions of the accounts matching `criteria` (on
+    Account), with Transaction's columns; on PostgreSQL, archived ones are
+    included. Each branch of the UNION ALL is filtered on its own so the
+    planner prunes partitions and reads only those accounts' archives.
+    """
+    live = select(
+        Transaction.id,
+        Transaction.account_id,
+        Transaction.amount_cents,
+        Transaction.description,
+        Transaction.type,
+        Transaction.date,
+    )
+    if criteria:
+        live = live.join(Account).where(*criteria)
+    if date_from:
+        live = live.where(Transaction.date >= date_from)
+    if date_to:
+        live = live.where(Transaction.date < date_to)
+    if db.engine.dialect.name != "postgresql":
+        return live.subquery("history")
+
+    archive = TransactionArchive
+    unnested = select(
+        func.unnest(archive.ids, type_=Transaction.id.type).label("id"),
+        archive.account_id,
+        func.unnest(archive.amounts, type_=db.BigInteger).label("amount_cents"),
+        func.unnest(archive.descriptions, type_=db.String).label("description"),
+        func.unnest(archive.types, type_=db.String).label("type"),
+        func.unnest(archive.dates, type_=db.DateTime).label("date"),
+    )
+    if criteria:
+        unnested = unnested.join(Account, Account.id == archive.account_id).where(*criteria)
+    if date_from:
+        unnested = unnested.where(archive.month >= date(date_from.year, date_from.month, 1))
+    if date_to:
+        unnested = unnested.where(archive.month < date_to)
+    unnested = unnested.subquery()
+    archived = select(unnested)
+    if date_from:
+        archived = archived.where(unnested.c.date >= date_from)
+    if date_to:
+        archived = archived.where(unnested.c.date < date_to)
+    return live.union_all(archived).subquery("history")
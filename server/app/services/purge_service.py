@@ -0,0 +1,146 @@
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import any_, delete, func, literal_column, select, update
+from app import db
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.services import partition_service
+
+logger = logging.getLogger(__name__)
+
+
+def detach_accounts(*criteria):
+    """
+    Unlinks the matching accounts from their user (user_id NULL) in the
+    caller's DB transaction and returns their ids. Every read reaches
+    accounts, transactions and rollups through Account.user_id, so they are
+    gone from the API once this commits; purge_accounts deletes the rows.
+    """
+    return db.session.scalars(
+        update(Account)
+        .where(*criteria)
+        .values(user_id=None)
+        .returning(Account.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def purge_chunk(account_id, chunk_size):
+    """
+    Deletes up to chunk_size of a detached account's transactions in a DB
+    transaction of their own; returns how many
+    """
+    # Rows are picked by their physical locator, which the delete reaches
+    # without an index lookup. PostgreSQL hash-joins a scan of the whole
+    # table for `IN (subquery)`; `= ANY(ARRAY(subquery))` is a TID scan.
+    if db.engine.dialect.name != "postgresql":
+        rowid = literal_column("rowid")
+        chunk = (
+            select(rowid)
+            .select_from(Transaction)
+            .where(Transaction.account_id == account_id)
+            .limit(chunk_size)
+        )
+        deleted = db.session.execute(
+            delete(Transaction)
+            .where(rowid.in_(chunk.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return deleted
+
+    # A ctid is only unique within one table, and transactions may be
+    # partitioned (see partition_service): delete from one table at a time
+    ctid = literal_column("ctid")
+    deleted = 0
+    while deleted < chunk_size:
+        name = db.session.scalar(
+            select(literal_column("tableoid::regclass::text"))
+            .select_from(Transaction)
+            .where(Transaction.account_id == account_id)
+            .limit(1)
+        )
+        if name is None:
+            break
+        rows = partition_service.partition_clause(name)
+        chunk = (
+            select(ctid)
+            .select_from(rows)
+            .where(rows.c.account_id == account_id)
+            .limit(chunk_size - deleted)
+        )
+        deleted += db.session.execute(
+            delete(rows).where(ctid == any_(func.array(chunk.scalar_subquery())))
+        ).rowcount
+    db.session.commit()
+    return deleted
+
+
+def purge_account(account_id, chunk_size, max_chunks=None):
+    """
+    Deletes a detached account's transactions chunk by chunk, so no single
+    statement holds locks for long, then the account with its rollups and
+    archived transactions (ON DELETE CASCADE). Returns False if it stopped
+    after max_chunks full chunks with transactions possibly left.
+    """
+    chunks = 0
+    while purge_chunk(account_id, chunk_size) == chunk_size:
+        chunks += 1
+        if max_chunks is not None and chunks >= max_chunks:
+            return False
+    db.session.execute(
+        delete(Account)
+        .where(Account.id == account_id, Account.user_id.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return True
+
+
+def purge_accounts(account_ids):
+    """
+    Purges detached accounts. Small ones are done inline; past the first
+    chunk, the rest is left to a background thread unless
+    DELETE_IN_BACKGROUND is off.
+    """
+    config = current_app.config
+    chunk_size = config["DELETE_CHUNK_SIZE"]
+    max_chunks = 1 if config["DELETE_IN_BACKGROUND"] else None
+    pending = [
+        account_id
+        for account_id in account_ids
+        if not purge_account(account_id, chunk_size, max_chunks)
+    ]
+    if pending:
+        threading.Thread(
+            target=purge_in_background,
+            args=(current_app._get_current_object(), pending, chunk_size),
+            name="account-purge",
+            daemon=True,
+        ).start()
+
+
+def purge_in_background(app, account_ids, chunk_size):
+    with app.app_context():
+        for account_id in account_ids:
+            try:
+                purge_account(account_id, chunk_size)
+            except Exception:
+                # Still detached: `flask accounts purge` picks it up
+                logger.exception("Purging account %s failed", account_id)
+                db.session.rollback()
+
+
+def purge_detached(chunk_size=None):
+    """
+    Purges every detached account, e.g. those a restart interrupted, and
+    returns how many there were
+    """
+    chunk_size = chunk_size or current_app.config["DELETE_CHUNK_SIZE"]
+    account_ids = db.session.scalars(
+        select(Account.id).where(Account.user_id.is_(None))
+    ).all()
+    for account_id in account_ids:
+        purge_account(account_id, chunk_size)
+    return len(account_ids)
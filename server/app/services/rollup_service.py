@@ -0,0 +1,128 @@
+from sqlalchemy import cast, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.account import Account
+from app.models.monthly_rollup import MonthlyRollup
+from app.money import sum_cents
+from app.services import partition_service
+
+
+def month_of(date):
+    """SQL expression for the first day of the month of a datetime (or SQL expr)"""
+    if db.engine.dialect.name == "sqlite":
+        return func.date(date, "start of month", type_=db.Date)
+    return cast(func.date_trunc("month", date), db.Date)
+
+
+def upsert_statement(values=None):
+    dialect = sqlite if db.engine.dialect.name == "sqlite" else postgresql
+    stmt = dialect.insert(MonthlyRollup)
+    if values is not None:
+        stmt = stmt.values(**values)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            MonthlyRollup.account_id,
+            MonthlyRollup.month,
+            MonthlyRollup.type,
+        ],
+        set_={
+            "total_cents": MonthlyRollup.total_cents + stmt.excluded.total_cents,
+            "count": MonthlyRollup.count + stmt.excluded.count,
+        },
+    )
+
+
+def record(account_id, date, trans_type, cents, count=1):
+    """
+    Adds cents/count to the rollup row of (account, month, type).
+    Runs in the caller's DB transaction, so the rollup commits or rolls back
+    together with the transaction write. Pass negative values to subtract.
+    """
+    db.session.execute(
+        upsert_statement(
+            {
+                "account_id": account_id,
+                "month": month_of(date),
+                "type": trans_type,
+                "total_cents": cents,
+                "count": count,
+            }
+        )
+    )
+
+
+def record_many(deltas):
+    """
+    Applies pre-aggregated deltas in one executemany round trip.
+    `deltas` maps (account_id, month_date, type) -> (cents, count). Rows are
+    written in key order so concurrent writers lock them in the same order.
+    """
+    if not deltas:
+        return
+    db.session.execute(
+        upsert_statement(),
+        [
+            {
+                "account_id": account_id,
+                "month": month,
+                "type": trans_type,
+                "total_cents": cents,
+                "count": count,
+            }
+            for (account_id, month, trans_type), (cents, count) in sorted(
+                deltas.items()
+            )
+        ],
+    )
+
+
+def rebuild():
+    """Recomputes every rollup row from the transactions, archived ones included"""
+    history = partition_service.transactions_of()
+    month = month_of(history.c.date)
+    source = db.session.query(
+        history.c.account_id,
+        month,
+        history.c.type,
+        sum_cents(history.c.amount_cents),
+        func.count(history.c.id),
+    )
+    source = source.filter(history.c.date.isnot(None)).group_by(
+        history.c.account_id, month, history.c.type
+    )
+
+    db.session.query(MonthlyRollup).delete(synchronize_session=False)
+    db.session.execute(
+        insert(MonthlyRollup).from_select(
+            ["account_id", "month", "type", "total_cents", "count"], source
+        )
+    )
+    db.session.commit()
+    return db.session.query(func.count()).select_from(MonthlyRollup).scalar()
+
+
+def get_monthly_totals(user, trans_type=None, since=None):
+    """
+    Returns [(month, type, total_cents)] across all of the user's accounts,
+    oldest first
+    """
+    query = (
+        db.session.query(
+            MonthlyRollup.month,
+            MonthlyRollup.type,
+            sum_cents(MonthlyRollup.total_cents),
+        )
+        .join(Account, Account.id == MonthlyRollup.account_id)
+        .filter(Account.user_id == user.id)
+    )
+    if trans_type:
+        query = query.filter(MonthlyRollup.type == trans_type)
+    if since:
+        query = query.filter(MonthlyRollup.month >= since)
+
+    return (
+        query.group_by(MonthlyRollup.month, MonthlyRollup.type)
+        .having(func.sum(MonthlyRollup.count) > 0)
+        .order_by(MonthlyRollup.month)
+        .all()
+    )
@@ -0,0 +1,192 @@
+import base64
+import uuid
+from datetime import datetime
+from sqlalchemy import cast, func, literal_column, select, true, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, TSQUERY
+from app import db, search_store
+from app.fields import select_columns, serializer
+from app.middlewares.read_replicas import replica_reads
+from app.models.account import Account
+from app.models.transaction import Transaction, search_vector
+from app.models.user import User
+from app.search_index import UserSearchIndex, words
+from app.services import user_service
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+MAX_TERMS = 8
+LOAD_CHUNK_SIZE = 10000
+
+
+def encode_cursor(rank, date, transaction_id):
+    raw = f"{rank!r}|{date.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """The (rank, date, id) keyset position encoded in a cursor, or None if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        rank, date_str, id_str = raw.split("|", 2)
+        return float(rank), datetime.fromisoformat(date_str), uuid.UUID(id_str)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def tsquery_lexeme(value):
+    """A lexeme quoted for tsquery input, taken verbatim (no parsing)"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def search_postgres(account_ids, q, fields, date_from, date_to, position, limit):
+    """
+    One page of matches from the ix_transactions_search GIN index: the
+    description must have a word starting with each word of `q` (split as
+    search_vector() splits descriptions), ranked by ts_rank with length
+    normalisation, then newest first
+    """
+    terms = db.session.scalar(
+        select(
+            func.regexp_split_to_array(func.lower(q), literal_column(r"'\W+'"))
+        )
+    )
+    terms = [term for term in dict.fromkeys(terms) if term][:MAX_TERMS]
+    if not terms:
+        return []
+    # Every lexeme carries its account, so the query names the accounts
+    # searched and nothing else can match
+    query_text = " & ".join(
+        "("
+        + " | ".join(
+            f"{tsquery_lexeme(f'{account_id}:{term}')}:*" for account_id in account_ids
+        )
+        + ")"
+        for term in terms
+    )
+    vector = search_vector(Transaction.description, Transaction.account_id)
+    tsquery = cast(query_text, TSQUERY)
+    # ts_rank is a real: as a double it survives the round trip through the
+    # cursor exactly, so rows tied on rank are neither skipped nor repeated
+    rank = cast(func.ts_rank(vector, tsquery, 1), DOUBLE_PRECISION)
+
+    query = select(
+        *select_columns(Transaction, fields), rank, Transaction.date, Transaction.id
+    ).where(vector.op("@@")(tsquery))
+    if date_from:
+        query = query.where(Transaction.date >= date_from)
+    if date_to:
+        query = query.where(Transaction.date < date_to)
+    if position:
+        query = query.where(tuple_(rank, Transaction.date, Transaction.id) < position)
+    query = query.order_by(rank.desc(), Transaction.date.desc(), Transaction.id.desc())
+    return db.session.execute(query.limit(limit)).all()
+
+
+def load_search_index(user):
+    """
+    Reads the user's transactions into a UserSearchIndex; the data version
+    comes from the same statement, as in analysis_service.load_user_columns
+    """
+    entry = None
+    columns = select(
+        Transaction.id,
+        Transaction.account_id,
+        Transaction.amount_cents,
+        Transaction.description,
+        Transaction.type,
+        Transaction.date,
+    ).join(Account).where(Account.user_id == user.id).subquery()
+    result = db.session.execute(
+        select(User.data_version, *columns.c)
+        .select_from(User)
+        .outerjoin(columns, true())
+        .where(User.id == user.id)
+        .execution_options(yield_per=LOAD_CHUNK_SIZE)
+    )
+    for partition in result.partitions():
+        if entry is None:
+            entry = UserSearchIndex(partition[0][0])
+        # A user without transactions comes back as one all-NULL row
+        entry.append(row[1:] for row in partition if row[1] is not None)
+    return entry or UserSearchIndex(0)
+
+
+def search_fallback(user, account_ids, q, fields, date_from, date_to, position, limit):
+    """
+    One page of matches from the user's in-process search index (loaded into
+    search_store on a miss), with the same matching and order as on
+    PostgreSQL
+    """
+    terms = list(dict.fromkeys(words(q)))[:MAX_TERMS]
+    if not terms:
+        return []
+    user_id = str(user.id)
+    index = search_store.get(user_id, user_service.get_data_version(user))
+    if index is None:
+        index = load_search_index(user)
+        search_store.put(user_id, index)
+
+    matches = [
+        (rank, row[5] or datetime.min, row[0], row)
+        for rank, row in index.search(terms, set(account_ids), date_from, date_to)
+    ]
+    if position:
+        matches = [match for match in matches if match[:3] < position]
+    matches.sort(key=lambda match: match[:3], reverse=True)
+
+    order = list(Transaction.api_fields())
+    positions = [order.index(name) for name in fields or order]
+    return [
+        (*(row[i] for i in positions), rank, row[5], row[0])
+        for rank, _, _, row in matches[:limit]
+    ]
+
+
+@replica_reads
+def search_transactions(
+    user,
+    q,
+    account_id=None,
+    limit=DEFAULT_PAGE_SIZE,
+    cursor=None,
+    date_from=None,
+    date_to=None,
+    fields=None,
+):
+    """
+    Returns one page of the user's transactions whose description has a
+    word starting with each word of `q`, best matches first, keyset-paginated
+    on (rank, date, id). Only the columns behind `fields` are returned.
+    """
+    query = select(Account.id).where(Account.user_id == user.id)
+    if account_id:
+        query = query.where(Account.id == account_id)
+    account_ids = db.session.scalars(query).all()
+    if account_id and not account_ids:
+        return {"error": "Account not found"}, 404
+
+    position = None
+    if cursor:
+        position = decode_cursor(cursor)
+        if not position:
+            return {"error": "Invalid cursor"}, 400
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    args = (account_ids, q, fields, date_from, date_to, position, limit + 1)
+    if not account_ids:
+        rows = []
+    elif db.engine.dialect.name == "postgresql":
+        rows = search_postgres(*args)
+    else:
+        rows = search_fallback(user, *args)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1][-3:])
+
+    to_dict = serializer(Transaction, fields)
+    return {
+        "transactions": [to_dict(row) for row in rows],
+        "next_cursor": next_cursor,
+    }, 200
@@ -1,112 +1,464 @@
-from app import db
+import base64
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from app import analytics_store, db, search_store
+from app.fields import select_columns, serializer
+from app.middlewares.read_replicas import replica_reads
 from app.models.account import Account
 from app.models.transaction import Transaction
+from app.money import to_cents
+from app.services import account_service, partition_service, rollup_service, user_service
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+EXPORT_BATCH_SIZE = 1000
+
+
+def encode_cursor(date, transaction_id):
+    raw = f"{date.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Returns the (date, id) keyset position encoded in a cursor, or None if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date_str, id_str = raw.split("|", 1)
+        return datetime.fromisoformat(date_str), uuid.UUID(id_str)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def signed_amount(trans_type, amount):
+    return amount if trans_type == "income" else -amount
 
 
 def create_transaction(user, data):
     account_id = data.get("account_id")
-    amount = float(data.get("amount"))
+    try:
+        amount = to_cents(data.get("amount"))
+    except ValueError:
+        return {"error": "Invalid amount"}, 400
     trans_type = data.get("type")  # 'income' or 'expense'
     description = data.get("description", "")
 
-    account = Account.query.filter_by(id=account_id, user_id=user.id).first()
-    if not account:
-        return {"error": "Account not found or access denied"}, 404
-
-    if trans_type == "income":
-        account.balance += amount
-    elif trans_type == "expense":
-        account.balance -= amount
-    else:
+    if trans_type not in ("income", "expense"):
         return {"error": "Invalid transaction type. Use 'income' or 'expense'"}, 400
 
+    # Ownership check and balance change in one statement; no read-modify-write
+    if not account_service.adjust_balance(
+        account_id, signed_amount(trans_type, amount), user=user
+    ):
+        db.session.rollback()
+        return {"error": "Account not found or access denied"}, 404
+
     new_trans = Transaction(
-        account_id=account_id, amount=amount, type=trans_type, description=description
+        account_id=account_id,
+        amount_cents=amount,
+        type=trans_type,
+        description=description,
     )
 
     db.session.add(new_trans)
+    # The row's date is the server-side now(), i.e. the DB transaction's start time
+    rollup_service.record(account_id, func.now(), trans_type, amount)
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
 
-    return new_trans.to_dict(), 201
+    response = new_trans.to_dict()  # reloads the committed row, date included
+    analytics_store.append(
+        str(user.id),
+        version,
+        [(new_trans.id, new_trans.account_id, amount, trans_type, new_trans.date)],
+    )
+    search_store.append(
+        str(user.id),
+        version,
+        [
+            (
+                new_trans.id,
+                new_trans.account_id,
+                amount,
+                description,
+                trans_type,
+                new_trans.date,
+            )
+        ],
+    )
+    return response, 201
 
 
-def get_transactions_by_account(user, account_id):
+@replica_reads
+def get_transactions_by_account(
+    user,
+    account_id,
+    limit=DEFAULT_PAGE_SIZE,
+    cursor=None,
+    date_from=None,
+    date_to=None,
+    fields=None,
+):
+    """
+    Returns one page of an account's transactions, newest first.
+    Pages are keyset-paginated on (date, id) so the cost of a page does not
+    depend on how deep into the history it is. Only the columns behind
+    `fields` (every API field by default) are read, plus the keyset.
+    """
     account = Account.query.filter_by(id=account_id, user_id=user.id).first()
     if not account:
         return {"error": "Account not found"}, 404
 
-    transactions = Transaction.query.filter_by(account_id=account_id).all()
-    transactions.sort(key=lambda x: x.date, reverse=True)
-    return [t.to_dict() for t in transactions], 200
+    query = select(
+        *select_columns(Transaction, fields), Transaction.date, Transaction.id
+    ).where(Transaction.account_id == account.id)
 
+    if date_from:
+        query = query.where(Transaction.date >= date_from)
+    if date_to:
+        query = query.where(Transaction.date < date_to)
 
-def get_transaction(user, transaction_id):
-    transaction = (
-        db.session.query(Transaction)
+    if cursor:
+        position = decode_cursor(cursor)
+        if not position:
+            return {"error": "Invalid cursor"}, 400
+        # The plain date bound is what lets PostgreSQL skip the partitions
+        # of newer months (see partition_service); it cannot prune on a row
+        # comparison
+        query = query.where(
+            Transaction.date <= position[0],
+            tuple_(Transaction.date, Transaction.id) < position,
+        )
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = db.session.execute(
+        query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1][-2:])
+
+    to_dict = serializer(Transaction, fields)
+    return {
+        "transactions": [to_dict(row) for row in rows],
+        "next_cursor": next_cursor,
+    }, 200
+
+
+def get_transaction(user, transaction_id, fields=None):
+    row = db.session.execute(
+        select(*select_columns(Transaction, fields))
         .join(Account)
-        .filter(Transaction.id == transaction_id, Account.user_id == user.id)
-        .first()
-    )
+        .where(Transaction.id == transaction_id, Account.user_id == user.id)
+    ).first()
 
-    if not transaction:
+    if not row:
         return {"error": "Transaction not found"}, 404
 
-    return transaction.to_dict(), 200
+    return serializer(Transaction, fields)(row), 200
 
 
 def delete_transaction(user, transaction_id):
-    transaction = (
-        db.session.query(Transaction)
-        .join(Account)
-        .filter(Transaction.id == transaction_id, Account.user_id == user.id)
-        .first()
-    )
+    # DELETE ... RETURNING makes the removal and the balance revert atomic:
+    # of two concurrent deletes only one gets the row back.
+    owned_accounts = select(Account.id).where(Account.user_id == user.id)
+    deleted = db.session.execute(
+        delete(Transaction)
+        .where(
+            Transaction.id == transaction_id,
+            Transaction.account_id.in_(owned_accounts),
+        )
+        .returning(
+            Transaction.account_id,
+            Transaction.amount_cents,
+            Transaction.type,
+            Transaction.date,
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
 
-    if not transaction:
+    if not deleted:
+        db.session.rollback()
         return {"error": "Transaction not found"}, 404
 
-    account = Account.query.get(transaction.account_id)
-    if transaction.type == "income":
-        account.balance -= transaction.amount
-    elif transaction.type == "expense":
-        account.balance += transaction.amount
-
-    db.session.delete(transaction)
+    account_service.adjust_balance(
+        deleted.account_id, -signed_amount(deleted.type, deleted.amount_cents)
+    )
+    rollup_service.record(
+        deleted.account_id, deleted.date, deleted.type, -deleted.amount_cents, count=-1
+    )
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
+    analytics_store.remove(str(user.id), version, uuid.UUID(str(transaction_id)))
+    search_store.remove(str(user.id), version, transaction_id)
     return {"message": "Transaction deleted and balance reverted"}, 200
 
+
 def update_transaction(user, transaction_id, data):
+    # Lock only the transaction row so concurrent edits of it serialise
     transaction = (
         db.session.query(Transaction)
         .join(Account)
         .filter(Transaction.id == transaction_id, Account.user_id == user.id)
+        .with_for_update(of=Transaction)
         .first()
     )
 
     if not transaction:
         return {"error": "Transaction not found"}, 404
 
-    account = Account.query.get(transaction.account_id)
-
     if "amount" in data or "type" in data:
-        if transaction.type == "income":
-            account.balance -= transaction.amount
+        if "amount" in data:
+            try:
+                new_amount = to_cents(data["amount"])
+            except ValueError:
+                return {"error": "Invalid amount"}, 400
         else:
-            account.balance += transaction.amount
-
-        new_amount = float(data.get("amount", transaction.amount))
+            new_amount = transaction.amount_cents
         new_type = data.get("type", transaction.type)
+        if new_type not in ("income", "expense"):
+            return {"error": "Invalid transaction type. Use 'income' or 'expense'"}, 400
 
-        if new_type == "income":
-            account.balance += new_amount
-        else:
-            account.balance -= new_amount
+        account_service.adjust_balance(
+            transaction.account_id,
+            signed_amount(new_type, new_amount)
+            - signed_amount(transaction.type, transaction.amount_cents),
+        )
+
+        month = transaction.date.date().replace(day=1)
+        rollup_deltas = defaultdict(lambda: [0, 0])
+        old = rollup_deltas[(transaction.account_id, month, transaction.type)]
+        old[0] -= transaction.amount_cents
+        old[1] -= 1
+        new = rollup_deltas[(transaction.account_id, month, new_type)]
+        new[0] += new_amount
+        new[1] += 1
+        rollup_service.record_many({k: tuple(v) for k, v in rollup_deltas.items()})
 
-        transaction.amount = new_amount
+        transaction.amount_cents = new_amount
         transaction.type = new_type
 
     if "description" in data:
         transaction.description = data["description"]
 
+    version = user_service.bump_data_version(user.id)
     db.session.commit()
+    analytics_store.update(
+        str(user.id),
+        version,
+        transaction.id,
+        transaction.amount_cents,
+        transaction.type,
+    )
+    change = (
+        transaction.id,
+        transaction.amount_cents,
+        transaction.type,
+        transaction.description,
+    )
+    search_store.patch(str(user.id), version, lambda entry: entry.update(*change))
     return transaction.to_dict(), 200
+
+
+def iter_user_transactions(user, date_from=None, date_to=None):
+    """
+    Yields every transaction of the user, archived ones included, as a row
+    tuple (id, account_id, account_name, date, type, amount_cents,
+    description), ordered by account and date. Uses a server-side cursor
+    fetched EXPORT_BATCH_SIZE rows at a time, so memory stays flat however
+    long the history is, and rows are produced as soon as the (index-ordered)
+    scan starts.
+    """
+    history = partition_service.transactions_of(
+        Account.user_id == user.id, date_from=date_from, date_to=date_to
+    )
+    query = (
+        select(
+            history.c.id,
+            history.c.account_id,
+            Account.name,
+            history.c.date,
+            history.c.type,
+            history.c.amount_cents,
+            history.c.description,
+        )
+        .join(Account, Account.id == history.c.account_id)
+        .order_by(history.c.account_id, history.c.date.desc(), history.c.id.desc())
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    yield from db.session.execute(query)
+
+
+def validate_import_row(row, account_ids):
+    """
+    Returns (values, None) for a valid import row, or (None, error message).
+    NDJSON rows can hold any JSON type, so every field's type is checked.
+    """
+    try:
+        account_id = uuid.UUID(row.get("account_id"))
+    except (AttributeError, TypeError, ValueError):
+        return None, "Invalid account_id"
+    if account_id not in account_ids:
+        return None, "Account not found or access denied"
+
+    try:
+        amount = to_cents(row.get("amount"))
+    except ValueError:
+        return None, "Invalid amount"
+
+    trans_type = row.get("type")
+    if not isinstance(trans_type, str) or trans_type not in ("income", "expense"):
+        return None, "Invalid transaction type. Use 'income' or 'expense'"
+
+    description = row.get("description")
+    if description is None:
+        description = ""
+    if not isinstance(description, str):
+        return None, "Invalid description"
+    if len(description) > 200:
+        return None, "Description longer than 200 characters"
+
+    date = None
+    if row.get("date"):
+        try:
+            date = datetime.fromisoformat(row["date"])
+        except (TypeError, ValueError):
+            return None, "Invalid date"
+
+    return {
+        "id": uuid.uuid4(),
+        "account_id": account_id,
+        "amount_cents": amount,
+        "type": trans_type,
+        "description": description,
+        "date": date,
+    }, None
+
+
+def import_chunk(user, values):
+    """
+    Inserts one chunk of validated rows with a single executemany INSERT and
+    applies one net balance delta per account and one rollup delta per
+    (account, month, type), all in one DB transaction.
+    """
+    now = db.session.execute(select(func.now())).scalar()
+    balance_deltas = defaultdict(int)
+    rollup_deltas = defaultdict(lambda: [0, 0])
+
+    for row in values:
+        if row["date"] is None:
+            row["date"] = now
+        balance_deltas[row["account_id"]] += signed_amount(
+            row["type"], row["amount_cents"]
+        )
+
+        month = row["date"].date().replace(day=1)
+        delta = rollup_deltas[(row["account_id"], month, row["type"])]
+        delta[0] += row["amount_cents"]
+        delta[1] += 1
+
+    # Same lock order as the single-row paths: accounts, then rollups, each sorted
+    accounts = Account.__table__
+    db.session.execute(
+        accounts.update()
+        .where(accounts.c.id == bindparam("b_account_id"))
+        .values(balance_cents=accounts.c.balance_cents + bindparam("b_delta")),
+        [
+            {"b_account_id": account_id, "b_delta": delta}
+            for account_id, delta in sorted(balance_deltas.items())
+        ],
+    )
+    db.session.execute(insert(Transaction.__table__), values)
+    rollup_service.record_many({key: tuple(v) for key, v in rollup_deltas.items()})
+    version = user_service.bump_data_version(user.id)
+    db.session.commit()
+    analytics_store.append(
+        str(user.id),
+        version,
+        (
+            (row["id"], row["account_id"], row["amount_cents"], row["type"], row["date"])
+            for row in values
+        ),
+    )
+    search_store.append(
+        str(user.id),
+        version,
+        (
+            (
+                row["id"],
+                row["account_id"],
+                row["amount_cents"],
+                row["description"],
+                row["type"],
+                row["date"],
+            )
+            for row in values
+        ),
+    )
+
+
+def import_transactions(user, rows):
+    """
+    Bulk-imports an iterable of row dicts (account_id, amount, type and
+    optional description/date). Rows are validated and written in chunks;
+    invalid rows are reported with their 1-based row number and skipped.
+    """
+    account_ids = {
+        account_id
+        for (account_id,) in db.session.query(Account.id).filter(
+            Account.user_id == user.id
+        )
+    }
+
+    imported = failed = 0
+    errors = []
+
+    def add_error(row_number, message):
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({"row": row_number, "error": message})
+
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        values, row_numbers = [], []
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                failed += 1
+                add_error(row_number, str(row))
+                continue
+            row_values, error = validate_import_row(row, account_ids)
+            if error:
+                failed += 1
+                add_error(row_number, error)
+            else:
+                values.append(row_values)
+                row_numbers.append(row_number)
+
+        if not values:
+            continue
+        try:
+            import_chunk(user, values)
+            imported += len(values)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            failed += len(values)
+            for row_number in row_numbers:
+                add_error(row_number, f"Database error: {e.__class__.__name__}")
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }, 200
@@ -1,8 +1,22 @@
-from app import db, bcrypt
+from app import (
+    analytics_store,
+    db,
+    password_hasher,
+    recent_writes,
+    search_store,
+    user_cache,
+)
+from app.models.account import Account
 from app.models.user import User
 import jwt
 import datetime
 from flask import current_app
+from sqlalchemy import update
+from app.middlewares.instrumentation import timed
+from app.password_hasher import HasherBusy
+from app.services import purge_service
+
+BUSY_RESPONSE = {"error": "Server is busy, please try again shortly"}, 503
 
 
 def register_user(data):
@@ -11,7 +25,11 @@ def register_user(data):
     ).first():
         return {"error": "User already exists"}, 409
 
-    hashed_password = bcrypt.generate_password_hash(data["password"]).decode("utf-8")
+    try:
+        with timed("bcrypt"):
+            hashed_password = password_hasher.hash(data["password"])
+    except HasherBusy:
+        return BUSY_RESPONSE
     new_user = User(
         username=data["username"], email=data["email"], password_hash=hashed_password
     )
@@ -22,7 +40,16 @@ def register_user(data):
 
 def login_user(data):
     user = User.query.filter_by(email=data.get("email")).first()
-    if user and bcrypt.check_password_hash(user.password_hash, data.get("password")):
+    try:
+        with timed("bcrypt"):
+            valid = user is not None and password_hasher.check(
+                user.password_hash, data.get("password")
+            )
+    except HasherBusy:
+        return BUSY_RESPONSE
+    if valid:
+        if password_hasher.needs_rehash(user.password_hash):
+            rehash_password(user, data["password"])
         token = jwt.encode(
             {
                 "user_id": str(user.id),
@@ -35,21 +62,70 @@ def login_user(data):
     return {"error": "Invalid credentials"}, 401
 
 
+def rehash_password(user, password):
+    """Re-hashes a just-verified password at the configured cost; skipped when busy"""
+    try:
+        with timed("bcrypt"):
+            user.password_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return
+    db.session.commit()
+
+
 def update_username(user, new_username):
     if User.query.filter_by(username=new_username).first():
         return {"error": "Username already taken"}, 409
     user.username = new_username
     db.session.commit()
+    user_cache.delete(str(user.id))
     return {"message": "Username updated"}, 200
 
 
 def change_password(user, new_password):
-    user.password_hash = bcrypt.generate_password_hash(new_password).decode("utf-8")
+    try:
+        with timed("bcrypt"):
+            user.password_hash = password_hasher.hash(new_password)
+    except HasherBusy:
+        return BUSY_RESPONSE
     db.session.commit()
+    user_cache.delete(str(user.id))
     return {"message": "Password updated"}, 200
 
 
 def delete_profile(user):
+    user_id = str(user.id)
+    # The accounts are detached first, so deleting the user touches no other
+    # rows; their transactions are purged in chunks afterwards
+    account_ids = purge_service.detach_accounts(Account.user_id == user.id)
     db.session.delete(user)
     db.session.commit()
+    user_cache.delete(user_id)
+    analytics_store.discard(user_id)
+    search_store.discard(user_id)
+    purge_service.purge_accounts(account_ids)
     return {"message": "User deleted"}, 200
+
+
+def get_data_version(user):
+    """Current version of the user's financial data (one primary-key lookup)"""
+    return (
+        db.session.query(User.data_version).filter(User.id == user.id).scalar() or 0
+    )
+
+
+def bump_data_version(user_id):
+    """
+    Marks the user's data as changed, in the caller's DB transaction.
+    Called last in write paths (after account and rollup rows) to keep the
+    lock order consistent. Returns the new version, with which the caller
+    patches the analytics store once the write has committed. The user's
+    reads stay off the read replicas for a while (see replica_reads).
+    """
+    recent_writes.set(str(user_id), True)
+    return db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
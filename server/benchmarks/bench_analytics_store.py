@@ -0,0 +1,128 @@
+"""
+GET /api/analysis/stats and /forecast for one user with a long history,
+computed from the database (analytics store off) vs the in-memory
+analytics store: cold (the user's columns are loaded first), warm, and
+right after a transaction write (which patches the cached columns). Also
+reports the store's memory per user and per transaction. The response
+cache is off so every request is computed.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_analytics_store [--transactions 100000]
+        [--requests 20] [--database URI]
+
+Uses a temporary SQLite database unless --database is given (it only adds
+and removes its own throwaway user, but rebuilds the monthly rollups).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+ROUTES = ("/api/analysis/stats", "/api/analysis/forecast")
+
+
+def timed_get(client, path, headers):
+    start = time.perf_counter()
+    response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed
+
+
+def run(transactions, requests):
+    from app import analytics_store, create_app
+    from app.services import rollup_service
+    from benchmarks.bench_export import seed
+    from benchmarks.common import bench_user
+
+    app = create_app()
+    client = app.test_client()
+    store_config = (
+        analytics_store.max_bytes, analytics_store.max_users, analytics_store.ttl
+    )
+    results = {"transactions": transactions}
+
+    with bench_user(app, accounts=2) as (headers, account_ids):
+        seed(app, uuid.UUID(account_ids[0]), transactions)
+        with app.app_context():
+            rollup_service.rebuild()  # seed() writes the transactions only
+
+        def write():
+            response = client.post(
+                "/api/transactions/",
+                json={"account_id": account_ids[1], "amount": 12.34, "type": "income"},
+                headers=headers,
+            )
+            assert response.status_code == 201
+
+        for path in ROUTES:
+            name = path.rsplit("/", 1)[-1]
+            timings = {}
+
+            analytics_store.configure(0, *store_config[1:])
+            timings["database"] = [
+                timed_get(client, path, headers) for _ in range(requests)
+            ]
+
+            cold = []
+            for _ in range(requests):
+                analytics_store.configure(*store_config)  # empty the store
+                cold.append(timed_get(client, path, headers))
+            timings["store, cold"] = cold
+            timings["store, warm"] = [
+                timed_get(client, path, headers) for _ in range(requests)
+            ]
+            after_write = []
+            for _ in range(requests):
+                write()
+                after_write.append(timed_get(client, path, headers))
+            timings["store, after a write"] = after_write
+
+            results[name] = {}
+            for label, values in timings.items():
+                p50 = statistics.median(values) * 1000
+                results[name][label] = round(p50, 2)
+                print(f"{path:<24} {label:<22} p50 {p50:>9.2f} ms", file=sys.stderr)
+
+        stats = analytics_store.stats()
+        user_bytes = max(stats["user_bytes"].values())
+        rows = transactions + 2 * requests
+        results["store"] = {
+            "user_bytes": user_bytes,
+            "bytes_per_transaction": round(user_bytes / rows, 1),
+            "patches": stats["patches"],
+        }
+        print(
+            f"store: {user_bytes / 1e6:.2f} MB for the user"
+            f" ({user_bytes / rows:.1f} bytes per transaction,"
+            f" spare capacity included), {stats['patches']} patches",
+            file=sys.stderr,
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=20, help="per route and mode")
+    parser.add_argument("--database", help="SQLAlchemy URI (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        os.environ.setdefault("SECRET_KEY", "bench-analytics-store")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+        results = run(args.transactions, args.requests)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
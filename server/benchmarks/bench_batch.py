@@ -0,0 +1,227 @@
+"""
+Page-load latency with and without POST /api/batch over a slow link: starts
+`uvicorn asgi:app` behind a TCP proxy that delays each direction by half of
+--rtt-ms, then loads two client pages many times and reports p50/p95 page
+load times.
+
+Pages (the calls the client makes on first render):
+    dashboard  GET /api/analysis/dashboard, /forecast?months=3, /stats
+    account    GET /api/accounts/, /api/transactions/account/<id>
+
+Modes:
+    separate  each call on a warm keep-alive connection, in parallel over up
+              to --connections connections per page (browsers allow 6 per
+              host over HTTP/1.1; some mobile proxies effectively fewer)
+    batch     the page's calls in one POST /api/batch
+
+The client runs on another origin than the API, so browsers send a CORS
+preflight (OPTIONS) before each distinct authenticated URL; --preflight
+(the default) models that, --no-preflight leaves it out. The response cache
+is off so every call does its work.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_batch [--rtt-ms 0,50,150] [--loads 30]
+        [--connections 6] [--transactions 500] [--local-postgres | --database URI] [--output batch.json]
+
+The target database's tables are dropped and refilled by benchmarks.datagen.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from benchmarks.load_asgi import (
+    http_request, list_clients, percentile, run_module, wait_for_port,
+)
+from benchmarks.local_postgres import free_port, local_postgres
+
+PREFIX = "batch"
+ORIGIN = "http://localhost:3000"
+MODES = ("separate", "batch")
+
+
+def page_calls(client):
+    """{page: [(method, path, body)]} for one generated user"""
+    account_id = client["account_ids"][0]
+    return {
+        "dashboard": [
+            ("GET", "/api/analysis/dashboard", None),
+            ("GET", "/api/analysis/forecast?months=3", None),
+            ("GET", "/api/analysis/stats", None),
+        ],
+        "account": [
+            ("GET", "/api/accounts/", None),
+            ("GET", f"/api/transactions/account/{account_id}", None),
+        ],
+    }
+
+
+def as_batch(calls):
+    requests = [{"method": method, "path": path} for method, path, _ in calls]
+    return [("POST", "/api/batch", {"requests": requests})]
+
+
+async def call(connection, token, method, path, body, preflight):
+    """One API call as a cross-origin browser makes it; returns the status"""
+    reader, writer = connection
+    if preflight:
+        await http_request(
+            reader, writer, "OPTIONS", path,
+            f"Origin: {ORIGIN}\r\nAccess-Control-Request-Method: {method}\r\n"
+            "Access-Control-Request-Headers: authorization,content-type\r\n",
+            b"",
+        )
+    headers = f"Origin: {ORIGIN}\r\nAuthorization: Bearer {token}\r\n"
+    payload = b""
+    if body is not None:
+        headers += "Content-Type: application/json\r\n"
+        payload = json.dumps(body).encode("utf-8")
+    return await http_request(reader, writer, method, path, headers, payload)
+
+
+async def measure(port, token, calls, loads, preflight, max_connections):
+    """Loads a page `loads` times on warm connections; returns the times in seconds"""
+    connections = asyncio.Queue()
+    for _ in range(min(len(calls), max_connections)):
+        connections.put_nowait(await asyncio.open_connection("127.0.0.1", port))
+
+    async def queued_call(c):
+        connection = await connections.get()
+        try:
+            return await call(connection, token, *c, preflight)
+        finally:
+            connections.put_nowait(connection)
+
+    times, errors = [], 0
+    try:
+        for i in range(loads + 1):  # the first load warms the connections up
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(queued_call(c) for c in calls))
+            if i:
+                times.append(time.perf_counter() - start)
+                errors += sum(status >= 400 for status in statuses)
+    finally:
+        while not connections.empty():
+            connections.get_nowait()[1].close()
+    return times, errors
+
+
+def run_rtt(rtt_ms, server_port, env, client, args):
+    proxy_port = free_port()
+    proxy = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.load_asgi", "--proxy", str(proxy_port),
+            "127.0.0.1", str(server_port), str(rtt_ms / 2000),
+        ],
+        env=env, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        proxy.stdout.readline()
+        results = []
+        for page, calls in page_calls(client).items():
+            for mode in MODES:
+                times, errors = asyncio.run(
+                    measure(
+                        proxy_port, client["token"],
+                        calls if mode == "separate" else as_batch(calls),
+                        args.loads, args.preflight, args.connections,
+                    )
+                )
+                result = {
+                    "rtt_ms": rtt_ms,
+                    "page": page,
+                    "mode": mode,
+                    "http_requests": len(calls if mode == "separate" else as_batch(calls))
+                    * (2 if args.preflight else 1),
+                    "p50_ms": round(statistics.median(times) * 1000, 1),
+                    "p95_ms": round(percentile(times, 0.95) * 1000, 1),
+                    "errors": errors,
+                }
+                results.append(result)
+                print(
+                    f"rtt {rtt_ms:>5} ms  {page:<9} {mode:<8}"
+                    f"  {result['http_requests']} HTTP requests"
+                    f"  p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms"
+                    f"  errors {errors}",
+                    file=sys.stderr,
+                )
+        return results
+    finally:
+        proxy.terminate()
+        proxy.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rtt-ms", default="0,50,150", help="comma-separated round-trip times")
+    parser.add_argument("--loads", type=int, default=30, help="page loads per measurement")
+    parser.add_argument("--connections", type=int, default=6, help="per page in separate mode")
+    parser.add_argument("--transactions", type=int, default=500, help="per account")
+    parser.add_argument("--preflight", action=argparse.BooleanOptionalAction, default=True)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database", help="SQLAlchemy URI (its tables are dropped!)")
+    target.add_argument("--local-postgres", action="store_true", help="start a temporary PostgreSQL")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--clients", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.clients:
+        print(json.dumps(list_clients(PREFIX)))
+        return
+
+    if args.local_postgres:
+        database = local_postgres()
+    else:
+        database = nullcontext(args.database or os.getenv("SQLALCHEMY_DATABASE_URI"))
+
+    with database as uri:
+        if not uri:
+            raise SystemExit("No database: pass --database/--local-postgres or set SQLALCHEMY_DATABASE_URI")
+        env = {**os.environ, "SQLALCHEMY_DATABASE_URI": uri}
+        run_module(
+            [
+                "benchmarks.datagen", "--reset", "--prefix", PREFIX, "--users", "1",
+                "--accounts", "3", "--transactions", str(args.transactions),
+            ],
+            env,
+        )
+        client = run_module(["benchmarks.bench_batch", "--clients"], env)[0]
+
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            env={**env, "RESPONSE_CACHE_TTL": "0", "AUTO_CREATE_SCHEMA": "false"},
+        )
+        try:
+            wait_for_port(port, server)
+            results = []
+            for rtt_ms in (float(r) for r in args.rtt_ms.split(",")):
+                results += run_rtt(rtt_ms, port, env, client, args)
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "loads": args.loads,
+            "connections": args.connections,
+            "preflight": args.preflight,
+            "transactions_per_account": args.transactions,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Deleting an account with a long history (1M transactions by default):
+
+- the ORM cascade the services used before, which loads every transaction
+  and deletes it row by row. It runs on a smaller account
+  (--orm-transactions), and the time for the full size is extrapolated;
+- a single DELETE of the account, with the transactions going through
+  ON DELETE CASCADE in the same statement;
+- DELETE /api/accounts/<id>: the account is detached, then the purge
+  deletes its transactions in chunks of DELETE_CHUNK_SIZE rows, mostly on
+  a background thread.
+
+The first two hold their locks for the whole delete. For the API, the
+benchmark reports the request's latency, the time until the purge is done
+and the longest single chunk.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_delete [--transactions 1000000]
+        [--orm-transactions 20000] [--chunk-size 10000] [--database URI]
+
+Uses a temporary SQLite database unless --database is given (it only adds
+and removes its own throwaway users).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+
+def report(label, rows, seconds, extra=""):
+    print(
+        f"{label:<32} {rows:>8} rows {seconds:>9.2f} s {rows / seconds:>10.0f} rows/s  {extra}",
+        file=sys.stderr,
+    )
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds)}
+
+
+def run(transactions, orm_transactions):
+    from sqlalchemy import delete
+    from app import create_app, db
+    from app.models.account import Account
+    from app.services import purge_service
+    from benchmarks.bench_export import seed
+    from benchmarks.common import bench_user
+
+    app = create_app()
+    client = app.test_client()
+    results = {"transactions": transactions}
+
+    # Before: cascade="all, delete-orphan" without passive_deletes
+    with bench_user(app) as (_, (account_id,)):
+        seed(app, uuid.UUID(account_id), orm_transactions)
+        with app.app_context():
+            started = time.perf_counter()
+            account = db.session.get(Account, uuid.UUID(account_id))
+            for transaction in account.transactions:
+                db.session.delete(transaction)
+            db.session.delete(account)
+            db.session.commit()
+            seconds = time.perf_counter() - started
+        projected = seconds * transactions / orm_transactions
+        results["orm cascade"] = report(
+            "ORM cascade (before)",
+            orm_transactions,
+            seconds,
+            f"~{projected:.0f} s for {transactions}",
+        )
+        results["orm cascade"]["projected_seconds"] = round(projected, 1)
+
+    with bench_user(app) as (_, (account_id,)):
+        seed(app, uuid.UUID(account_id), transactions)
+        with app.app_context():
+            started = time.perf_counter()
+            db.session.execute(delete(Account).where(Account.id == uuid.UUID(account_id)))
+            db.session.commit()
+            results["single delete"] = report(
+                "single DELETE, ON DELETE CASCADE", transactions, time.perf_counter() - started
+            )
+
+    chunk_seconds = []
+    purge_chunk = purge_service.purge_chunk
+
+    def timed_chunk(*args):
+        started = time.perf_counter()
+        deleted = purge_chunk(*args)
+        chunk_seconds.append(time.perf_counter() - started)
+        return deleted
+
+    purge_service.purge_chunk = timed_chunk
+    try:
+        with bench_user(app) as (headers, (account_id,)):
+            seed(app, uuid.UUID(account_id), transactions)
+            started = time.perf_counter()
+            response = client.delete(f"/api/accounts/{account_id}", headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            latency = time.perf_counter() - started
+            for thread in threading.enumerate():
+                if thread.name == "account-purge":
+                    thread.join()
+            seconds = time.perf_counter() - started
+    finally:
+        purge_service.purge_chunk = purge_chunk
+    longest = max(chunk_seconds)
+    results["chunked purge"] = report(
+        "chunked purge (API)",
+        transactions,
+        seconds,
+        f"request {latency * 1000:.0f} ms, {len(chunk_seconds)} chunks,"
+        f" longest {longest * 1000:.0f} ms",
+    )
+    results["chunked purge"].update(
+        request_ms=round(latency * 1000, 1),
+        chunks=len(chunk_seconds),
+        longest_chunk_ms=round(longest * 1000, 1),
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--orm-transactions", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--database", help="SQLAlchemy URI (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        os.environ.setdefault("SECRET_KEY", "bench-delete")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        os.environ["DELETE_CHUNK_SIZE"] = str(args.chunk_size)
+        os.environ["DELETE_IN_BACKGROUND"] = "true"
+        results = run(args.transactions, args.orm_transactions)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
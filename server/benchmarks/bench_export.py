@@ -0,0 +1,106 @@
+"""
+Time to first byte, throughput and peak RSS growth of
+GET /api/transactions/export for users with different history sizes.
+Each size runs in a fresh process so the RSS numbers are comparable.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_export [--rows 1000,100000,1000000] [--format csv]
+"""
+import argparse
+import datetime
+import random
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.transaction import Transaction
+from benchmarks.common import bench_user
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(app, account_id, rows, batch=10000):
+    rnd = random.Random(0)
+    start = datetime.datetime(2015, 1, 1)
+    with app.app_context():
+        for offset in range(0, rows, batch):
+            db.session.execute(
+                insert(Transaction.__table__),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "account_id": account_id,
+                        "amount_cents": rnd.randint(100, 50000),
+                        "type": rnd.choice(["income", "expense"]),
+                        "description": "Export benchmark row",
+                        "date": start
+                        + datetime.timedelta(minutes=rnd.randint(0, 5_000_000)),
+                    }
+                    for _ in range(min(batch, rows - offset))
+                ],
+            )
+            db.session.commit()
+
+
+def run_single(rows, fmt):
+    app = create_app()
+    client = app.test_client()
+    with bench_user(app) as (headers, (account_id,)):
+        seed(app, uuid.UUID(account_id), rows)
+        rss_before = peak_rss_mb()
+
+        start = time.perf_counter()
+        response = client.get(
+            f"/api/transactions/export?format={fmt}", headers=headers, buffered=False
+        )
+        chunks = iter(response.response)
+        first = next(chunks)
+        ttfb = time.perf_counter() - start
+        size = len(first)
+        for chunk in chunks:
+            size += len(chunk)
+        response.close()
+        elapsed = time.perf_counter() - start
+        rss_growth = peak_rss_mb() - rss_before
+
+    print(
+        f"{rows:>10} rows  ttfb {ttfb * 1000:>8.1f} ms  total {elapsed:>7.2f} s  "
+        f"{rows / elapsed:>9.0f} rows/s  {size / 1e6:>8.1f} MB  "
+        f"peak RSS growth {rss_growth:>6.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,100000,1000000")
+    parser.add_argument("--format", default="csv", choices=["csv", "ndjson"])
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(int(args.rows), args.format)
+        return
+
+    for rows in args.rows.split(","):
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_export",
+                "--single",
+                "--rows",
+                rows,
+                "--format",
+                args.format,
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
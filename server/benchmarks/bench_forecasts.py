@@ -0,0 +1,178 @@
+"""
+Throughput of the income forecast batch job (`flask forecasts rebuild`) in
+users per second: fitting every user inline and over a process pool, the
+NumPy fitting alone, and refitting users one at a time the way a request
+for a stale forecast does.
+
+Every generated user has one account whose monthly income rollups are a
+salary with a trend, a December bonus and noise, over --months months
+(a quarter of the users get only a year, which is fitted with a line).
+
+Usage (from the server directory):
+    python -m benchmarks.bench_forecasts [--users 10000] [--months 36]
+        [--workers 4] [--batch-size 2000] [--database URI]
+
+Uses a temporary SQLite database unless --database is given (it only adds
+and removes its own users).
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+PREFIX = "bench_forecast"
+ONE_AT_A_TIME = 200  # users refitted through the per-request path
+
+
+def seed(users, months, seed=42):
+    """Inserts the users, their accounts and income rollups; returns the user ids"""
+    from sqlalchemy import insert
+    from app import db
+    from app.forecasting import month_date, month_index
+    from app.models.account import Account
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.models.user import User
+
+    rnd = random.Random(seed)
+    last = month_index(datetime.date.today())
+    user_rows, account_rows, rollup_rows = [], [], []
+    for i in range(users):
+        user_id, account_id = uuid.uuid4(), uuid.uuid4()
+        user_rows.append(
+            {
+                "id": user_id,
+                "username": f"{PREFIX}_{i:06d}",
+                "email": f"{PREFIX}_{i:06d}@example.com",
+                "password_hash": "!",
+            }
+        )
+        account_rows.append(
+            {"id": account_id, "user_id": user_id, "name": "Checking", "balance_cents": 0}
+        )
+        salary = rnd.randint(150000, 600000)
+        growth = rnd.uniform(0, 0.01)
+        span = months if i % 4 else min(months, 12)
+        for month in range(last - span + 1, last + 1):
+            cents = salary * (1 + growth) ** (month - last + span)
+            if month % 12 == 11:
+                cents += salary * rnd.uniform(0.5, 1.5)  # December bonus
+            rollup_rows.append(
+                {
+                    "account_id": account_id,
+                    "month": month_date(month),
+                    "type": "income",
+                    "total_cents": round(cents * rnd.uniform(0.95, 1.05)),
+                    "count": 1,
+                }
+            )
+
+    db.session.execute(insert(User.__table__), user_rows)
+    db.session.execute(insert(Account.__table__), account_rows)
+    for start in range(0, len(rollup_rows), 50000):
+        db.session.execute(
+            insert(MonthlyRollup.__table__), rollup_rows[start : start + 50000]
+        )
+    db.session.commit()
+    return [row["id"] for row in user_rows]
+
+
+def cleanup():
+    from sqlalchemy import delete, select
+    from app import db
+    from app.models.account import Account
+    from app.models.user import User
+
+    users = select(User.id).where(User.username.like(f"{PREFIX}_%"))
+    # Rollups and forecasts go with their account/user (ON DELETE CASCADE)
+    db.session.execute(delete(Account).where(Account.user_id.in_(users)))
+    db.session.execute(delete(User).where(User.id.in_(users)))
+    db.session.commit()
+
+
+def report(label, users, seconds):
+    print(
+        f"{label:<34} {users:>7} users {seconds:>8.2f} s {users / seconds:>10.0f} users/s",
+        file=sys.stderr,
+    )
+    return {"users": users, "seconds": round(seconds, 3), "users_per_s": round(users / seconds)}
+
+
+def run(users, months, workers, batch_size):
+    from app import create_app, db
+    from app.forecasting import fit_batch
+    from app.models.forecast import Forecast
+    from app.models.user import User
+    from app.services import analysis_service, forecast_service
+
+    app = create_app()
+    results = {"users": users, "months": months}
+    with app.app_context():
+        cleanup()
+        started = time.perf_counter()
+        user_ids = seed(users, months)
+        print(f"seeded {users} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        seasonal_min_months = app.config["FORECAST_SEASONAL_MIN_MONTHS"]
+        try:
+            started = time.perf_counter()
+            matrices = list(forecast_service.income_matrices(batch_size=batch_size))
+            results["read"] = report("read rollups", users, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for matrix in matrices:
+                fit_batch(matrix.fit_args(seasonal_min_months))
+            results["fit"] = report("fit only (NumPy)", users, time.perf_counter() - started)
+
+            for label, pool in (("rebuild, inline", 0), (f"rebuild, {workers} workers", workers)):
+                started = time.perf_counter()
+                stored = forecast_service.rebuild(
+                    stale_only=False, workers=pool, batch_size=batch_size
+                )
+                results[label] = report(label, stored, time.perf_counter() - started)
+
+            # A stale forecast is refitted by the request that reads it
+            sample = user_ids[:ONE_AT_A_TIME]
+            db.session.query(Forecast).filter(Forecast.user_id.in_(sample)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+            started = time.perf_counter()
+            for user_id in sample:
+                user = db.session.get(User, user_id)
+                response, status = analysis_service.forecast_income(user, 3)
+                assert status == 200, response
+            results["one at a time"] = report(
+                "one at a time (per request)", len(sample), time.perf_counter() - started
+            )
+        finally:
+            cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--database", help="SQLAlchemy URI (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        os.environ.setdefault("SECRET_KEY", "bench-forecasts")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        os.environ["ANALYTICS_STORE_MAX_MB"] = "0"  # refit from the rollups
+        results = run(args.users, args.months, args.workers, args.batch_size)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
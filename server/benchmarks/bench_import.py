@@ -0,0 +1,70 @@
+"""
+Rows/sec of POST /api/transactions/import versus one POST /api/transactions/
+per row, against the database configured in the environment.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_import [--rows 20000] [--single-rows 1000]
+"""
+import argparse
+import random
+from app import create_app
+from benchmarks.common import Timer, bench_user
+
+
+def make_rows(account_ids, count, seed=0):
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield {
+            "account_id": rnd.choice(account_ids),
+            "amount": round(rnd.uniform(1, 500), 2),
+            "type": "income" if rnd.random() < 0.3 else "expense",
+            "description": f"Imported row {i}",
+            "date": f"20{rnd.randint(20, 25)}-{rnd.randint(1, 12):02d}-"
+            f"{rnd.randint(1, 28):02d}T12:00:00",
+        }
+
+
+def to_csv(rows):
+    lines = ["account_id,amount,type,description,date"]
+    for r in rows:
+        lines.append(
+            f"{r['account_id']},{r['amount']},{r['type']},{r['description']},{r['date']}"
+        )
+    return "\n".join(lines).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+
+    with bench_user(app, accounts=3) as (headers, account_ids):
+        rows = list(make_rows(account_ids, args.single_rows, seed=1))
+        with Timer() as single:
+            for row in rows:
+                response = client.post("/api/transactions/", json=row, headers=headers)
+                assert response.status_code == 201, response.get_json()
+        single_rate = len(rows) / single.elapsed
+
+        body = to_csv(make_rows(account_ids, args.rows, seed=2))
+        with Timer() as bulk:
+            response = client.post(
+                "/api/transactions/import",
+                data=body,
+                headers={**headers, "Content-Type": "text/csv"},
+            )
+        result = response.get_json()
+        assert result["imported"] == args.rows, result
+        bulk_rate = args.rows / bulk.elapsed
+
+    print(f"single-row POST : {len(rows):>8} rows  {single_rate:>10.0f} rows/s")
+    print(f"bulk import CSV : {args.rows:>8} rows  {bulk_rate:>10.0f} rows/s")
+    print(f"speed-up        : {bulk_rate / single_rate:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
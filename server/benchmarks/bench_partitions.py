@@ -0,0 +1,180 @@
+"""
+Reads over a long transaction history on PostgreSQL with the transactions
+table as one plain table, after `flask transactions partition` (monthly
+range partitions) and after `flask transactions archive` (months before the
+last --keep-months moved into transaction_archives). For one user it
+reports the p50 latency of:
+
+    first page   GET /api/transactions/account/<id>
+    deep page    the same with a cursor --keep-months / 2 months back
+    dashboard    GET /api/analysis/dashboard
+    stats        GET /api/analysis/stats (STATS_MODE=sql)
+    export 3m    GET /api/transactions/export for the last 3 months
+    export all   GET /api/transactions/export, archived months included
+
+plus how long the conversion and the archiving took and the size on disk
+of the transactions (all partitions, with indexes) and of the archive.
+The response cache and the analytics store are off so every request is
+computed.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_partitions [--users 20] [--accounts 3]
+        [--transactions 5000] [--years 6] [--keep-months 24] [--requests 15]
+        [--local-postgres | --database URI] [--output partitions.json]
+
+The target database's tables are dropped and refilled by benchmarks.datagen.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from benchmarks.local_postgres import local_postgres
+
+PREFIX = "bench"
+LAYOUTS = ("plain", "partitioned", "archived")
+
+
+def timed_get(client, path, headers):
+    start = time.perf_counter()
+    response = client.get(path, headers=headers)
+    response.get_data()  # exports stream
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed
+
+
+def storage_mb():
+    from sqlalchemy import text
+    from app import db
+
+    live, archive = db.session.execute(
+        text(
+            # pg_partition_tree is empty for a plain table
+            "SELECT coalesce((SELECT sum(pg_total_relation_size(relid))"
+            " FROM pg_partition_tree('transactions')),"
+            " pg_total_relation_size('transactions')),"
+            " pg_total_relation_size('transaction_archives')"
+        )
+    ).one()
+    return round(int(live) / 1e6, 1), round(archive / 1e6, 1)
+
+
+def paths(account_id, keep_months):
+    today = date.today()
+    # Newer than the archived months, so the page is there in every layout
+    position = datetime.combine(today, datetime.min.time()) - timedelta(
+        days=round(30.4 * keep_months / 2)
+    )
+    from app.services.transaction_service import encode_cursor
+
+    cursor = encode_cursor(position, uuid.UUID(int=0))
+    three_months_ago = (today - timedelta(days=91)).isoformat()
+    return {
+        "first page": f"/api/transactions/account/{account_id}",
+        "deep page": f"/api/transactions/account/{account_id}?cursor={cursor}",
+        "dashboard": "/api/analysis/dashboard",
+        "stats": "/api/analysis/stats",
+        "export 3m": f"/api/transactions/export?format=ndjson&from={three_months_ago}",
+        "export all": "/api/transactions/export?format=ndjson",
+    }
+
+
+def run(args):
+    from sqlalchemy import select, text
+    from app import create_app, db
+    from app.models.account import Account
+    from app.models.user import User
+    from app.services import partition_service
+    from benchmarks import datagen
+    from benchmarks.common import make_token
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        summary = datagen.generate(
+            args.users, args.accounts, args.transactions, args.years, prefix=PREFIX, reset=True
+        )
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        user = db.session.scalar(select(User).where(User.username == f"{PREFIX}_00000"))
+        account_id = db.session.scalar(select(Account.id).where(Account.user_id == user.id))
+        headers = {"Authorization": f"Bearer {make_token(app, user.id)}"}
+    print(
+        f"{summary['total_transactions']} transactions loaded in {summary['load_seconds']} s",
+        file=sys.stderr,
+    )
+
+    results = {"meta": {**summary, "keep_months": args.keep_months, "requests": args.requests}}
+    urls = paths(account_id, args.keep_months)
+    for layout in LAYOUTS:
+        with app.app_context():
+            started = time.perf_counter()
+            if layout == "partitioned":
+                partition_service.partition_table(args.months_ahead)
+            elif layout == "archived":
+                partition_service.archive_partitions(args.keep_months)
+            seconds = time.perf_counter() - started
+            db.session.execute(text("ANALYZE"))
+            db.session.commit()
+            live_mb, archive_mb = storage_mb()
+        result = {"seconds": round(seconds, 2), "live_mb": live_mb, "archive_mb": archive_mb}
+        print(
+            f"{layout:<12} {seconds:>8.2f} s  transactions {live_mb:>8.1f} MB"
+            f"  archive {archive_mb:>7.1f} MB",
+            file=sys.stderr,
+        )
+        for name, path in urls.items():
+            timed_get(client, path, headers)  # warm-up
+            times = [timed_get(client, path, headers) for _ in range(args.requests)]
+            p50 = statistics.median(times) * 1000
+            result[name] = round(p50, 2)
+            print(f"{layout:<12} {name:<12} p50 {p50:>9.2f} ms", file=sys.stderr)
+        results[layout] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=3, help="per user")
+    parser.add_argument("--transactions", type=int, default=5000, help="per account")
+    parser.add_argument("--years", type=float, default=6)
+    parser.add_argument("--keep-months", type=int, default=24)
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=15, help="per measurement")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database", help="SQLAlchemy URI (its tables are dropped!)")
+    target.add_argument("--local-postgres", action="store_true", help="start a temporary PostgreSQL")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    if args.local_postgres:
+        database = local_postgres()
+    else:
+        database = nullcontext(args.database or os.getenv("SQLALCHEMY_DATABASE_URI"))
+
+    with database as uri:
+        if not uri or not uri.startswith("postgresql"):
+            raise SystemExit("Partitioning needs PostgreSQL: pass --database/--local-postgres")
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = uri
+        os.environ.setdefault("SECRET_KEY", "bench-partitions")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+        os.environ["ANALYTICS_STORE_MAX_MB"] = "0"
+        os.environ["STATS_MODE"] = "sql"
+        results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
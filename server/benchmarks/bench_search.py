@@ -0,0 +1,185 @@
+"""
+GET /api/transactions/search latency over the benchmarks.datagen dataset:
+p50/p95 per query for a sample of users, against what clients did before,
+fetching their whole history (GET /api/transactions/export) to filter it
+themselves. Each query is also run for one account, for a date range and
+for its second page. On PostgreSQL it reports the size of the GIN index;
+elsewhere the in-process index's build time (a user's first search) and
+memory per user. The response cache is off so every request is computed.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_search [--users 200] [--accounts 5]
+        [--transactions 1000] [--sample 20] [--database URI] [--skip-load]
+
+Uses a temporary SQLite database unless --database is given; the target
+database's tables are dropped and refilled by benchmarks.datagen unless
+--skip-load reuses the data already there.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from benchmarks.load_asgi import percentile
+
+PREFIX = "bench"
+QUERIES = ("amazon", "ama", "whole foods", "uber", "bill", "concert tick", "optician")
+
+
+def timed_get(client, path, headers):
+    start = time.perf_counter()
+    response = client.get(path, headers=headers)
+    response.get_data()
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed, response
+
+
+def summarize(times):
+    return {
+        "p50_ms": round(statistics.median(times) * 1000, 2),
+        "p95_ms": round(percentile(times, 0.95) * 1000, 2),
+    }
+
+
+def run(args):
+    from sqlalchemy import func, select, text
+    from app import create_app, db, search_store
+    from app.models.account import Account
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from benchmarks import datagen
+    from benchmarks.common import make_token
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        if not args.skip_load:
+            summary = datagen.generate(
+                args.users,
+                args.accounts,
+                args.transactions,
+                args.years,
+                prefix=PREFIX,
+                reset=True,
+            )
+            print(
+                f"{summary['total_transactions']} transactions loaded"
+                f" in {summary['load_seconds']} s",
+                file=sys.stderr,
+            )
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            db.session.execute(text("ANALYZE transactions"))
+            db.session.commit()
+        total = db.session.scalar(select(func.count()).select_from(Transaction))
+        users = db.session.scalars(
+            select(User.id)
+            .where(User.username.like(f"{PREFIX}_%"))
+            .order_by(func.random())
+            .limit(args.sample)
+        ).all()
+        sample = [
+            (
+                {"Authorization": f"Bearer {make_token(app, user_id)}"},
+                db.session.scalar(select(Account.id).where(Account.user_id == user_id)),
+            )
+            for user_id in users
+        ]
+
+    results = {
+        "meta": {"dialect": dialect, "transactions": total, "sample_users": len(sample)}
+    }
+    if dialect == "postgresql":
+        with app.app_context():
+            index_bytes = db.session.scalar(
+                text("SELECT pg_total_relation_size('ix_transactions_search')")
+            )
+        results["meta"]["index_mb"] = round(index_bytes / 1e6, 1)
+    else:
+        builds = []
+        for headers, _ in sample:
+            elapsed, _ = timed_get(client, "/api/transactions/search?q=amazon", headers)
+            builds.append(elapsed)
+        user_bytes = search_store.stats()["user_bytes"]
+        results["first search"] = summarize(builds)
+        results["meta"]["index_mb_per_user"] = round(
+            statistics.mean(user_bytes.values()) / 1e6, 2
+        )
+
+    since = (date.today() - timedelta(days=365)).isoformat()
+    cases = {
+        "all accounts": lambda q, account_id: f"q={q}",
+        "one account": lambda q, account_id: f"q={q}&account_id={account_id}",
+        "last year": lambda q, account_id: f"q={q}&from={since}",
+    }
+    for query in QUERIES:
+        results[query] = {}
+        for label, params in cases.items():
+            times, second_pages = [], []
+            for _ in range(args.requests):
+                for headers, account_id in sample:
+                    path = f"/api/transactions/search?{params(query, account_id)}"
+                    elapsed, response = timed_get(client, path, headers)
+                    times.append(elapsed)
+                    cursor = response.get_json()["next_cursor"]
+                    if label == "all accounts" and cursor:
+                        elapsed, _ = timed_get(client, f"{path}&cursor={cursor}", headers)
+                        second_pages.append(elapsed)
+            results[query][label] = summarize(times)
+            if second_pages:
+                results[query]["second page"] = summarize(second_pages)
+        for label, result in results[query].items():
+            print(
+                f"{query:<14} {label:<14} p50 {result['p50_ms']:>8.2f} ms"
+                f"  p95 {result['p95_ms']:>8.2f} ms",
+                file=sys.stderr,
+            )
+
+    exports = [
+        timed_get(client, "/api/transactions/export?format=ndjson", headers)[0]
+        for headers, _ in sample
+    ]
+    result = results["full export (before)"] = summarize(exports)
+    print(
+        f"{'full export (before)':<29} p50 {result['p50_ms']:>8.2f} ms"
+        f"  p95 {result['p95_ms']:>8.2f} ms",
+        file=sys.stderr,
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--accounts", type=int, default=5, help="per user")
+    parser.add_argument("--transactions", type=int, default=1000, help="per account")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--sample", type=int, default=20, help="users searched")
+    parser.add_argument("--requests", type=int, default=3, help="per user and query")
+    parser.add_argument("--database", help="SQLAlchemy URI (default: temporary SQLite)")
+    parser.add_argument("--skip-load", action="store_true", help="reuse the data already there")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        os.environ.setdefault("SECRET_KEY", "bench-search")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+        results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Serialisation micro-benchmark over one account's transactions (100k by
+default): the time to turn the rows into dicts (ORM entities + to_dict vs
+the projected column rows the services now select, all fields and a
+?fields= subset), to encode them with Flask's default JSON provider vs
+orjson (RFC 822 and ISO dates), and the size and time of gzip and brotli
+on the encoded body. Each step reports the best of --repeat runs.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_serialization [--rows 100000] [--repeat 5]
+        [--fields id,amount,date] [--database URI]
+
+Uses a temporary SQLite database unless --database is given (it only adds
+and removes its own throwaway user).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def best_of(repeat, fn):
+    """(best seconds, last result) over `repeat` calls"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label, seconds, rows, extra=""):
+    print(
+        f"{label:<34} {seconds * 1000:>9.1f} ms  {rows / seconds:>11.0f} rows/s  {extra}",
+        file=sys.stderr,
+    )
+
+
+def run(rows, repeat, fields):
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy import select
+    from app import create_app, db
+    from app.fields import select_columns, serializer
+    from app.json_provider import OrjsonProvider
+    from app.models.transaction import Transaction
+    from benchmarks.bench_export import seed
+    from benchmarks.common import bench_user
+
+    app = create_app()
+    results = {"rows": rows}
+    with bench_user(app) as (_, (account_id,)):
+        account_id = uuid.UUID(account_id)
+        seed(app, account_id, rows)
+
+        with app.app_context():
+
+            def orm_dicts():
+                transactions = Transaction.query.filter_by(account_id=account_id).all()
+                dicts = [t.to_dict() for t in transactions]
+                db.session.expunge_all()
+                return dicts
+
+            def column_dicts(fields=None):
+                to_dict = serializer(Transaction, fields)
+                return [
+                    to_dict(row)
+                    for row in db.session.execute(
+                        select(*select_columns(Transaction, fields)).where(
+                            Transaction.account_id == account_id
+                        )
+                    )
+                ]
+
+            print(f"{rows} transactions", file=sys.stderr)
+            for label, fn in (
+                ("load: ORM + to_dict", orm_dicts),
+                ("load: projected columns", column_dicts),
+                (f"load: ?fields={','.join(fields)}", lambda: column_dicts(fields)),
+            ):
+                seconds, dicts = best_of(repeat, fn)
+                report(label, seconds, rows)
+                results[label] = round(seconds * 1000, 1)
+            dicts = column_dicts()
+
+            # The provider reads JSON_DATETIME_FORMAT when it is created
+            app.config["JSON_DATETIME_FORMAT"] = "http"
+            orjson_http = OrjsonProvider(app)
+            app.config["JSON_DATETIME_FORMAT"] = "iso"
+            orjson_iso = OrjsonProvider(app)
+            bodies = {}
+            for label, provider in (
+                ("encode: default provider", DefaultJSONProvider(app)),
+                ("encode: orjson, RFC 822 dates", orjson_http),
+                ("encode: orjson, ISO dates", orjson_iso),
+            ):
+                seconds, bodies[label] = best_of(
+                    repeat, lambda: provider.dumps(dicts).encode("utf-8")
+                )
+                report(label, seconds, rows, f"{len(bodies[label]) / 1e6:.1f} MB")
+                results[label] = round(seconds * 1000, 1)
+            body = bodies["encode: orjson, RFC 822 dates"]
+
+            codecs = [
+                ("compress: gzip -6", lambda: gzip.compress(body, 6, mtime=0)),
+                ("compress: gzip -1", lambda: gzip.compress(body, 1, mtime=0)),
+            ]
+            if brotli is not None:
+                codecs += [
+                    ("compress: brotli q4", lambda: brotli.compress(body, quality=4)),
+                    ("compress: brotli q6", lambda: brotli.compress(body, quality=6)),
+                ]
+            for label, fn in codecs:
+                seconds, compressed = best_of(repeat, fn)
+                ratio = len(body) / len(compressed)
+                report(
+                    label, seconds, rows, f"{len(compressed) / 1e6:.2f} MB ({ratio:.1f}x)"
+                )
+                results[label] = {
+                    "ms": round(seconds * 1000, 1),
+                    "bytes": len(compressed),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fields", default="id,amount,date")
+    parser.add_argument("--database", help="SQLAlchemy URI (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app (and its Config) is imported
+        os.environ["SQLALCHEMY_DATABASE_URI"] = (
+            args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        os.environ.setdefault("SECRET_KEY", "bench-serialization")
+        os.environ["BCRYPT_POOL_SIZE"] = "0"
+        results = run(args.rows, args.repeat, args.fields.split(","))
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
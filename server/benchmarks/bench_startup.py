@@ -0,0 +1,132 @@
+"""
+Cold start report: starts fresh Python processes that import the app,
+call create_app() and serve a first response, and reports the median time
+of each phase plus the slowest imports from `python -X importtime`.
+
+Two first requests are timed: GET /api/users/profile without a token (no
+DB access) and a failed login (the first DB connection). Every measurement
+is made with AUTO_CREATE_SCHEMA on and off, to show what the startup DDL
+costs.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_startup [--runs 5] [--top 15]
+                                       [--budget-ms 1500] [--output startup.json]
+
+With --budget-ms the exit status is 1 when the median time from process
+start to first response with AUTO_CREATE_SCHEMA=false is over budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child():
+    """Runs inside the measured process and prints its phase timings"""
+    spawned_at = float(os.environ["BENCH_SPAWNED_AT"])
+    main_started = time.time()
+
+    start = time.perf_counter()
+    from app import create_app
+
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+
+    client = app.test_client()
+    client.get("/api/users/profile")
+    first_response = time.perf_counter()
+    first_response_at = time.time()
+    client.post("/api/auth/login", json={"email": "nobody@example.invalid", "password": "x"})
+    first_db_response = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "interpreter_ms": (main_started - spawned_at) * 1000,
+                "import_app_ms": (imported - start) * 1000,
+                "create_app_ms": (created - imported) * 1000,
+                "first_response_ms": (first_response - created) * 1000,
+                "first_db_response_ms": (first_db_response - first_response) * 1000,
+                "process_to_first_response_ms": (first_response_at - spawned_at) * 1000,
+            }
+        )
+    )
+
+
+def run_child(env):
+    env = {**env, "BENCH_SPAWNED_AT": repr(time.time())}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, check=True, stdout=subprocess.PIPE, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(env, top):
+    """The slowest imports (by cumulative time) during import + create_app()"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app import create_app; create_app()"],
+        env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = (p.strip() for p in line.split(":", 1)[1].split("|"))
+        rows.append((int(cumulative_us), int(self_us), module))
+    rows.sort(reverse=True)
+    return [
+        {"module": module, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+        for cum, own, module in rows[:top]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    report = {}
+    for auto_create in ("true", "false"):
+        env = {**os.environ, "AUTO_CREATE_SCHEMA": auto_create}
+        runs = [run_child(env) for _ in range(args.runs)]
+        medians = {key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]}
+        report[f"AUTO_CREATE_SCHEMA={auto_create}"] = {
+            "median": medians,
+            "slowest_imports": slowest_imports(env, args.top),
+        }
+
+    for label, data in report.items():
+        print(f"\n{label} (median of {args.runs} runs)")
+        for key, value in data["median"].items():
+            print(f"  {key:<30} {value:>8.1f} ms")
+        print("  slowest imports (cumulative / self ms):")
+        for row in data["slowest_imports"]:
+            print(f"    {row['cumulative_ms']:>8.1f} {row['self_ms']:>7.1f}  {row['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.budget_ms is not None:
+        measured = report["AUTO_CREATE_SCHEMA=false"]["median"]["process_to_first_response_ms"]
+        verdict = "within" if measured <= args.budget_ms else "OVER"
+        print(f"\nCold start {measured:.1f} ms, {verdict} the {args.budget_ms:.0f} ms budget")
+        if measured > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
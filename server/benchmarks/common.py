@@ -0,0 +1,65 @@
+"""Shared helpers for the benchmark scripts (run them from the server directory)."""
+import datetime
+import time
+import uuid
+from contextlib import contextmanager
+import jwt
+from app import db, password_hasher
+from app.models.account import Account
+from app.models.user import User
+
+
+def make_token(app, user_id):
+    return jwt.encode(
+        {
+            "user_id": str(user_id),
+            "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1),
+        },
+        app.config["SECRET_KEY"],
+        algorithm="HS256",
+    )
+
+
+@contextmanager
+def bench_user(app, accounts=1, password=None):
+    """
+    Creates a throwaway user with `accounts` empty accounts and yields
+    (auth headers, [account ids]). Everything is deleted afterwards. Without
+    a password the user cannot log in and is only usable through the token.
+    """
+    with app.app_context():
+        suffix = uuid.uuid4().hex[:10]
+        user = User(
+            username=f"bench_{suffix}",
+            email=f"bench_{suffix}@example.com",
+            password_hash=password_hasher.hash(password) if password else "!",
+        )
+        db.session.add(user)
+        db.session.flush()
+        account_ids = []
+        for i in range(accounts):
+            account = Account(user_id=user.id, name=f"Bench {i}", balance_cents=0)
+            db.session.add(account)
+            db.session.flush()
+            account_ids.append(str(account.id))
+        db.session.commit()
+        user_id = user.id
+
+    headers = {"Authorization": f"Bearer {make_token(app, user_id)}"}
+    try:
+        yield headers, account_ids
+    finally:
+        with app.app_context():
+            user = db.session.get(User, user_id)
+            if user:
+                db.session.delete(user)
+                db.session.commit()
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,291 @@
+"""
+Seeded synthetic data for the benchmarks: N users x M accounts x K
+transactions per account spread over the last Y years.
+
+Every user gets a monthly salary and rent on their first account, a yearly
+bonus, and a long tail of everyday spending (groceries, restaurants,
+transport, ...) with log-normal amounts and merchant descriptions. Income
+is scaled to cover the spending plus a small saving rate. The same
+seed and end date always produce the same rows, ids included. Account
+balances are set to an opening balance plus the net of the generated
+transactions and the monthly rollups are written alongside, so the data is
+consistent with what the API would have produced.
+
+Rows are loaded with COPY on PostgreSQL and executemany INSERTs elsewhere.
+Every generated user can log in with the password "benchmark".
+
+Usage (from the server directory):
+    python -m benchmarks.datagen [--users 10] [--accounts 3]
+                                 [--transactions 1000] [--years 3]
+                                 [--seed 42] [--end 2026-10-01] [--reset]
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+from sqlalchemy import insert
+from flask import current_app
+from app import create_app, db
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.money import to_cents
+from app.password_hasher import hash_password
+from app.services import rollup_service
+
+PASSWORD = "benchmark"
+INSERT_CHUNK_SIZE = 10000
+
+ACCOUNT_NAMES = ["Checking", "Savings", "Credit Card", "Cash", "Brokerage"]
+
+# (weight, median amount, descriptions) of the everyday spending tail
+EXPENSES = [
+    (30, 55, ["Whole Foods", "Trader Joe's", "Aldi", "Kroger", "Costco"]),
+    (20, 28, ["Chipotle", "Starbucks", "Local Diner", "Sushi Bar", "Pizza Place"]),
+    (14, 18, ["Uber", "Metro Card", "Shell Gas", "Parking", "Lyft"]),
+    (12, 75, ["Amazon", "Target", "IKEA", "Best Buy", "H&M"]),
+    (8, 35, ["Cinema", "Concert Tickets", "Steam", "Bowling", "Museum"]),
+    (6, 110, ["Electricity Bill", "Water Bill", "Internet", "Phone Bill"]),
+    (5, 14, ["Netflix", "Spotify", "Gym Membership", "Cloud Storage"]),
+    (4, 80, ["Pharmacy", "Dentist", "Doctor Visit", "Optician"]),
+    (1, 650, ["Flight Tickets", "Hotel", "Car Repair", "Vacation Rental"]),
+]
+INCOMES = [
+    (5, 40, ["Refund", "Cashback"]),
+    (3, 450, ["Freelance Project", "Consulting"]),
+    (2, 25, ["Interest", "Dividends"]),
+]
+EXTRA_INCOME_SHARE = 0.08
+
+
+def make_uuid(rnd):
+    return uuid.UUID(int=rnd.getrandbits(128), version=4)
+
+
+def pick_amount(rnd, median):
+    return round(max(0.5, rnd.lognormvariate(math.log(median), 0.55)), 2)
+
+
+def month_starts(start, end):
+    month = start.replace(day=1)
+    while month < end:
+        yield month
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def at(rnd, day):
+    return datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(
+        hours=rnd.randint(8, 21), minutes=rnd.randint(0, 59), seconds=rnd.randint(0, 59)
+    )
+
+
+def generate_transactions(rnd, account_id, count, start, end, primary=False):
+    """Returns `count` transaction rows for one account between start and end"""
+    rows = []
+
+    def add(trans_type, amount, description, date):
+        rows.append(
+            {
+                "id": make_uuid(rnd),
+                "account_id": account_id,
+                "amount": amount,
+                "description": description,
+                "type": trans_type,
+                "date": date,
+            }
+        )
+
+    if primary:
+        salary = round(rnd.uniform(2800, 7500), -1)
+        rent = round(salary * rnd.uniform(0.25, 0.4), -1)
+        for month in month_starts(start, end):
+            if len(rows) + 2 > count:
+                break
+            add("expense", rent, "Rent", at(rnd, month))
+            payday = month.replace(day=rnd.randint(25, 28))
+            if payday >= end:
+                break
+            add("income", salary, "Salary", at(rnd, payday))
+            if month.month == 12 and len(rows) < count:
+                bonus = round(salary * rnd.uniform(0.5, 1.5), 2)
+                add("income", bonus, "Annual Bonus", at(rnd, payday))
+
+    expense_weights = [w for w, _, _ in EXPENSES]
+    income_weights = [w for w, _, _ in INCOMES]
+    span = (end - start).days
+    while len(rows) < count:
+        if rnd.random() < EXTRA_INCOME_SHARE:
+            trans_type = "income"
+            _, median, names = rnd.choices(INCOMES, income_weights)[0]
+        else:
+            trans_type = "expense"
+            _, median, names = rnd.choices(EXPENSES, expense_weights)[0]
+        day = start + datetime.timedelta(days=rnd.randrange(span))
+        add(trans_type, pick_amount(rnd, median), rnd.choice(names), at(rnd, day))
+
+    # Scale income so the account saves a little instead of drifting into debt
+    income = sum(r["amount"] for r in rows if r["type"] == "income")
+    expense = sum(r["amount"] for r in rows if r["type"] == "expense")
+    if income and expense:
+        factor = expense * rnd.uniform(1.0, 1.15) / income
+        for row in rows:
+            if row["type"] == "income":
+                row["amount"] = round(row["amount"] * factor, 2)
+
+    for row in rows:
+        row["amount_cents"] = to_cents(row.pop("amount"))
+    return rows
+
+
+def copy_transactions(rows):
+    """PostgreSQL COPY of transaction rows through the session's connection"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                row["id"],
+                row["account_id"],
+                row["amount_cents"],
+                row["description"],
+                row["type"],
+                row["date"].isoformat(),
+            ]
+        )
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        "COPY transactions (id, account_id, amount_cents, description, type, date) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def load_transactions(rows):
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[i : i + INSERT_CHUNK_SIZE]
+        if db.engine.dialect.name == "postgresql":
+            copy_transactions(chunk)
+        else:
+            db.session.execute(insert(Transaction.__table__), chunk)
+
+
+def add_account(rnd, user_id, name, transactions, start, end, primary=False):
+    """
+    Inserts one account with its transactions and rollups in the current
+    DB transaction (not committed) and returns its id.
+    """
+    account_id = make_uuid(rnd)
+    rows = generate_transactions(rnd, account_id, transactions, start, end, primary)
+
+    balance = to_cents(round(rnd.uniform(200, 5000), 2))
+    rollups = defaultdict(lambda: [0, 0])
+    for row in rows:
+        cents = row["amount_cents"]
+        balance += cents if row["type"] == "income" else -cents
+        delta = rollups[(account_id, row["date"].date().replace(day=1), row["type"])]
+        delta[0] += cents
+        delta[1] += 1
+
+    db.session.execute(
+        insert(Account.__table__),
+        {"id": account_id, "user_id": user_id, "name": name, "balance_cents": balance},
+    )
+    load_transactions(rows)
+    rollup_service.record_many({key: tuple(v) for key, v in rollups.items()})
+    return account_id
+
+
+def add_user(rnd, username, email, password_hash, accounts, transactions, start, end):
+    """Inserts a user with `accounts` accounts (not committed); returns (user id, account ids)"""
+    user_id = make_uuid(rnd)
+    db.session.execute(
+        insert(User.__table__),
+        {"id": user_id, "username": username, "email": email, "password_hash": password_hash},
+    )
+    account_ids = []
+    for i in range(accounts):
+        name = ACCOUNT_NAMES[i] if i < len(ACCOUNT_NAMES) else f"Account {i + 1}"
+        account_ids.append(
+            add_account(rnd, user_id, name, transactions, start, end, primary=i == 0)
+        )
+    return user_id, account_ids
+
+
+def email_for(prefix, index):
+    return f"{prefix}_{index:05d}@example.com"
+
+
+def generate(users, accounts, transactions, years, seed=42, end=None, prefix="bench", reset=False):
+    """Loads the dataset into the app's database and returns a summary dict"""
+    rnd = random.Random(seed)
+    end = end or datetime.date.today()
+    start = end - datetime.timedelta(days=round(365.25 * years))
+
+    if reset:
+        db.drop_all()
+        db.create_all()
+
+    started = time.perf_counter()
+    password_hash = hash_password(PASSWORD, current_app.config["BCRYPT_LOG_ROUNDS"])
+    for i in range(users):
+        add_user(
+            rnd,
+            f"{prefix}_{i:05d}",
+            email_for(prefix, i),
+            password_hash,
+            accounts,
+            transactions,
+            start,
+            end,
+        )
+        db.session.commit()
+
+    return {
+        "seed": seed,
+        "users": users,
+        "accounts_per_user": accounts,
+        "transactions_per_account": transactions,
+        "total_transactions": users * accounts * transactions,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "dialect": db.engine.dialect.name,
+        "load_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=3, help="accounts per user")
+    parser.add_argument("--transactions", type=int, default=1000, help="per account")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last day (default today)")
+    parser.add_argument("--prefix", default="bench", help="username/email prefix")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        summary = generate(
+            args.users,
+            args.accounts,
+            args.transactions,
+            args.years,
+            seed=args.seed,
+            end=args.end,
+            prefix=args.prefix,
+            reset=args.reset,
+        )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Sync vs async serving under high concurrency: starts `uvicorn asgi:app`
+once with ASGI_ASYNC_ROUTES=false (every request on the ASGI_THREADS
+thread pool with the sync engine, like a threaded WSGI server) and once
+with the account, transaction and analysis routes on the event loop with
+the async engine, then drives each with keep-alive HTTP clients at several
+concurrency levels and reports requests/s, latency percentiles and errors.
+
+The request mix is GET /api/accounts/, a page of account history, the
+dashboard (response cache off) and a transaction create, spread over the
+generated users. --db-latency-ms puts a TCP proxy that delays every packet
+between the server and PostgreSQL, to model a database across the network;
+on a local socket, queries return too fast for waiting threads to matter.
+
+Usage (from the server directory):
+    python -m benchmarks.load_asgi [--concurrency 16,64,256] [--seconds 10]
+        [--threads 16] [--db-latency-ms 0] [--users 20] [--transactions 200]
+        [--local-postgres | --database URI] [--output load-asgi.json]
+
+The target database's tables are dropped and refilled by benchmarks.datagen.
+The load generator runs on the same machine, so compare the modes with each
+other rather than reading the numbers as absolute capacity.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from sqlalchemy.engine import make_url
+from benchmarks.local_postgres import free_port, local_postgres
+
+PREFIX = "loadasgi"
+SEED = 42
+MODES = {"sync": "false", "async": "true"}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def run_module(args, env):
+    """Runs `python -m <args>` and returns the JSON printed on its last line"""
+    result = subprocess.run(
+        [sys.executable, "-m", *args], env=env, check=True, stdout=subprocess.PIPE, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def list_clients(prefix=PREFIX):
+    """Child: a token and the account ids of every generated user"""
+    from app import create_app
+    from app.models.account import Account
+    from app.models.user import User
+    from benchmarks.common import make_token
+
+    app = create_app()
+    clients = []
+    with app.app_context():
+        users = User.query.filter(User.email.like(f"{prefix}_%")).order_by(User.email)
+        for user in users:
+            accounts = Account.query.filter_by(user_id=user.id).order_by(Account.name)
+            clients.append(
+                {
+                    "token": make_token(app, user.id),
+                    "account_ids": [str(a.id) for a in accounts],
+                }
+            )
+    return clients
+
+
+async def relay(reader, writer, delay):
+    """Copies one direction of a connection, delivering each chunk `delay` seconds late"""
+    queue = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            due, data = await queue.get()
+            if data is None:
+                break
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    delivery = asyncio.create_task(deliver())
+    try:
+        while data := await reader.read(65536):
+            queue.put_nowait((time.monotonic() + delay, data))
+    except ConnectionError:
+        pass
+    queue.put_nowait((0, None))
+    await delivery
+
+
+async def run_proxy(port, target_host, target_port, delay):
+    """Child: forwards 127.0.0.1:port to the database with `delay` added each way"""
+
+    async def handle(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(target_host, target_port)
+        await asyncio.gather(
+            relay(client_reader, server_writer, delay),
+            relay(server_reader, client_writer, delay),
+            return_exceptions=True,
+        )
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    print("ready", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def build_requests(clients):
+    """The request mix, one tuple (method, path, headers, body) per entry"""
+    rnd = random.Random(SEED)
+    requests = []
+    for client in clients:
+        headers = f"Authorization: Bearer {client['token']}\r\n"
+        account_id = client["account_ids"][0]
+        requests += [
+            ("GET", "/api/accounts/", headers, b""),
+            ("GET", f"/api/transactions/account/{account_id}?limit=50", headers, b""),
+            ("GET", "/api/analysis/dashboard", headers, b""),
+        ]
+        body = json.dumps(
+            {"account_id": account_id, "amount": rnd.randint(1, 100), "type": "expense",
+             "description": "load"}
+        ).encode("utf-8")
+        requests.append(
+            ("POST", "/api/transactions/", headers + "Content-Type: application/json\r\n", body)
+        )
+    rnd.shuffle(requests)
+    return requests
+
+
+async def http_request(reader, writer, method, path, headers, body):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\n{headers}"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def drive(port, requests, concurrency, seconds, warmup):
+    """`concurrency` keep-alive clients cycling through the mix; returns the stats"""
+    latencies, errors = [], 0
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + seconds
+
+    async def client(offset):
+        nonlocal errors
+        reader = writer = None
+        i = offset
+        while time.perf_counter() < deadline:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            start = time.perf_counter()
+            try:
+                status = await http_request(reader, writer, *requests[i % len(requests)])
+            except (ConnectionError, asyncio.IncompleteReadError):
+                status = None
+                writer.close()
+                writer = None
+            i += concurrency
+            if start < measure_from:
+                continue
+            if status is not None and status < 400:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        if writer is not None:
+            writer.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("server did not start")
+
+
+def run_mode(mode, env, args, requests):
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port),
+            "--log-level", "warning", "--no-access-log", "--backlog", "4096",
+        ],
+        env={
+            **env,
+            "ASGI_ASYNC_ROUTES": MODES[mode],
+            "ASGI_THREADS": str(args.threads),
+            "RESPONSE_CACHE_TTL": "0",
+            "AUTO_CREATE_SCHEMA": "false",
+        },
+    )
+    try:
+        wait_for_port(port, server)
+        results = []
+        for concurrency in args.concurrency:
+            result = asyncio.run(drive(port, requests, concurrency, args.seconds, args.warmup))
+            results.append(result)
+            print(
+                f"{mode:>5} c={concurrency:<5} {result['requests_per_sec']:>8} req/s"
+                f"  p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms"
+                f"  p99 {result['p99_ms']:>8} ms  errors {result['errors']}",
+                file=sys.stderr,
+            )
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", default="16,64,256", help="comma-separated client counts")
+    parser.add_argument("--seconds", type=float, default=10, help="measured time per level")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured time per level")
+    parser.add_argument("--threads", type=int, default=16, help="ASGI_THREADS of the server")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="added each way (PostgreSQL)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=2, help="accounts per user")
+    parser.add_argument("--transactions", type=int, default=200, help="per account")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database", help="SQLAlchemy URI (its tables are dropped!)")
+    target.add_argument("--local-postgres", action="store_true", help="start a temporary PostgreSQL")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--clients", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--proxy", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.clients:
+        print(json.dumps(list_clients()))
+        return
+    if args.proxy:
+        port, host, target_port, delay = args.proxy
+        asyncio.run(run_proxy(int(port), host, int(target_port), float(delay)))
+        return
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    if args.local_postgres:
+        database = local_postgres()
+    else:
+        database = nullcontext(args.database or os.getenv("SQLALCHEMY_DATABASE_URI"))
+
+    proxy = None
+    with database as uri:
+        if not uri:
+            raise SystemExit("No database: pass --database/--local-postgres or set SQLALCHEMY_DATABASE_URI")
+        env = {**os.environ, "SQLALCHEMY_DATABASE_URI": uri}
+        run_module(
+            [
+                "benchmarks.datagen", "--reset", "--prefix", PREFIX, "--seed", str(SEED),
+                "--users", str(args.users), "--accounts", str(args.accounts),
+                "--transactions", str(args.transactions),
+            ],
+            env,
+        )
+        requests = build_requests(run_module(["benchmarks.load_asgi", "--clients"], env))
+
+        try:
+            if args.db_latency_ms:
+                url = make_url(uri)
+                if url.get_backend_name() != "postgresql":
+                    raise SystemExit("--db-latency-ms needs a PostgreSQL database")
+                proxy_port = free_port()
+                proxy = subprocess.Popen(
+                    [
+                        sys.executable, "-m", "benchmarks.load_asgi", "--proxy",
+                        str(proxy_port), url.host or "127.0.0.1", str(url.port or 5432),
+                        str(args.db_latency_ms / 1000),
+                    ],
+                    env=env, stdout=subprocess.PIPE, text=True,
+                )
+                proxy.stdout.readline()
+                env["SQLALCHEMY_DATABASE_URI"] = url.set(
+                    host="127.0.0.1", port=proxy_port
+                ).render_as_string(hide_password=False)
+
+            results = {mode: run_mode(mode, env, args, requests) for mode in MODES}
+        finally:
+            if proxy is not None:
+                proxy.terminate()
+                proxy.wait()
+
+    report = {
+        "meta": {
+            "threads": args.threads,
+            "db_latency_ms": args.db_latency_ms,
+            "seconds": args.seconds,
+            "users": args.users,
+            "transactions_per_account": args.transactions,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Fires concurrent transaction writes (create, plus some updates and deletes)
+at a single account from many threads, then checks that the final balance
+equals the initial balance plus the signed sum of the surviving transactions
+and reports the achieved writes/sec.
+
+Usage (from the server directory):
+    python -m benchmarks.load_concurrent_writes [--threads 32] [--writes 3000]
+"""
+import argparse
+import random
+import threading
+from sqlalchemy import case, func
+from app import create_app, db
+from app.models.account import Account
+from app.models.transaction import Transaction
+from benchmarks.common import Timer, bench_user
+
+
+def worker(app, headers, account_id, writes, seed, counters, lock):
+    client = app.test_client()
+    rnd = random.Random(seed)
+    done = failed = 0
+    for i in range(writes):
+        payload = {
+            "account_id": account_id,
+            # Amounts with cents: balances are integer cents, so they stay exact
+            "amount": rnd.randint(1, 10000) / 100,
+            "type": rnd.choice(["income", "expense"]),
+            "description": f"load {seed}-{i}",
+        }
+        response = client.post("/api/transactions/", json=payload, headers=headers)
+        done += 1
+        if response.status_code != 201:
+            failed += 1
+            continue
+        transaction_id = response.get_json()["id"]
+
+        if i % 5 == 0:
+            response = client.put(
+                f"/api/transactions/{transaction_id}",
+                json={"amount": rnd.randint(1, 10000) / 100, "type": rnd.choice(["income", "expense"])},
+                headers=headers,
+            )
+            done += 1
+            failed += response.status_code != 200
+        if i % 7 == 0:
+            response = client.delete(f"/api/transactions/{transaction_id}", headers=headers)
+            done += 1
+            failed += response.status_code != 200
+
+    with lock:
+        counters["writes"] += done
+        counters["failed"] += failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=3000, help="creates in total")
+    args = parser.parse_args()
+
+    app = create_app()
+    counters = {"writes": 0, "failed": 0}
+    lock = threading.Lock()
+
+    with bench_user(app) as (headers, (account_id,)):
+        per_thread = args.writes // args.threads
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(app, headers, account_id, per_thread, seed, counters, lock),
+            )
+            for seed in range(args.threads)
+        ]
+        with Timer() as timer:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        with app.app_context():
+            balance = db.session.get(Account, account_id).balance_cents
+            expected = (
+                db.session.query(
+                    func.coalesce(
+                        func.sum(
+                            case(
+                                (Transaction.type == "income", Transaction.amount_cents),
+                                else_=-Transaction.amount_cents,
+                            )
+                        ),
+                        0,
+                    )
+                )
+                .filter(Transaction.account_id == account_id)
+                .scalar()
+            )
+
+    print(f"threads         : {args.threads}")
+    print(f"writes          : {counters['writes']} ({counters['failed']} failed)")
+    print(f"elapsed         : {timer.elapsed:.2f}s")
+    print(f"throughput      : {counters['writes'] / timer.elapsed:.0f} writes/s")
+    print(f"final balance   : {balance / 100:.2f}")
+    print(f"expected        : {expected / 100:.2f}")
+    if counters["failed"] or balance != expected:
+        raise SystemExit("FAILED: balance drifted or writes failed")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Login spike load test: some threads log in continuously while others read
+GET /api/accounts/, once with bcrypt hashed inline on the request threads
+(BCRYPT_POOL_SIZE=0) and once in the process pool. Reports login throughput,
+503s from the pool's queue limit and the readers' latency.
+
+Each mode runs in its own Python process because the pool settings are read
+from the environment at startup.
+
+Usage (from the server directory):
+    python -m benchmarks.load_login [--login-threads 16] [--reader-threads 4]
+                                    [--seconds 15] [--pool-size 2]
+                                    [--max-pending 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from app import create_app, password_hasher
+from benchmarks.common import bench_user
+
+PASSWORD = "load-test-password"
+BUSY_BACKOFF = 0.1
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def run_mode(login_threads, reader_threads, seconds):
+    app = create_app()
+    results = {"logins": 0, "busy": 0, "failed": 0, "login_ms": [], "read_ms": []}
+    lock = threading.Lock()
+
+    with bench_user(app, accounts=3, password=PASSWORD) as (headers, _):
+        email = app.test_client().get("/api/users/profile", headers=headers).get_json()["email"]
+        credentials = {"email": email, "password": PASSWORD}
+        deadline = time.perf_counter() + seconds
+
+        def login():
+            client = app.test_client()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = client.post("/api/auth/login", json=credentials).status_code
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if status == 200:
+                        results["logins"] += 1
+                        results["login_ms"].append(elapsed)
+                    elif status == 503:
+                        results["busy"] += 1
+                    else:
+                        results["failed"] += 1
+                if status == 503:
+                    time.sleep(BUSY_BACKOFF)  # as a client honouring the 503 would
+
+        def read():
+            client = app.test_client()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = client.get("/api/accounts/", headers=headers).status_code
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if status == 200:
+                        results["read_ms"].append(elapsed)
+                    else:
+                        results["failed"] += 1
+
+        # Start the pool before the clock runs, as a long-lived server would have
+        password_hasher.check(password_hasher.hash("warmup"), "warmup")
+
+        threads = [threading.Thread(target=login) for _ in range(login_threads)]
+        threads += [threading.Thread(target=read) for _ in range(reader_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    return {
+        "pool_size": password_hasher.workers,
+        "logins_per_sec": round(results["logins"] / seconds, 2),
+        "login_p50_ms": round(percentile(results["login_ms"], 0.5), 1),
+        "login_p95_ms": round(percentile(results["login_ms"], 0.95), 1),
+        "busy_503": results["busy"],
+        "failed": results["failed"],
+        "reads_per_sec": round(len(results["read_ms"]) / seconds, 1),
+        "read_p50_ms": round(percentile(results["read_ms"], 0.5), 2),
+        "read_p95_ms": round(percentile(results["read_ms"], 0.95), 2),
+        "read_mean_ms": round(statistics.fmean(results["read_ms"]), 2) if results["read_ms"] else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--reader-threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--pool-size", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--max-pending", type=int, default=8)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.login_threads, args.reader_threads, args.seconds)))
+        return
+
+    for label, pool_size in (("inline", 0), ("pool", args.pool_size)):
+        env = {
+            **os.environ,
+            "BCRYPT_POOL_SIZE": str(pool_size),
+            "BCRYPT_MAX_PENDING": str(args.max_pending if pool_size else 10**6),
+        }
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.load_login", "--worker",
+                "--login-threads", str(args.login_threads),
+                "--reader-threads", str(args.reader_threads),
+                "--seconds", str(args.seconds),
+            ],
+            env=env, check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{label:>7}: {result['logins_per_sec']:>6} logins/s"
+            f" (p50 {result['login_p50_ms']} ms, p95 {result['login_p95_ms']} ms,"
+            f" {result['busy_503']} x 503) | GET /api/accounts/"
+            f" {result['reads_per_sec']}/s p50 {result['read_p50_ms']} ms"
+            f" p95 {result['read_p95_ms']} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
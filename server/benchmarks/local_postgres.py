@@ -0,0 +1,63 @@
+"""
+Starts a throwaway PostgreSQL cluster for the benchmarks (initdb + pg_ctl in
+a temporary directory, trust auth on 127.0.0.1) and removes it afterwards.
+
+The server binaries are looked up in $PG_BIN, then on $PATH. PostgreSQL
+refuses to run as root, so run the benchmarks as an unprivileged user.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+DATABASE = "bench"
+
+
+def find_binary(name):
+    bin_dir = os.getenv("PG_BIN")
+    path = os.path.join(bin_dir, name) if bin_dir else shutil.which(name)
+    if not path or not os.path.exists(path):
+        raise SystemExit(f"{name} not found; put the PostgreSQL bin directory on PATH or set PG_BIN")
+    return path
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_postgres():
+    """Yields the SQLAlchemy URI of a freshly initialised, empty database"""
+    initdb, pg_ctl, createdb = (find_binary(n) for n in ("initdb", "pg_ctl", "createdb"))
+    root = tempfile.mkdtemp(prefix="bench-pg-")
+    data_dir = os.path.join(root, "data")
+    port = free_port()
+    quiet = {"check": True, "stdout": subprocess.DEVNULL}
+
+    try:
+        subprocess.run(
+            [initdb, "-D", data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+            **quiet,
+        )
+        subprocess.run(
+            [
+                pg_ctl, "-D", data_dir, "-l", os.path.join(root, "postgres.log"), "-w",
+                "-o", f"-p {port} -k {root} -c listen_addresses=127.0.0.1",
+                "start",
+            ],
+            **quiet,
+        )
+        try:
+            subprocess.run(
+                [createdb, "-h", "127.0.0.1", "-p", str(port), "-U", "postgres", DATABASE],
+                **quiet,
+            )
+            yield f"postgresql://postgres@127.0.0.1:{port}/{DATABASE}"
+        finally:
+            subprocess.run([pg_ctl, "-D", data_dir, "-m", "fast", "-w", "stop"], **quiet)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,450 @@
+"""
+Times every /api route registered by create_app at several data sizes and
+writes p50/p95 latency, SQL queries per request and peak RSS to JSON.
+
+For each size the database is reset and filled by benchmarks.datagen, then
+every route runs in its own Python process, so its peak RSS is not hidden by
+an earlier, heavier route. Routes that delete things get a fresh victim per
+request (created outside the timed section). Analysis and batch routes run
+with the response cache cleared before every request, so they measure the
+compute path. A route without a scenario below fails the run, so new endpoints have
+to be added here before they can be merged.
+
+Usage (from the server directory):
+    python -m benchmarks.run_suite [--sizes 100,1000,10000] [--users 5]
+        [--accounts 3] [--requests 50] [--local-postgres | --database URI]
+        [--output results.json] [--compare baseline.json] [--threshold 1.2]
+
+--sizes are transactions per account. Without --database/--local-postgres
+the SQLALCHEMY_DATABASE_URI from the environment is used; its tables are
+dropped and recreated.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app import create_app, db, response_cache
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services import search_service, transaction_service
+from benchmarks import datagen
+from benchmarks.common import make_token
+from benchmarks.local_postgres import local_postgres
+
+PREFIX = "bench"
+SEED = 42
+IMPORT_ROWS = 500
+# Merchants from datagen's descriptions: a whole word, a prefix and two words
+SEARCH_QUERIES = ("amazon", "sta", "whole foods")
+
+
+class Context:
+    """The benchmark user (the first generated one) and handles into its data"""
+
+    def __init__(self, app, route):
+        self.app = app
+        self.email = datagen.email_for(PREFIX, 0)
+        with app.app_context():
+            user = User.query.filter_by(email=self.email).one()
+            accounts = Account.query.filter_by(user_id=user.id).order_by(Account.name).all()
+            self.user_id = user.id
+            self.account_ids = [str(a.id) for a in accounts]
+            self.transaction_id = str(
+                Transaction.query.filter_by(account_id=accounts[0].id)
+                .order_by(Transaction.date.desc())
+                .first()
+                .id
+            )
+            self.transactions = Transaction.query.filter_by(account_id=accounts[0].id).count()
+        self.headers = {"Authorization": f"Bearer {make_token(app, self.user_id)}"}
+        # Not SEED itself: victims must not reuse the generated dataset's ids
+        self.rnd = random.Random(f"{SEED}:{route}")
+
+    def window(self):
+        end = datetime.date.today()
+        return end - datetime.timedelta(days=365 * 3), end
+
+    def new_account(self, transactions):
+        """A victim account of the benchmark user with some history"""
+        with self.app.app_context():
+            start, end = self.window()
+            account_id = datagen.add_account(
+                self.rnd, self.user_id, "Victim", transactions, start, end
+            )
+            db.session.commit()
+        return str(account_id)
+
+    def new_user(self):
+        """A victim user with one account; returns its auth headers"""
+        with self.app.app_context():
+            start, end = self.window()
+            suffix = datagen.make_uuid(self.rnd).hex[:12]
+            user_id, _ = datagen.add_user(
+                self.rnd, f"victim_{suffix}", f"victim_{suffix}@example.com", "!",
+                1, min(self.transactions, 1000), start, end,
+            )
+            db.session.commit()
+        return {"Authorization": f"Bearer {make_token(self.app, user_id)}"}
+
+    def search_cursor(self, q):
+        """The next_cursor of the first page of a search, or None"""
+        with self.app.app_context():
+            response, _ = search_service.search_transactions(
+                db.session.get(User, self.user_id), q
+            )
+        return response["next_cursor"]
+
+    def new_transaction(self):
+        with self.app.app_context():
+            response, _ = transaction_service.create_transaction(
+                db.session.get(User, self.user_id),
+                {"account_id": self.account_ids[0], "amount": 9.99, "type": "expense"},
+            )
+        return response["id"]
+
+
+def import_csv(ctx, i):
+    start, end = ctx.window()
+    rows = datagen.generate_transactions(ctx.rnd, ctx.account_ids[0], IMPORT_ROWS, start, end)
+    lines = ["account_id,amount,type,description,date"]
+    lines += [
+        f"{r['account_id']},{r['amount_cents'] / 100},{r['type']},{r['description']},"
+        f"{r['date'].isoformat()}"
+        for r in rows
+    ]
+    return "\n".join(lines).encode("utf-8")
+
+
+def search(ctx, i):
+    """All accounts, one account, and the second page, in turn"""
+    query = {"q": SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}
+    if i % 3 == 1:
+        query["account_id"] = ctx.account_ids[0]
+    elif i % 3 == 2:
+        cursor = ctx.search_cursor(query["q"])
+        if cursor:
+            query["cursor"] = cursor
+    return {"query_string": query}
+
+
+def batch_page(ctx, i):
+    """The dashboard's calls, as the client sends them in one batch"""
+    return {
+        "json": {
+            "requests": [
+                {"method": "GET", "path": "/api/analysis/dashboard"},
+                {"method": "GET", "path": "/api/accounts/"},
+                {"method": "GET", "path": f"/api/transactions/account/{ctx.account_ids[0]}"},
+            ]
+        }
+    }
+
+
+# "METHOD rule" -> function(ctx, i) returning the keyword arguments of client.open
+SCENARIOS = {
+    "POST /api/auth/register": lambda ctx, i: {
+        "json": {
+            "username": f"new_{i}_{ctx.rnd.getrandbits(32):x}",
+            "email": f"new_{i}_{ctx.rnd.getrandbits(32):x}@example.com",
+            "password": datagen.PASSWORD,
+            "confirm_password": datagen.PASSWORD,
+        }
+    },
+    "POST /api/auth/login": lambda ctx, i: {
+        "json": {"email": ctx.email, "password": datagen.PASSWORD}
+    },
+    "GET /api/users/profile": lambda ctx, i: {},
+    "PUT /api/users/change-username": lambda ctx, i: {
+        "json": {"username": f"{PREFIX}_renamed_{i}"}
+    },
+    "PUT /api/users/change-password": lambda ctx, i: {
+        "json": {"new_password": datagen.PASSWORD, "confirm_new_password": datagen.PASSWORD}
+    },
+    "DELETE /api/users/delete": lambda ctx, i: {"headers": ctx.new_user()},
+    "POST /api/accounts/": lambda ctx, i: {"json": {"name": f"New {i}", "balance": 100}},
+    "GET /api/accounts/": lambda ctx, i: {},
+    "GET /api/accounts/<string:id>": lambda ctx, i: {"path": {"id": ctx.account_ids[0]}},
+    "PUT /api/accounts/<string:id>": lambda ctx, i: {
+        "path": {"id": ctx.account_ids[-1]},
+        "json": {"name": f"Renamed {i}"},
+    },
+    "DELETE /api/accounts/<string:id>": lambda ctx, i: {
+        "path": {"id": ctx.new_account(min(ctx.transactions, 1000))}
+    },
+    "POST /api/transactions/": lambda ctx, i: {
+        "json": {
+            "account_id": ctx.account_ids[0],
+            "amount": 12.5,
+            "type": "expense" if i % 2 else "income",
+            "description": "Benchmark",
+        }
+    },
+    "POST /api/transactions/import": lambda ctx, i: {
+        "data": import_csv(ctx, i),
+        "content_type": "text/csv",
+    },
+    "GET /api/transactions/export": lambda ctx, i: {},
+    "GET /api/transactions/search": search,
+    "GET /api/transactions/account/<string:account_id>": lambda ctx, i: {
+        "path": {"account_id": ctx.account_ids[0]},
+        "query_string": {"limit": 50},
+    },
+    "GET /api/transactions/<string:transaction_id>": lambda ctx, i: {
+        "path": {"transaction_id": ctx.transaction_id}
+    },
+    "PUT /api/transactions/<string:transaction_id>": lambda ctx, i: {
+        "path": {"transaction_id": ctx.transaction_id},
+        "json": {"amount": 20 + i % 2},
+    },
+    "DELETE /api/transactions/<string:transaction_id>": lambda ctx, i: {
+        "path": {"transaction_id": ctx.new_transaction()}
+    },
+    "GET /api/analysis/dashboard": lambda ctx, i: {},
+    "GET /api/analysis/stats": lambda ctx, i: {},
+    "GET /api/analysis/forecast": lambda ctx, i: {"query_string": {"months": 3}},
+    "POST /api/batch": batch_page,
+    "POST /api/batch/": batch_page,
+}
+
+
+def api_routes(app):
+    routes = {}
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith("/api/"):
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            routes[f"{method} {rule.rule}"] = rule
+    return routes
+
+
+def check_coverage(app):
+    routes = api_routes(app)
+    missing = sorted(set(routes) - set(SCENARIOS))
+    stale = sorted(set(SCENARIOS) - set(routes))
+    if missing or stale:
+        raise SystemExit(
+            "Benchmark scenarios out of date.\n"
+            + "".join(f"  no scenario for {r}\n" for r in missing)
+            + "".join(f"  scenario for unknown route {r}\n" for r in stale)
+        )
+    return sorted(routes)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def run_route(name, requests, warmup):
+    """Worker: runs one route `requests` times and returns its measurements"""
+    app = create_app()
+    client = app.test_client()
+    ctx = Context(app, name)
+    method, rule = name.split(" ", 1)
+    url_rule = api_routes(app)[name]
+    build = SCENARIOS[name]
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count)
+
+    rss_before = peak_rss_mb()
+    timings, query_counts, statuses = [], [], {}
+    for i in range(warmup + requests):
+        kwargs = build(ctx, i)
+        path = rule
+        for key, value in kwargs.pop("path", {}).items():
+            path = path.replace(f"<string:{key}>", value)
+        headers = {**ctx.headers, **kwargs.pop("headers", {})}
+        if url_rule.endpoint.startswith(("analysis.", "batch.")):
+            response_cache.clear()
+
+        queries[0] = 0
+        start = time.perf_counter()
+        response = client.open(path, method=method, headers=headers, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            query_counts.append(queries[0])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code >= 400:
+            raise SystemExit(f"{name} returned {response.status_code}: {response.get_data()[:500]!r}")
+
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries_per_request": round(statistics.fmean(query_counts), 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def run_module(args, env):
+    """Runs `python -m <args>` and returns the JSON printed on its last line"""
+    result = subprocess.run(
+        [sys.executable, "-m", *args], env=env, check=True, stdout=subprocess.PIPE, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline_path, threshold):
+    """Prints p50/p95 ratios against an earlier run; returns the regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'size':>8}  {'route':<52} {'p50 old→new ms':>20} {'p95 old→new ms':>20}")
+    for size, data in results.items():
+        old_routes = baseline.get(size, {}).get("routes", {})
+        for route, new in data["routes"].items():
+            old = old_routes.get(route)
+            if not old:
+                continue
+            flags = []
+            for key in ("p50_ms", "p95_ms"):
+                if old[key] and new[key] / old[key] > threshold:
+                    flags.append(key)
+            print(
+                f"{size:>8}  {route:<52}"
+                f" {old['p50_ms']:>9.2f}→{new['p50_ms']:<9.2f}"
+                f" {old['p95_ms']:>9.2f}→{new['p95_ms']:<9.2f}"
+                + ("  REGRESSION " + ",".join(flags) if flags else "")
+            )
+            if flags:
+                regressions.append((size, route))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,1000,10000", help="transactions per account")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--accounts", type=int, default=3, help="accounts per user")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--routes", help="comma-separated substrings to filter routes by")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database", help="SQLAlchemy URI (its tables are dropped!)")
+    target.add_argument("--local-postgres", action="store_true", help="start a temporary PostgreSQL")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio flagged as regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--list-routes", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_route(args.worker, args.requests, args.warmup)))
+        return
+    if args.list_routes:
+        print(json.dumps(check_coverage(create_app())))
+        return
+
+    if args.local_postgres:
+        database = local_postgres()
+    else:
+        database = nullcontext(args.database or os.getenv("SQLALCHEMY_DATABASE_URI"))
+
+    with database as uri:
+        if not uri:
+            raise SystemExit("No database: pass --database/--local-postgres or set SQLALCHEMY_DATABASE_URI")
+        env = {**os.environ, "SQLALCHEMY_DATABASE_URI": uri}
+
+        # Config is read at import time, so the app is only created in children.
+        # Reads run first, so they see the generated data before writes add to it.
+        routes = run_module(["benchmarks.run_suite", "--list-routes"], env)
+        routes.sort(key=lambda r: (not r.startswith("GET"), r))
+        if args.routes:
+            routes = [r for r in routes if any(f in r for f in args.routes.split(","))]
+
+        results = {}
+        for size in [int(s) for s in args.sizes.split(",")]:
+            dataset = run_module(
+                [
+                    "benchmarks.datagen", "--reset", "--prefix", PREFIX,
+                    "--seed", str(SEED), "--users", str(args.users),
+                    "--accounts", str(args.accounts), "--transactions", str(size),
+                    "--years", str(args.years),
+                ],
+                env,
+            )
+            print(f"size {size}: {dataset['total_transactions']} transactions"
+                  f" loaded in {dataset['load_seconds']}s", file=sys.stderr)
+
+            results[str(size)] = {"dataset": dataset, "routes": {}}
+            for route in routes:
+                measured = run_module(
+                    [
+                        "benchmarks.run_suite", "--worker", route,
+                        "--requests", str(args.requests), "--warmup", str(args.warmup),
+                    ],
+                    env,
+                )
+                results[str(size)]["routes"][route] = measured
+                print(
+                    f"  {route:<52} p50 {measured['p50_ms']:>8.2f} ms"
+                    f"  p95 {measured['p95_ms']:>8.2f} ms"
+                    f"  {measured['queries_per_request']:>6} q/req"
+                    f"  {measured['peak_rss_mb']:>6} MB",
+                    file=sys.stderr,
+                )
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = None
+
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "dialect": make_url(uri).get_backend_name(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "accounts": args.accounts,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Connection pool stress test: many more concurrent requests than pooled
+connections. Every few seconds traffic pauses briefly while the pool's
+idle connections are killed on the server (as a restarting PgBouncer, a
+failover or a firewall dropping idle TCP connections would). For each
+scenario it reports per-second throughput (steadiness), latency
+percentiles, status codes, the most connections checked out and seen by
+the server, and the pool checkout wait from the
+db_pool_checkout_wait_seconds histogram.
+
+Scenarios:
+    queue              DB_POOL_MODE=queue with pre-ping (the default config)
+    queue-no-pre-ping  the same without pre-ping: killed connections surface as 500s
+    null               DB_POOL_MODE=null, one connection per request; meant to
+                       run behind an external pooler (pass its URI as --database),
+                       otherwise the server sees one connection per request thread
+
+Usage (from the server directory):
+    python -m benchmarks.stress_pool [--threads 100] [--pool-size 5]
+        [--max-overflow 5] [--seconds 15] [--kill-idle-every 3]
+        [--scenarios queue,queue-no-pre-ping] [--database URI] [--output stress.json]
+
+Runs against SQLALCHEMY_DATABASE_URI (PostgreSQL) unless --database is given;
+it only adds and removes its own throwaway user. On SQLite no connections are
+killed and the server-side connection count is reported as 0.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+SCENARIOS = {
+    "queue": {"DB_POOL_MODE": "queue", "DB_POOL_PRE_PING": "true"},
+    "queue-no-pre-ping": {"DB_POOL_MODE": "queue", "DB_POOL_PRE_PING": "false"},
+    "null": {"DB_POOL_MODE": "null"},
+}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+MONITOR_NAME = "stress_pool"
+APP_BACKENDS = (
+    f"datname = current_database() AND application_name <> '{MONITOR_NAME}'"
+    " AND backend_type = 'client backend'"
+)
+
+
+def monitor_engine(uri, **kwargs):
+    return create_engine(
+        uri, poolclass=NullPool, connect_args={"application_name": MONITOR_NAME}, **kwargs
+    )
+
+
+def sample_connections(uri, stop, samples):
+    """Samples how many connections the server has from the app every 0.1s"""
+    engine = monitor_engine(uri)
+    with engine.connect() as conn:
+        while not stop.wait(0.1):
+            samples.append(
+                conn.execute(
+                    text(f"SELECT count(*) FROM pg_stat_activity WHERE {APP_BACKENDS}")
+                ).scalar()
+            )
+            conn.rollback()
+    engine.dispose()
+
+
+def kill_idle_connections(uri):
+    """Terminates the app's connections that are not inside a transaction"""
+    engine = monitor_engine(uri, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        killed = conn.execute(
+            text(
+                "SELECT count(pg_terminate_backend(pid)) FROM pg_stat_activity"
+                f" WHERE {APP_BACKENDS} AND state = 'idle'"
+            )
+        ).scalar()
+    engine.dispose()
+    return killed
+
+
+def run_worker(threads, seconds, kill_every):
+    from app import create_app, db
+    from app.db_pool import POOL_CHECKOUT_WAIT
+    from benchmarks.common import bench_user
+
+    app = create_app()
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    results = []  # (finished_at, latency, status)
+    lock = threading.Lock()
+
+    with bench_user(app, accounts=2) as (headers, account_ids):
+        client = app.test_client()
+        for i in range(50):
+            client.post(
+                "/api/transactions/",
+                json={"account_id": account_ids[i % 2], "amount": 10 + i, "type": "income"},
+                headers=headers,
+            )
+        requests = [
+            ("GET", "/api/accounts/", None),
+            ("GET", f"/api/transactions/account/{account_ids[0]}?limit=20", None),
+            ("GET", "/api/analysis/dashboard", None),
+            ("POST", "/api/transactions/",
+             {"account_id": account_ids[1], "amount": 1, "type": "expense"}),
+        ]
+        with app.app_context():
+            db.engine.dispose()  # start from an empty pool
+            pool = db.engine.pool
+            # pg_stat_activity is needed to count and kill server connections
+            postgres = db.engine.dialect.name == "postgresql"
+
+        stop = threading.Event()
+        running = threading.Event()
+        running.set()
+        in_flight = [0]
+        samples, killed, checked_out = [], [], []
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        def work(offset):
+            client = app.test_client()
+            i = offset
+            while time.perf_counter() < deadline:
+                running.wait()
+                method, path, body = requests[i % len(requests)]
+                with lock:
+                    in_flight[0] += 1
+                start = time.perf_counter()
+                status = client.open(path, method=method, json=body, headers=headers).status_code
+                end = time.perf_counter()
+                with lock:
+                    in_flight[0] -= 1
+                    results.append((end - started, end - start, status))
+                i += 1
+
+        def watch_pool():
+            while not stop.wait(0.05):
+                checked_out.append(pool.checkedout() if hasattr(pool, "checkedout") else 0)
+
+        def disrupt():
+            """
+            Every kill_every seconds: let in-flight requests finish, kill the
+            now idle pooled connections, then let traffic resume, as after a
+            quiet spell in which a pooler restarted or a firewall dropped them
+            """
+            while not stop.wait(kill_every):
+                running.clear()
+                while in_flight[0]:
+                    time.sleep(0.005)
+                killed.append(kill_idle_connections(uri))
+                running.set()
+
+        helpers = [threading.Thread(target=watch_pool)]
+        if postgres:
+            helpers.append(
+                threading.Thread(target=sample_connections, args=(uri, stop, samples))
+            )
+        if postgres and kill_every:
+            helpers.append(threading.Thread(target=disrupt))
+        workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        for t in helpers + workers:
+            t.start()
+        for t in workers:
+            t.join()
+        stop.set()
+        for t in helpers:
+            t.join()
+
+    per_second = Counter(int(finished) for finished, _, _ in results if finished < seconds)
+    throughput = [per_second.get(s, 0) for s in range(int(seconds))]
+    latencies = [latency for _, latency, _ in results]
+    wait_p50 = POOL_CHECKOUT_WAIT.quantile(0.5, "default", "ok")
+    wait_p99 = POOL_CHECKOUT_WAIT.quantile(0.99, "default", "ok")
+    return {
+        "requests": len(results),
+        "statuses": dict(Counter(str(status) for _, _, status in results)),
+        "requests_per_sec": round(len(results) / seconds, 1),
+        "per_second_min": min(throughput),
+        "per_second_median": statistics.median(throughput),
+        "per_second_max": max(throughput),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_checked_out": max(checked_out, default=0),
+        "max_server_connections": max(samples, default=0),
+        "idle_connections_killed": sum(killed),
+        "checkout_wait_p50_le_s": wait_p50,
+        "checkout_wait_p99_le_s": wait_p99,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=100, help="concurrent requests")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--kill-idle-every", type=float, default=3, help="seconds; 0 never kills")
+    parser.add_argument("--scenarios", default="queue,queue-no-pre-ping")
+    parser.add_argument("--database", help="SQLAlchemy URI (default SQLALCHEMY_DATABASE_URI)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.threads, args.seconds, args.kill_idle_every)))
+        return
+
+    report = {}
+    for scenario in args.scenarios.split(","):
+        env = {
+            **os.environ,
+            **SCENARIOS[scenario],
+            "DB_POOL_SIZE": str(args.pool_size),
+            "DB_MAX_OVERFLOW": str(args.max_overflow),
+            "DB_POOL_TIMEOUT": str(args.pool_timeout),
+            "RESPONSE_CACHE_TTL": "0",
+            "BCRYPT_POOL_SIZE": "0",
+        }
+        if args.database:
+            env["SQLALCHEMY_DATABASE_URI"] = args.database
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.stress_pool", "--worker",
+                "--threads", str(args.threads), "--seconds", str(args.seconds),
+                "--kill-idle-every", str(args.kill_idle_every),
+            ],
+            env=env, check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        result = report[scenario] = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{scenario:<18} {result['requests_per_sec']:>7} req/s"
+            f" (per second {result['per_second_min']}-{result['per_second_max']})"
+            f"  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms"
+            f"  statuses {result['statuses']}"
+            f"  checked out <= {result['max_checked_out']}"
+            f"  server connections <= {result['max_server_connections']}"
+            f"  killed {result['idle_connections_killed']}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,67 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # /api/analysis/stats: 'auto', 'memory', 'sql' or 'stream'
+    STATS_MODE = os.getenv('STATS_MODE', 'auto')
+    # Authenticated-user cache (TTL in seconds, 0 disables)
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_SHARED = os.getenv('USER_CACHE_SHARED', 'false').lower() == 'true'
+    # Cache of /api/analysis responses (TTL in seconds, 0 disables)
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 2000))
+    # In-memory analytics store (0 MB disables)
+    ANALYTICS_STORE_MAX_MB = float(os.getenv('ANALYTICS_STORE_MAX_MB', 256))
+    ANALYTICS_STORE_MAX_USERS = int(os.getenv('ANALYTICS_STORE_MAX_USERS', 10000))
+    ANALYTICS_STORE_TTL = float(os.getenv('ANALYTICS_STORE_TTL', 600))
+    # In-process search indexes, used off PostgreSQL (0 MB: none kept)
+    SEARCH_INDEX_MAX_MB = float(os.getenv('SEARCH_INDEX_MAX_MB', 128))
+    # Stored forecasts and `flask forecasts rebuild`
+    FORECAST_SEASONAL_MIN_MONTHS = int(os.getenv('FORECAST_SEASONAL_MIN_MONTHS', 24))
+    FORECAST_BATCH_SIZE = int(os.getenv('FORECAST_BATCH_SIZE', 2000))
+    FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', 0))
+    # Chunked account and user deletes
+    DELETE_CHUNK_SIZE = int(os.getenv('DELETE_CHUNK_SIZE', 10000))
+    DELETE_IN_BACKGROUND = os.getenv('DELETE_IN_BACKGROUND', 'true').lower() == 'true'
+    # `flask transactions partition` and `flask transactions archive`
+    TRANSACTION_PARTITION_MONTHS_AHEAD = int(os.getenv('TRANSACTION_PARTITION_MONTHS_AHEAD', 3))
+    TRANSACTION_KEEP_MONTHS = int(os.getenv('TRANSACTION_KEEP_MONTHS', 24))
+    # Server-Timing headers and /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    # Most sub-requests accepted by one POST /api/batch
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+    # JSON encoding: 'orjson' or 'default'; dates 'http' or 'iso'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    JSON_DATETIME_FORMAT = os.getenv('JSON_DATETIME_FORMAT', 'http')
+    # Response compression (br or gzip)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    # Password hashing (pool size 0 hashes inline)
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', min(4, os.cpu_count() or 1)))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 32))
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10))
+    # Run db.create_all() in create_app
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', 'true').lower() == 'true'
+    # Connection pool: 'queue' or 'null' (one connection per request)
+    DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    # Read replicas (comma-separated URIs)
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri.strip()
+    ]
+    REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', 5))
+    REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+    # ASGI mode (uvicorn asgi:app)
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+    ASGI_ASYNC_ROUTES = os.getenv('ASGI_ASYNC_ROUTES', 'true').lower() == 'true'
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
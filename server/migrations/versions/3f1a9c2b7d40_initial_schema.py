@@ -0,0 +1,65 @@
+"""initial schema
+
+Revision ID: 3f1a9c2b7d40
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2b7d40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before migrations existed already have these tables
+    # (from db.create_all()), so only create what is missing.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('username', sa.String(length=50), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username'),
+        )
+
+    if 'accounts' not in existing:
+        op.create_table(
+            'accounts',
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('user_id', sa.Uuid(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('balance', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'transactions' not in existing:
+        op.create_table(
+            'transactions',
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('account_id', sa.Uuid(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('description', sa.String(length=200), nullable=True),
+            sa.Column('type', sa.String(length=10), nullable=False),
+            sa.Column('date', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['account_id'], ['accounts.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('transactions')
+    op.drop_table('accounts')
+    op.drop_table('users')
@@ -0,0 +1,42 @@
+"""add indexes for transaction/account hot queries
+
+Revision ID: 8c2e4d6f1a93
+Revises: 3f1a9c2b7d40
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4d6f1a93'
+down_revision = '3f1a9c2b7d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_accounts_user_id', 'accounts', ['user_id'], unique=False, if_not_exists=True
+    )
+    op.create_index(
+        'ix_transactions_account_id_date',
+        'transactions',
+        ['account_id', sa.text('date DESC'), sa.text('id DESC')],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_transactions_account_id_type_date',
+        'transactions',
+        ['account_id', 'type', 'date'],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_account_id_type_date', table_name='transactions')
+    op.drop_index('ix_transactions_account_id_date', table_name='transactions')
+    op.drop_index('ix_accounts_user_id', table_name='accounts')
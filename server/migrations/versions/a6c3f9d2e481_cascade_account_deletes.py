@@ -0,0 +1,94 @@
+"""cascade account and user deletes in the database
+
+Revision ID: a6c3f9d2e481
+Revises: f4b8e2a7c913
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c3f9d2e481'
+down_revision = 'f4b8e2a7c913'
+branch_labels = None
+depends_on = None
+
+# Names SQLite's unnamed foreign keys in the batches
+SQLITE_NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+# (table, column, referenced table)
+FOREIGN_KEYS = (
+    ('accounts', 'user_id', 'users'),
+    ('transactions', 'account_id', 'accounts'),
+)
+
+
+def foreign_key(table, column):
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['constrained_columns'] == [column]:
+            return fk
+
+
+def set_on_delete(ondelete):
+    for table, column, referred in FOREIGN_KEYS:
+        fk = foreign_key(table, column)
+        if fk is not None and fk['options'].get('ondelete') == ondelete:
+            continue
+        if fk is not None:
+            op.drop_constraint(fk['name'], table, type_='foreignkey')
+        op.create_foreign_key(
+            f'{table}_{column}_fkey', table, referred, [column], ['id'], ondelete=ondelete
+        )
+
+
+def set_sqlite_on_delete(ondelete, user_id_nullable):
+    # SQLite cannot alter constraints: the batches copy each table into a new
+    # one. With foreign keys on, dropping the old one would cascade to the
+    # rows referencing it. The pragma is ignored inside a transaction, so it
+    # must come before any DML
+    op.execute('PRAGMA foreign_keys=OFF')
+    for table, column, referred in FOREIGN_KEYS:
+        # Tables from the initial migration or create_all have unnamed keys
+        with op.batch_alter_table(table, naming_convention=SQLITE_NAMING) as batch_op:
+            fk = foreign_key(table, column)
+            if fk is not None:
+                batch_op.drop_constraint(
+                    fk['name'] or f'fk_{table}_{column}_{referred}', type_='foreignkey'
+                )
+            batch_op.create_foreign_key(
+                f'{table}_{column}_fkey', referred, [column], ['id'], ondelete=ondelete
+            )
+            if table == 'accounts':
+                batch_op.alter_column(
+                    column, existing_type=sa.Uuid(), nullable=user_id_nullable
+                )
+    op.execute('PRAGMA foreign_keys=ON')
+
+
+def upgrade():
+    # Deleted accounts are detached (user_id NULL) while their rows are purged
+    if op.get_bind().dialect.name == 'sqlite':
+        set_sqlite_on_delete('CASCADE', True)
+        return
+    op.alter_column('accounts', 'user_id', nullable=True)
+    set_on_delete('CASCADE')
+
+
+def downgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    if sqlite:
+        op.execute('PRAGMA foreign_keys=OFF')
+    # Finish the purges of detached accounts
+    for table in ('transactions', 'monthly_rollups'):
+        op.execute(
+            f'DELETE FROM {table} WHERE account_id IN '
+            '(SELECT id FROM accounts WHERE user_id IS NULL)'
+        )
+    op.execute('DELETE FROM accounts WHERE user_id IS NULL')
+    if sqlite:
+        set_sqlite_on_delete(None, False)
+        return
+    op.alter_column('accounts', 'user_id', nullable=False)
+    set_on_delete(None)
@@ -0,0 +1,56 @@
+"""add monthly_rollups table
+
+Revision ID: b5d17e0c9a24
+Revises: 8c2e4d6f1a93
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b5d17e0c9a24'
+down_revision = '8c2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # create_app's db.create_all() may already have created the (empty) table
+    inspector = sa.inspect(bind)
+    if 'monthly_rollups' not in inspector.get_table_names():
+        op.create_table(
+            'monthly_rollups',
+            sa.Column('account_id', sa.Uuid(), nullable=False),
+            sa.Column('month', sa.Date(), nullable=False),
+            sa.Column('type', sa.String(length=10), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('account_id', 'month', 'type'),
+        )
+
+    # Created with integer cents by a newer create_all(); e7a2c4f80b16 fills it
+    if 'total' not in {c['name'] for c in inspector.get_columns('monthly_rollups')}:
+        return
+
+    # Backfill from existing history (same as `flask rollups rebuild`)
+    if bind.dialect.name == 'sqlite':
+        month = "date(date, 'start of month')"
+    else:
+        month = "date_trunc('month', date)::date"
+    op.execute('DELETE FROM monthly_rollups')
+    op.execute(
+        f"""
+        INSERT INTO monthly_rollups (account_id, month, type, total, count)
+        SELECT account_id, {month}, type, sum(amount), count(id)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('monthly_rollups')
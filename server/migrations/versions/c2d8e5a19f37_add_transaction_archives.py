@@ -0,0 +1,57 @@
+"""add transaction_archives table
+
+Revision ID: c2d8e5a19f37
+Revises: a6c3f9d2e481
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8e5a19f37'
+down_revision = 'a6c3f9d2e481'
+branch_labels = None
+depends_on = None
+
+
+def array_of(item_type):
+    return sa.JSON().with_variant(postgresql.ARRAY(item_type), 'postgresql')
+
+
+def upgrade():
+    # Filled by `flask transactions archive`. Partitioning the transactions
+    # table itself is done by `flask transactions partition`, not here.
+    # create_app's db.create_all() may already have created the table
+    if 'transaction_archives' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'transaction_archives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Uuid(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('ids', array_of(sa.Uuid()), nullable=False),
+        sa.Column('amounts', array_of(sa.BigInteger()), nullable=False),
+        sa.Column('descriptions', array_of(sa.String(length=200)), nullable=False),
+        sa.Column('types', array_of(sa.String(length=10)), nullable=False),
+        sa.Column('dates', array_of(sa.DateTime()), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_transaction_archives_account_id_month',
+        'transaction_archives',
+        ['account_id', 'month'],
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        # Compress the arrays of tuples past 128 bytes, not only past ~2kB
+        op.execute('ALTER TABLE transaction_archives SET (toast_tuple_target = 128)')
+
+
+def downgrade():
+    op.drop_index('ix_transaction_archives_account_id_month', table_name='transaction_archives')
+    op.drop_table('transaction_archives')
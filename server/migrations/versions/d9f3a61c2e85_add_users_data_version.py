@@ -0,0 +1,29 @@
+"""add users.data_version
+
+Revision ID: d9f3a61c2e85
+Revises: b5d17e0c9a24
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f3a61c2e85'
+down_revision = 'b5d17e0c9a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'data_version' not in columns:
+        op.add_column(
+            'users',
+            sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_column('users', 'data_version')
@@ -0,0 +1,42 @@
+"""add search index on transaction descriptions
+
+Revision ID: e4a7b2c9d051
+Revises: c2d8e5a19f37
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7b2c9d051'
+down_revision = 'c2d8e5a19f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL only: elsewhere search builds in-process indexes. Must match
+    # app.models.transaction.search_vector() for the planner to use it.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index(
+        'ix_transactions_search',
+        'transactions',
+        [
+            sa.text(
+                "array_to_tsvector(string_to_array((CAST(account_id AS TEXT) || ':')"
+                " || regexp_replace(lower(coalesce(description, '')), '\\W+',"
+                " ' ' || (CAST(account_id AS TEXT) || ':'), 'g'), ' '))"
+            )
+        ],
+        postgresql_using='gin',
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_transactions_search', table_name='transactions')
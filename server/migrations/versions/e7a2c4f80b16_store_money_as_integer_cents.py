@@ -0,0 +1,66 @@
+"""store money as integer cents
+
+Revision ID: e7a2c4f80b16
+Revises: d9f3a61c2e85
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c4f80b16'
+down_revision = 'd9f3a61c2e85'
+branch_labels = None
+depends_on = None
+
+# (table, float column, integer cents column)
+MONEY_COLUMNS = (
+    ('accounts', 'balance', 'balance_cents'),
+    ('transactions', 'amount', 'amount_cents'),
+    ('monthly_rollups', 'total', 'total_cents'),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, old, new in MONEY_COLUMNS:
+        columns = {c['name'] for c in sa.inspect(bind).get_columns(table)}
+        if new not in columns:
+            op.add_column(
+                table, sa.Column(new, sa.BigInteger(), server_default='0', nullable=False)
+            )
+        if old in columns:
+            op.execute(f'UPDATE {table} SET {new} = round(coalesce({old}, 0) * 100)')
+            op.drop_column(table, old)
+        # Only balances default to 0 (SQLite cannot drop a column default)
+        if new != 'balance_cents' and bind.dialect.name != 'sqlite':
+            op.alter_column(table, new, server_default=None)
+
+    # Recompute the rollups from the exact amounts rather than converting
+    # totals that accumulated float rounding error (`flask rollups rebuild`)
+    if bind.dialect.name == 'sqlite':
+        month = "date(date, 'start of month')"
+    else:
+        month = "date_trunc('month', date)::date"
+    op.execute('DELETE FROM monthly_rollups')
+    op.execute(
+        f"""
+        INSERT INTO monthly_rollups (account_id, month, type, total_cents, count)
+        SELECT account_id, {month}, type, sum(amount_cents), count(id)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, old, new in MONEY_COLUMNS:
+        op.add_column(table, sa.Column(old, sa.Float(), nullable=True))
+        op.execute(f'UPDATE {table} SET {old} = {new} / 100.0')
+        op.drop_column(table, new)
+        if old != 'balance' and bind.dialect.name != 'sqlite':
+            op.alter_column(table, old, nullable=False)
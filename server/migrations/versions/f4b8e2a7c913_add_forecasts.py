@@ -0,0 +1,41 @@
+"""add forecasts table
+
+Revision ID: f4b8e2a7c913
+Revises: e7a2c4f80b16
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8e2a7c913'
+down_revision = 'e7a2c4f80b16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app's db.create_all() may already have created the (empty) table.
+    # Forecasts are filled on first read or by `flask forecasts rebuild`
+    if 'forecasts' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'forecasts',
+            sa.Column('user_id', sa.Uuid(), nullable=False),
+            sa.Column('data_version', sa.BigInteger(), nullable=False),
+            sa.Column('model', sa.String(length=10), nullable=False),
+            sa.Column('first_month', sa.Date(), nullable=False),
+            sa.Column('last_month', sa.Date(), nullable=False),
+            sa.Column('intercept', sa.Float(), nullable=False),
+            sa.Column('slope', sa.Float(), nullable=False),
+            sa.Column('seasonal', sa.JSON(), nullable=False),
+            sa.Column('history', sa.JSON(), nullable=False),
+            sa.Column('computed_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+
+
+def downgrade():
+    op.drop_table('forecasts')
@@ -0,0 +1,122 @@
+"""
+Prints the PostgreSQL query plan of every query the account, transaction and
+analysis services issue, with and without the hot-query indexes.
+
+The statements are captured by calling the real service functions for one
+user, so the plans always match what the API runs. The "before" plans are
+produced by dropping the indexes inside a transaction that is rolled back
+afterwards. DROP INDEX takes an exclusive lock on the table while the
+transaction is open, so only run this against a development or staging
+database.
+
+Usage (from the server directory):
+    python -m scripts.explain_queries [--email user@example.com] [--analyze]
+                                       [--no-seqscan]
+"""
+import argparse
+from sqlalchemy import event, func
+from app import create_app, db
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services import account_service, analysis_service, transaction_service
+
+HOT_QUERY_INDEXES = [
+    "ix_accounts_user_id",
+    "ix_transactions_account_id_date",
+    "ix_transactions_account_id_type_date",
+]
+
+
+def pick_user(email=None):
+    if email:
+        return User.query.filter_by(email=email).first()
+    # Default to the heaviest user, where the plans matter most
+    row = (
+        db.session.query(Account.user_id)
+        .join(Transaction)
+        .group_by(Account.user_id)
+        .order_by(func.count(Transaction.id).desc())
+        .first()
+    )
+    return db.session.get(User, row.user_id) if row else None
+
+
+def capture_service_queries(user):
+    """Runs the read-only service calls and records the SQL they emit"""
+    account = Account.query.filter_by(user_id=user.id).first()
+    calls = [
+        (account_service.get_user_accounts, (user,)),
+        (transaction_service.get_transactions_by_account, (user, account.id)),
+        (analysis_service.get_dashboard_summary, (user,)),
+        (analysis_service.get_general_statistics, (user,)),
+        (analysis_service.forecast_income, (user,)),
+    ]
+
+    captured = []
+    current = {"label": None}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((current["label"], statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        for fn, args in calls:
+            current["label"] = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+            response, _ = fn(*args)
+            # Page two exercises the keyset predicate as well
+            if fn is transaction_service.get_transactions_by_account:
+                if response.get("next_cursor"):
+                    fn(*args, cursor=response["next_cursor"])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+        db.session.rollback()
+
+    return captured
+
+
+def explain(conn, statement, parameters, analyze=False):
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    result = conn.exec_driver_sql(prefix + statement, parameters)
+    return "\n".join(row[0] for row in result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--email", help="user to run the service queries for")
+    parser.add_argument("--analyze", action="store_true", help="use EXPLAIN ANALYZE")
+    parser.add_argument(
+        "--no-seqscan",
+        action="store_true",
+        help="discourage sequential scans, useful on small dev datasets",
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user = pick_user(args.email)
+        if not user or not Account.query.filter_by(user_id=user.id).first():
+            raise SystemExit("No user with accounts found")
+
+        queries = capture_service_queries(user)
+
+        for phase in ("before", "after"):
+            with db.engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    if args.no_seqscan:
+                        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+                    if phase == "before":
+                        for name in HOT_QUERY_INDEXES:
+                            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+                    print(f"\n{'=' * 20} {phase.upper()} {'=' * 20}")
+                    for label, statement, parameters in queries:
+                        print(f"\n--- {label}\n{statement.strip()}\n")
+                        print(explain(conn, statement, parameters, args.analyze))
+                finally:
+                    trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
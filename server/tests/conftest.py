@@ -0,0 +1,59 @@
+import os
+
+# Set before config.py is imported; load_dotenv() does not override them
+os.environ.update(
+    SECRET_KEY="test-secret-key-of-at-least-32-bytes",
+    BCRYPT_POOL_SIZE="0",
+    BCRYPT_LOG_ROUNDS="4",
+    DELETE_IN_BACKGROUND="false",
+)
+
+import pytest
+from app import create_app, db
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app on a fresh SQLite database"""
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def register(client, name="alice"):
+    """Registers and logs in a user; returns the Authorization headers"""
+    password = "correct horse"
+    client.post(
+        "/api/auth/register",
+        json={
+            "username": name,
+            "email": f"{name}@example.com",
+            "password": password,
+            "confirm_password": password,
+        },
+    )
+    response = client.post(
+        "/api/auth/login", json={"email": f"{name}@example.com", "password": password}
+    )
+    return {"Authorization": f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def headers(client):
+    return register(client)
+
+
+@pytest.fixture
+def account_id(client, headers):
+    response = client.post("/api/accounts/", json={"name": "Checking", "balance": 100}, headers=headers)
+    return response.get_json()["id"]
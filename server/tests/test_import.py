@@ -0,0 +1,91 @@
+import json
+import uuid
+import pytest
+from app.services.transaction_service import validate_import_row
+
+ACCOUNT = uuid.uuid4()
+
+
+def row(**fields):
+    return {"account_id": str(ACCOUNT), "amount": "12.50", "type": "expense", **fields}
+
+
+def test_valid_row():
+    values, error = validate_import_row(row(description="Rent", date="2026-01-31"), {ACCOUNT})
+    assert error is None
+    assert values["account_id"] == ACCOUNT
+    assert values["amount_cents"] == 1250
+    assert values["description"] == "Rent"
+    assert values["date"].isoformat() == "2026-01-31T00:00:00"
+
+
+def test_missing_description_and_date():
+    values, error = validate_import_row(row(description=None), {ACCOUNT})
+    assert error is None
+    assert values["description"] == "" and values["date"] is None
+
+
+@pytest.mark.parametrize(
+    "fields, error",
+    [
+        ({"account_id": "nope"}, "Invalid account_id"),
+        ({"account_id": 42}, "Invalid account_id"),
+        ({"account_id": None}, "Invalid account_id"),
+        ({"account_id": str(uuid.uuid4())}, "Account not found or access denied"),
+        ({"amount": "twelve"}, "Invalid amount"),
+        ({"amount": "1e30"}, "Invalid amount"),
+        ({"type": "transfer"}, "Invalid transaction type. Use 'income' or 'expense'"),
+        ({"type": ["income"]}, "Invalid transaction type. Use 'income' or 'expense'"),
+        ({"description": 123}, "Invalid description"),
+        ({"description": {"a": 1}}, "Invalid description"),
+        ({"description": "x" * 201}, "Description longer than 200 characters"),
+        ({"date": "31/01/2026"}, "Invalid date"),
+        ({"date": 20260131}, "Invalid date"),
+    ],
+)
+def test_invalid_row(fields, error):
+    assert validate_import_row(row(**fields), {ACCOUNT}) == (None, error)
+
+
+def test_ndjson_import_reports_row_errors(client, headers, account_id):
+    lines = [
+        json.dumps({"account_id": account_id, "amount": 10, "type": "income"}),
+        "{not json",
+        json.dumps({"account_id": account_id, "amount": 5, "type": "expense", "description": 123}),
+        "[1, 2]",
+        "",
+        json.dumps({"account_id": account_id, "amount": "2.5", "type": "expense"}),
+    ]
+    response = client.post(
+        "/api/transactions/import?format=ndjson",
+        data="\n".join(lines).encode(),
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["imported"] == 2 and body["failed"] == 3
+    assert body["errors"] == [
+        {"row": 2, "error": "Malformed JSON line"},
+        {"row": 3, "error": "Invalid description"},
+        {"row": 4, "error": "Row is not an object"},
+    ]
+    balance = client.get(f"/api/accounts/{account_id}", headers=headers).get_json()["balance"]
+    assert balance == 100 + 10 - 2.5
+
+
+def test_csv_import_reports_invalid_utf8(client, headers, account_id):
+    data = (
+        "account_id,amount,type,description\n"
+        f"{account_id},10,income,caf\xc3\xa9\n".encode("latin-1")
+        + f"{account_id},3,expense,caf".encode() + b"\xe9\n"
+        + f"{account_id},1,expense,ok\n".encode()
+    )
+    response = client.post(
+        "/api/transactions/import", data=data, content_type="text/csv", headers=headers
+    )
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["imported"] == 2
+    assert body["errors"] == [{"row": 2, "error": "Invalid UTF-8"}]
+    page = client.get(f"/api/transactions/account/{account_id}", headers=headers).get_json()
+    assert sorted(t["description"] for t in page["transactions"]) == ["café", "ok"]
@@ -0,0 +1,59 @@
+from decimal import Decimal
+import pytest
+from app.money import MAX_CENTS, from_cents, to_cents
+
+
+@pytest.mark.parametrize(
+    "value, cents",
+    [
+        (12.5, 1250),
+        ("12.50", 1250),
+        (" 7 ", 700),
+        (0, 0),
+        ("0.005", 1),  # half up, not to even
+        ("0.015", 2),
+        ("2.675", 268),  # a float would round this down
+        ("-0.005", -1),
+        ("-12.345", -1235),
+        (0.1 + 0.2, 30),
+        (Decimal("1e2"), 10000),
+    ],
+)
+def test_to_cents_rounds_half_up(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize(
+    "value", [None, "", "abc", "1,5", True, False, "nan", "inf", float("inf"), [1], {}]
+)
+def test_to_cents_rejects_non_numbers(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+@pytest.mark.parametrize("value", ["1e30", 1e20, "-1e20", str(MAX_CENTS)])
+def test_to_cents_rejects_amounts_past_bigint(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_to_cents_accepts_the_bigint_bounds():
+    largest = Decimal(MAX_CENTS).scaleb(-2)
+    assert to_cents(str(largest)) == MAX_CENTS
+    assert to_cents(str(-largest)) == -MAX_CENTS
+
+
+def test_from_cents():
+    assert from_cents(1234) == 12.34
+    assert from_cents(-5) == -0.05
+    assert from_cents(None) is None
+
+
+def test_huge_amount_is_a_400(client, headers, account_id):
+    response = client.post(
+        "/api/transactions/",
+        json={"account_id": account_id, "amount": "1e30", "type": "income"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid amount"}
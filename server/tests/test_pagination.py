@@ -0,0 +1,63 @@
+import base64
+import uuid
+from datetime import datetime
+import pytest
+from app.services.transaction_service import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    date = datetime(2026, 3, 1, 12, 30, 15, 250)
+    transaction_id = uuid.uuid4()
+    cursor = encode_cursor(date, transaction_id)
+    assert cursor.isascii() and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (date, transaction_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64!",
+        "é",
+        base64.urlsafe_b64encode(b"2026-03-01").decode(),
+        base64.urlsafe_b64encode(b"yesterday|" + str(uuid.uuid4()).encode()).decode(),
+        base64.urlsafe_b64encode(b"2026-03-01T00:00:00|42").decode(),
+        base64.urlsafe_b64encode(b"\xff\xfe|").decode(),
+    ],
+)
+def test_malformed_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_pages_cover_the_account_once(client, headers, account_id):
+    created = set()
+    for i in range(7):
+        response = client.post(
+            "/api/transactions/",
+            json={"account_id": account_id, "amount": i + 1, "type": "income"},
+            headers=headers,
+        )
+        created.add(response.get_json()["id"])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f"/api/transactions/account/{account_id}?limit=3"
+        if cursor:
+            url += f"&cursor={cursor}"
+        body = client.get(url, headers=headers).get_json()
+        seen += [t["id"] for t in body["transactions"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(created) and set(seen) == created
+
+
+def test_invalid_cursor_is_a_400(client, headers, account_id):
+    response = client.get(
+        f"/api/transactions/account/{account_id}?cursor=garbage", headers=headers
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}